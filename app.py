@@ -1,42 +1,106 @@
+import argparse
+import sys
+from datetime import datetime, timedelta
+import html
+import sqlite3
 import requests
-from getschedule import get_email_schedule, check_exam_period
+from mysql.connector import Error
+from schedule_cache import load_schedule_cached
 from day_utils import get_day_info, get_day_schedule
-from assign import assign_license, get_license_usage
-from unassign import unassign_license
-from config import Config
-import time
+from assign import get_license_usage, fetch_total_licenses
+from bulk import run_bulk_license_changes, DEFERRED_MESSAGE
+from circuit import zoom_breaker
+from reconcile import fetch_user_snapshot, plan_reconciliation
+from planner import apply_capacity
+from stages import Stages
+from zoom_auth import get_access_token
+from zoom_users import LICENSED
+from identity import get_identity_index
+from journal import RunJournal
+from lookahead import (get_precomputed_schedule, load_applied_state,
+                       save_applied_state, refresh_lookahead)
+from metrics import metrics, write_outputs
+from run_plan import estimate_plan, save_plan, load_plan, print_plan
+from notifier import notifier
+from negative_cache import get_negative_cache, USER_NOT_FOUND
+from config import Config, DB_SETTINGS, ZOOM_SETTINGS
+from runlock import run_lock
 
 def send_telegram_message(message):
-    """Send a message to the configured Telegram chat."""
-    try:
-        payload = {
-            'chat_id': Config.TELEGRAM_CHAT_ID,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
-        response = requests.post(Config.TELEGRAM_API_URL, json=payload)
-        response.raise_for_status()
-        return True
-    except Exception as e:
-        print(f"❌ Failed to send Telegram notification: {str(e)}")
-        return False
-
-def manage_licenses():
-    from datetime import datetime, timedelta
-    print("🚀 Starting license management...")
-    print("=" * 50)
+    """
+    Queue a message for the configured Telegram chat.
+    
+    Delivery happens in the background (see notifier.py); long messages are
+    split and failed sends are retried, so this returns immediately.
+    """
+    notifier.send(message)
+    return True
+
+def fetch_schedule(target_dates):
+    """
+    Schedule and exam status for the target dates, from the plan precomputed
+    after the last run when it is still current, otherwise from the snapshot.
+    
+    Returns:
+        tuple: (schedule, exam_status) as returned by load_schedule_cached().
+    """
+    precomputed = get_precomputed_schedule(target_dates)
+    if precomputed is not None:
+        return precomputed
+    return load_schedule_cached(target_dates)
+
+def start_fetches(stages, target_dates):
+    """
+    Start the independent fetches a run begins with.
     
+    The schedule comes from the database and the rest from Zoom, so they
+    overlap. The /users listing and the seat count both wait for the OAuth
+    token rather than each requesting one.
+    """
+    stages.add('schedule', fetch_schedule, target_dates)
+    stages.add('zoom_token', get_access_token)
+    stages.add('zoom_snapshot', fetch_user_snapshot, after=('zoom_token',))
+    stages.add('seat_count', fetch_total_licenses, after=('zoom_token',))
+
+def build_run_plan():
+    """
+    Work out today's license operations from the schedule and live Zoom state.
+    
+    Returns:
+        dict: status_today, emails_to_unassign, emails_to_assign, exempted_users,
+              missing_users, unknown_users, deferred_users, free_seats,
+              total_licenses, used_licenses, active_users, unchanged_users
+              and scheduled_today,
+              or None if the schedule could not be fetched.
+    """
     # Get day information
     day_info = get_day_info()
-    today = day_info['today']
-    yesterday = day_info['yesterday']
     
-    # Check Exam Period Status
+    # Fetch the schedule and exam status for today and yesterday, and the
+    # Zoom state, at the same time
     today_date = datetime.now()
     yesterday_date = today_date - timedelta(days=1)
     
-    is_exam_today = check_exam_period(today_date)
-    is_exam_yesterday = check_exam_period(yesterday_date)
+    print("\n📋 Fetching schedule and current Zoom license state...")
+    with Stages() as stages:
+        # Wall time of the overlapped fetches, i.e. the slowest chain of them
+        with metrics.phase('startup'):
+            start_fetches(stages, [today_date, yesterday_date])
+            stages.wait()
+        return _plan_from_fetches(stages, day_info, today_date, yesterday_date)
+
+def _plan_from_fetches(stages, day_info, today_date, yesterday_date):
+    today = day_info['today']
+    yesterday = day_info['yesterday']
+    
+    try:
+        schedule, exam_status = stages.result('schedule')
+    except Error as e:
+        print(f"❌ Error while connecting to MySQL: {e}")
+        schedule, exam_status = None, {}
+    
+    is_exam_today = exam_status.get(today_date.date(), False)
+    is_exam_yesterday = exam_status.get(yesterday_date.date(), False)
     
     status_today = "Exam Period" if is_exam_today else "Teaching Period"
     status_yesterday = "Exam Period" if is_exam_yesterday else "Teaching Period"
@@ -44,29 +108,58 @@ def manage_licenses():
     print(f"📅 Today is: {today} ({status_today})")
     print(f"📅 Yesterday was: {yesterday} ({status_yesterday})")
     
-    # Initialize tracking for failed operations
-    failed_unassign = []
-    failed_assign = []
-    
-    # Get the full schedule
-    print("\n📋 Fetching schedule...")
-    schedule = get_email_schedule()
     if not schedule:
         print("❌ Failed to fetch schedule. Exiting.")
-        return
+        return None
     
-    # Get today's and yesterday's emails
-    today_emails = set(get_day_schedule(schedule, day_info['today']))
-    yesterday_emails = set(get_day_schedule(schedule, day_info['yesterday']))
+    # What the last completed run licensed, which may be from before a weekend
+    applied_date, previously_licensed = load_applied_state()
+    if applied_date is not None and applied_date < yesterday_date.date():
+        print(f"📅 Last completed run: {applied_date.strftime('%A %Y-%m-%d')}")
     
-    # Find emails that are only in yesterday (need to unassign)
-    # But exclude exempt users from being unassigned
-    emails_to_unassign = [email for email in (yesterday_emails - today_emails) 
-                         if email not in Config.EXEMPT_USERS]
+    # Reconcile against live Zoom state so we only PATCH users that need it
+    missing_users = []
+    unchanged_users = []
+    used_licenses = None
+    try:
+        snapshot = stages.result('zoom_snapshot')
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  Could not fetch Zoom users ({e}). Falling back to schedule diff.")
+        snapshot = None
     
-    # Track any exempt users that would have been unassigned
-    exempted_users = [email for email in (yesterday_emails - today_emails) 
-                     if email in Config.EXEMPT_USERS]
+    if snapshot is not None:
+        plan = plan_reconciliation(schedule, day_info['today'], snapshot, previous=previously_licensed)
+        emails_to_unassign = plan['to_unassign']
+        emails_to_assign = plan['to_assign']
+        exempted_users = plan['exempted']
+        missing_users = plan['missing']
+        unchanged_users = plan['unchanged']
+        used_licenses = sum(1 for user_type in snapshot.values() if user_type == LICENSED)
+        print(f"ℹ️  {plan['noop']} users need no change (scheduled and licensed, or unscheduled and unlicensed)")
+        if missing_users:
+            print(f"⚠️  {len(missing_users)} scheduled users have no active Zoom account")
+    else:
+        # Get today's and yesterday's users as IDs of their canonical emails
+        identities = get_identity_index()
+        today_ids = identities.ids(get_day_schedule(schedule, day_info['today']))
+        yesterday_ids = identities.ids(get_day_schedule(schedule, day_info['yesterday']))
+        
+        # Diff against what the last completed run actually licensed rather
+        # than the calendar day before, so Friday's users are still unassigned
+        # on Monday. The schedule was fingerprint-checked when it was fetched.
+        previous = identities.ids(previously_licensed) if previously_licensed is not None else yesterday_ids
+        to_add, to_remove = today_ids - previous, previous - today_ids
+        
+        # Find emails that are no longer scheduled (need to unassign)
+        # But exclude exempt users from being unassigned
+        exempt_ids = identities.ids(Config.EXEMPT_USERS)
+        emails_to_unassign = identities.emails(to_remove - exempt_ids)
+        
+        # Track any exempt users that would have been unassigned
+        exempted_users = identities.emails(to_remove & exempt_ids)
+        
+        # Find emails that are newly scheduled (need to assign)
+        emails_to_assign = identities.emails(to_add)
     
     if exempted_users:
         print("\n🛡️  The following users are exempt from unassignment:")
@@ -74,77 +167,236 @@ def manage_licenses():
             print(f"  • {email}")
         print()
     
-    # Find emails that are only in today (need to assign)
-    emails_to_assign = today_emails - yesterday_emails
+    # Skip users Zoom has recently told us do not exist
+    unknown_users = []
+    try:
+        negative_cache = get_negative_cache()
+        if snapshot is not None:
+            for email in missing_users:
+                negative_cache.add(email, USER_NOT_FOUND, "Not in the active /users listing")
+        emails_to_assign, skipped_assign = negative_cache.split(emails_to_assign)
+        emails_to_unassign, skipped_unassign = negative_cache.split(emails_to_unassign)
+        unknown_users = sorted(set(skipped_assign + skipped_unassign))
+        negative_cache.prune()
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not read negative cache: {e}")
+    if unknown_users:
+        print(f"🚫 Skipping {len(unknown_users)} users cached as having no Zoom account")
+    
+    # Fit assignments into the free seats before sending any PATCH
+    deferred_users = []
+    free_seats = None
+    try:
+        total_licenses = stages.result('seat_count')
+    except requests.exceptions.RequestException:
+        # apply_capacity() retries once and reports the failure
+        total_licenses = None
+    if snapshot is not None and emails_to_assign:
+        with metrics.phase('capacity'):
+            capacity = apply_capacity(emails_to_unassign, emails_to_assign, used_licenses, today_date,
+                                      total_licenses=total_licenses)
+        if capacity is not None:
+            total_licenses = capacity['total_licenses']
+            emails_to_assign = capacity['to_assign']
+            deferred_users = capacity['deferred']
+            free_seats = capacity['free_seats']
+            print(f"🪑 Seats: {capacity['total_licenses']} total, {used_licenses} used, "
+                  f"{capacity['free_after_unassign']} free after unassignments")
+            if deferred_users:
+                print(f"⚠️  Short by {capacity['shortfall']} seats; deferring the lowest-priority users:")
+                for email in deferred_users:
+                    print(f"  • {email}")
     
     print(f"\n📊 Summary:")
     print(f"- Found {len(emails_to_unassign)} users to unassign")
     print(f"- Found {len(emails_to_assign)} users to assign")
+    if deferred_users:
+        print(f"- Deferred {len(deferred_users)} users (no free seat)")
     
-    # Unassign licenses from yesterday's users
-    if emails_to_unassign:
-        print(f"\n🔴 Unassigning licenses for {len(emails_to_unassign)} users...")
-        for i, email in enumerate(emails_to_unassign, 1):
-            print(f"{i}. Unassigning from {email}...", end=" ")
-            try:
-                if unassign_license(email):
-                    print("✅ Done")
-                else:
-                    print("❌ Failed")
-                    failed_unassign.append((email, "Failed to unassign license"))
-            except Exception as e:
-                error_msg = str(e)
-                print(f"❌ Error: {error_msg}")
-                failed_unassign.append((email, error_msg))
-            # Add a small delay to avoid hitting rate limits
-            # time.sleep(1)
+    return {
+        'status_today': status_today,
+        'emails_to_unassign': list(emails_to_unassign),
+        'emails_to_assign': list(emails_to_assign),
+        'exempted_users': exempted_users,
+        'missing_users': missing_users,
+        'unknown_users': unknown_users,
+        'deferred_users': deferred_users,
+        'free_seats': free_seats,
+        'total_licenses': total_licenses,
+        'used_licenses': used_licenses,
+        'active_users': len(snapshot) if snapshot is not None else None,
+        'unchanged_users': unchanged_users,
+        'scheduled_today': get_day_schedule(schedule, day_info['today'])
+    }
+
+def plan_licenses(path=None):
+    """
+    Build today's run plan without changing any license, estimate its cost
+    and save it as JSON for review or a later --apply-plan.
+    
+    The run report is left alone, so it keeps describing the last real run.
+    
+    Args:
+        path (str, optional): Output file. Defaults to Config.PLAN_FILE or CACHE_DIR/run_plan.json.
+    
+    Returns:
+        dict: The run plan, or None if the schedule could not be fetched.
+    """
+    metrics.reset()
+    zoom_breaker.reset()
+    print("🚀 Planning license changes (dry run)...")
+    print("=" * 50)
+    plan = build_run_plan()
+    if plan is None:
+        return None
+    estimate = estimate_plan(plan)
+    print_plan(plan, estimate)
+    print(f"\n💾 Plan written to {save_plan(plan, estimate, path)}")
+    return plan
+
+def manage_licenses(resume=False, saved_plan=None):
+    """
+    Run one license management pass.
+    
+    Phase timings, request latencies and counters are written to the
+    Prometheus textfile and JSON run report at the end, even if the run fails.
+    
+    Args:
+        resume (bool): Retry only the unfinished operations of the last
+                       interrupted run instead of planning a new one.
+        saved_plan (dict, optional): A plan from run_plan.load_plan() to apply
+                                     as-is instead of planning a new one.
+    """
+    if Config.LICENSE_MODE == 'slot':
+        print("⏭️  LICENSE_MODE=slot: slots.py --run manages licenses; skipping the day-level run.")
+        return
+    metrics.reset()
+    zoom_breaker.reset()
+    try:
+        with metrics.phase('total'):
+            _manage_licenses(resume, saved_plan)
+    finally:
+        write_outputs()
+
+def _manage_licenses(resume, saved_plan=None):
+    print("🚀 Starting license management...")
+    print("=" * 50)
+    
+    if resume:
+        journal = RunJournal.latest_incomplete()
+        if journal is None:
+            print("ℹ️ No interrupted run to resume.")
+            return
+        emails_to_unassign, emails_to_assign = journal.pending()
+        # Failures from the interrupted run may have marked users as unknown
+        try:
+            emails_to_unassign, _ = get_negative_cache().split(emails_to_unassign)
+            emails_to_assign, _ = get_negative_cache().split(emails_to_assign)
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not read negative cache: {e}")
+        plan = dict(journal.meta, emails_to_unassign=emails_to_unassign, emails_to_assign=emails_to_assign)
+        print(f"♻️  Resuming run {journal.run_id}: {len(emails_to_unassign)} unassignments "
+              f"and {len(emails_to_assign)} assignments left")
     else:
-        print("\nℹ️ No users to unassign from yesterday.")
-    
-    # Assign licenses to today's users
-    if emails_to_assign:
-        print(f"\n🟢 Assigning licenses to {len(emails_to_assign)} users...")
-        for i, email in enumerate(emails_to_assign, 1):
-            print(f"{i}. Assigning to {email}...", end=" ")
-            try:
-                if assign_license(email):
-                    print("✅ Done")
-                else:
-                    print("❌ Failed")
-                    failed_assign.append((email, "Failed to assign license"))
-            except Exception as e:
-                error_msg = str(e)
-                print(f"❌ Error: {error_msg}")
-                failed_assign.append((email, error_msg))
-            # Add a small delay to avoid hitting rate limits
-            # time.sleep(1)
+        if saved_plan is not None:
+            plan = saved_plan
+            print(f"📄 Applying saved plan: {len(plan['emails_to_unassign'])} unassignments "
+                  f"and {len(plan['emails_to_assign'])} assignments")
+        else:
+            plan = build_run_plan()
+        if plan is None:
+            return
+        emails_to_unassign = plan['emails_to_unassign']
+        emails_to_assign = plan['emails_to_assign']
+        journal = RunJournal.start(emails_to_unassign, emails_to_assign, meta={
+            'status_today': plan['status_today'],
+            'exempted_users': plan['exempted_users'],
+            'missing_users': plan['missing_users'],
+            'unknown_users': plan['unknown_users'],
+            'deferred_users': plan['deferred_users']
+        })
+    
+    status_today = plan['status_today']
+    exempted_users = plan['exempted_users']
+    missing_users = plan['missing_users']
+    deferred_users = plan.get('deferred_users', [])
+    unknown_users = plan.get('unknown_users', [])
+    
+    # Unassign first, then assign, on a bounded pool; every result is journaled.
+    # Seat counts from an interrupted run are stale, so resumes skip the check.
+    failed_unassign, failed_assign = run_bulk_license_changes(emails_to_unassign, emails_to_assign, journal=journal,
+                                                              free_seats=plan.get('free_seats'))
+    
+    # Operations skipped while the Zoom circuit was open are reported once, not per user
+    deferred_unassign = [email for email, error in failed_unassign if error == DEFERRED_MESSAGE]
+    deferred_assign = [email for email, error in failed_assign if error == DEFERRED_MESSAGE]
+    deferred_ops = deferred_unassign + deferred_assign
+    failed_unassign = [(email, error) for email, error in failed_unassign if error != DEFERRED_MESSAGE]
+    failed_assign = [(email, error) for email, error in failed_assign if error != DEFERRED_MESSAGE]
+    
+    if deferred_ops:
+        # Leave the journal open so `--resume` picks the deferred operations up
+        print(f"\n⚡ Zoom outage: {len(deferred_ops)} operations deferred. Run with --resume once Zoom recovers.")
     else:
-        print("\nℹ️ No new users to assign licenses to today.")
+        journal.complete()
+        journal.prune()
+        if not resume:
+            # Record who is actually licensed: scheduled users whose assignment
+            # did not happen are left out (so a sync retries them) and users
+            # whose unassignment failed are kept (so the next run retries it)
+            not_licensed = ({email for email, _ in failed_assign} | set(deferred_users)
+                            | set(missing_users) | set(unknown_users))
+            licensed = [email for email in plan['scheduled_today'] if email not in not_licensed]
+            save_applied_state(datetime.now(), licensed + [email for email, _ in failed_unassign])
     
     # Get license usage information
-    license_info = get_license_usage()
+    with metrics.phase('license_usage'):
+        license_info = get_license_usage(total_licenses=plan.get('total_licenses'))
     
     # Prepare summary message
     total_unassigned = len(emails_to_unassign)
     total_assigned = len(emails_to_assign)
-    success_unassign = total_unassigned - len(failed_unassign)
-    success_assign = total_assigned - len(failed_assign)
+    success_unassign = total_unassigned - len(failed_unassign) - len(deferred_unassign)
+    success_assign = total_assigned - len(failed_assign) - len(deferred_assign)
+    
+    outage_summary = ""
+    if deferred_ops:
+        outage_summary = (f"\n⚡ <b>Zoom outage:</b> circuit breaker opened; {len(deferred_ops)} operations "
+                          f"were deferred and journaled for <code>--resume</code>.\n")
     
-    # Format failed operations for the message
-    def format_failed_operations(failed_list, operation_type):
-        if not failed_list:
-            return "• No failures"
-        return "\n".join([f"• {email}: {error}" for email, error in failed_list])
+    # Long lists go into an attached file so the chat message stays readable
+    attachments = []
+    
+    def format_list(title, lines, empty="• None"):
+        if not lines:
+            return empty
+        limit = Config.TELEGRAM_INLINE_LIST_LIMIT
+        if len(lines) <= limit:
+            return "\n".join(f"• {html.escape(line)}" for line in lines)
+        attachments.append(f"{title} ({len(lines)})\n" + "\n".join(lines))
+        shown = "\n".join(f"• {html.escape(line)}" for line in lines[:limit])
+        return f"{shown}\n… and {len(lines) - limit} more (full list attached)"
     
     # Format the error messages
-    unassign_errors = format_failed_operations(failed_unassign, "unassign")
-    assign_errors = format_failed_operations(failed_assign, "assign")
+    unassign_errors = format_list("Failed unassignments",
+                                  [f"{email}: {error}" for email, error in failed_unassign], "• No failures")
+    assign_errors = format_list("Failed assignments",
+                                [f"{email}: {error}" for email, error in failed_assign], "• No failures")
     
     # Format exempt users list
-    exempt_users_list = "\n".join([f"• {email}" for email in Config.EXEMPT_USERS]) or "• None"
+    exempt_users_list = format_list("Exempt users", list(Config.EXEMPT_USERS))
     
     # Format exempted users in this run
-    exempted_in_run = "\n".join([f"• {email}" for email in exempted_users]) if 'exempted_users' in locals() and exempted_users else "• None"
+    exempted_in_run = format_list("Exempted in this run", exempted_users)
+    
+    # Format scheduled users without a Zoom account
+    missing_in_run = format_list("Scheduled but not in Zoom", missing_users)
+    
+    # Format users skipped because they are cached as not existing in Zoom
+    unknown_in_run = format_list("Skipped (cached as not in Zoom)", unknown_users)
+    
+    # Format users who could not get a seat
+    deferred_in_run = format_list("Deferred (no free seat)", deferred_users)
     
     current_time = datetime.now()
     # Format license info if available
@@ -159,6 +411,18 @@ def manage_licenses():
         if license_info['total_licenses'] > 0 and license_info['available_licenses'] / license_info['total_licenses'] < 0.1:
             license_summary += "\n⚠️ <b>Warning: Running low on available licenses!</b>"
     
+    # Report an outage or failed operations instead of a blanket success
+    failed_ops = len(failed_unassign) + len(failed_assign)
+    total_ops = total_unassigned + total_assigned
+    if total_ops and success_unassign + success_assign == 0 and (failed_ops or deferred_ops):
+        run_status = "❌ <b>Failed</b>: no license changes were applied"
+    elif deferred_ops:
+        run_status = f"⚠️ <b>Partially Completed</b>: {len(deferred_ops)} operations deferred"
+    elif failed_ops:
+        run_status = f"⚠️ <b>Completed with {failed_ops} failures</b>"
+    else:
+        run_status = "✅ <b>Completed Successfully</b>"
+    
     summary = f"""
 <b>📊 License Management Summary</b>
 ==========================
@@ -168,7 +432,7 @@ def manage_licenses():
 
 <b>🔴 Unassigned:</b> {success_unassign}/{total_unassigned}
 <b>🟢 Assigned:</b> {success_assign}/{total_assigned}
-{license_summary}
+{outage_summary}{license_summary}
 
 <b>🛡️ Exempt Users (Never Unassigned):</b>
 {exempt_users_list}
@@ -176,21 +440,63 @@ def manage_licenses():
 <b>🛡️ Exempted in This Run:</b>
 {exempted_in_run}
 
+<b>👻 Scheduled but Not in Zoom:</b>
+{missing_in_run}
+
+<b>🚫 Skipped (Cached as Not in Zoom):</b>
+{unknown_in_run}
+
+<b>🪑 Deferred (No Free Seat):</b>
+{deferred_in_run}
+
 <b>❌ Failed Unassignments:</b>
 {unassign_errors}
 
 <b>❌ Failed Assignments:</b>
 {assign_errors}
 
-✅ <b>Completed Successfully</b>
+{run_status}
 """
     
-    # Send summary via Telegram
-    send_telegram_message(summary)
+    # Queue the summary for Telegram; it is delivered in the background
+    with metrics.phase('notify'):
+        send_telegram_message(summary)
+        if attachments:
+            notifier.send_document(f"license-run-{current_time.strftime('%Y%m%d-%H%M%S')}.txt",
+                                   "\n\n".join(attachments), caption="Full lists for this license run")
+    
+    # Precompute the coming days now, off the next run's critical path
+    with metrics.phase('lookahead'):
+        refresh_lookahead()
     
     print("\n" + "=" * 50)
     print("✅ License management completed!")
-    print("📱 Notification sent to Telegram")
+    print("📱 Notification queued for Telegram")
 
 if __name__ == "__main__":
-    manage_licenses()
+    parser = argparse.ArgumentParser(description="Assign and unassign Zoom licenses from the schedule.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--resume', action='store_true',
+                      help="Retry only the unfinished operations of the last interrupted run")
+    mode.add_argument('--plan', nargs='?', const='', metavar='FILE',
+                      help="Dry run: write the planned changes and cost estimate as JSON, change nothing")
+    mode.add_argument('--apply-plan', nargs='?', const='', metavar='FILE',
+                      help="Apply a plan saved earlier today by --plan")
+    args = parser.parse_args()
+    if args.plan is not None:
+        Config.require(ZOOM_SETTINGS, DB_SETTINGS)
+        plan_licenses(args.plan or None)
+        sys.exit(0)
+    Config.validate_config()
+    saved_plan = None
+    if args.apply_plan is not None:
+        try:
+            saved_plan = load_plan(args.apply_plan or None)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    with run_lock() as acquired:
+        if not acquired:
+            print("⏳ Another license run is in progress. Exiting.")
+        else:
+            manage_licenses(resume=args.resume, saved_plan=saved_plan)
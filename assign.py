@@ -1,83 +1,60 @@
 import requests
-import base64
-from config import Config
+from config import Config, ZOOM_SETTINGS
+from zoom_client import get_client
+from zoom_users import count_licensed_users
+from negative_cache import record_unknown_user
+from user_index import get_user_index, index_enabled, record_license_change
+from metrics import metrics
+from circuit import CircuitOpenError
 from typing import Dict, Optional, Tuple
 
-# Step 1: Get an access token
-def get_access_token():
-    url = Config.ZOOM_AUTH_URL
-    auth_string = f"{Config.ZOOM_CLIENT_ID}:{Config.ZOOM_CLIENT_SECRET}"
-    auth_encoded = base64.b64encode(auth_string.encode()).decode()
+def fetch_total_licenses(client=None):
+    """
+    Get the number of paid seats on the account plan
     
-    headers = {
-        "Authorization": f"Basic {auth_encoded}",
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
+    Returns:
+        int: Licensed seats on the main plan (0 if none is found)
     
-    # URL-encoded form data
-    data = f"grant_type=account_credentials&account_id={Config.ZOOM_ACCOUNT_ID}"
+    Raises:
+        requests.exceptions.RequestException: If the plan cannot be fetched.
+    """
+    client = client or get_client()
     
-    # Debug output (commented out by default for security)
-    # print("\n🔍 Debug Info:")
-    # print(f"Account ID: {Config.ZOOM_ACCOUNT_ID}")
-    # print(f"Client ID: {Config.ZOOM_CLIENT_ID}")
-    # print(f"Auth Header: Basic {'*' * 20}")
-    # print(f"Request Data: {data}\n")
+    # Get account plan information which includes license counts
+    response = client.get("/accounts/me/plans")
+    response.raise_for_status()
     
-    try:
-        response = requests.post(url, headers=headers, data=data)
-        response.raise_for_status()
-        return response.json()["access_token"]
-    except requests.exceptions.RequestException as e:
-        print("❌ Failed to fetch token:")
-        print(f"Error: {str(e)}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Status: {e.response.status_code}")
-            print(f"Response: {e.response.text}")
-        raise
+    plan_data = response.json()
+    
+    # Find the plan that contains license information
+    for plan in plan_data.get('plans', []):
+        if plan.get('type') == 2:  # 2 represents the main plan with licenses
+            return plan.get('hosts', 0)
+    return 0
 
-# Step 2: Assign license by setting type=2 (Licensed user)
-def get_license_usage():
+# Assign license by setting type=2 (Licensed user)
+def get_license_usage(total_licenses=None):
     """
     Get information about license usage
     
+    Args:
+        total_licenses (int, optional): Seat count already fetched for this run
+    
     Returns:
         dict: Dictionary containing total_licenses, used_licenses, and available_licenses
     """
-    token = get_access_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+    client = get_client()
     
     try:
-        # Get account plan information which includes license counts
-        response = requests.get(
-            f"{Config.ZOOM_API_BASE_URL}/accounts/me/plans",
-            headers=headers
-        )
-        response.raise_for_status()
-        
-        plan_data = response.json()
-        
-        # Find the plan that contains license information
-        for plan in plan_data.get('plans', []):
-            if plan.get('type') == 2:  # 2 represents the main plan with licenses
-                total_licenses = plan.get('hosts', 0)
-                break
-        else:
-            total_licenses = 0
+        if total_licenses is None:
+            total_licenses = fetch_total_licenses(client=client)
             
-        # Get number of active users with licenses
-        users_response = requests.get(
-            f"{Config.ZOOM_API_BASE_URL}/users?status=active&page_size=300&page_number=1",
-            headers=headers
-        )
-        users_response.raise_for_status()
-        
-        users_data = users_response.json()
-        used_licenses = sum(1 for user in users_data.get('users', []) 
-                           if user.get('type') == 2)  # Type 2 is licensed user
+        # Count licensed users from the webhook-fed index when it is current,
+        # otherwise across every page of the active user listing
+        if index_enabled() and get_user_index().is_fresh():
+            used_licenses = get_user_index().count_licensed()
+        else:
+            used_licenses = count_licensed_users(client=client)
         
         return {
             'total_licenses': total_licenses,
@@ -103,31 +80,33 @@ def assign_license(user_email, license_type=2):
                                      2: Licensed (Paid)
                                      3: On-premise
     """
-    token = get_access_token()
-    url = f"https://api.zoom.us/v2/users/{user_email}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    
     # Payload to assign a license (type=2 for Licensed user)
     payload = {
         "type": license_type
     }
 
     try:
-        response = requests.patch(url, headers=headers, json=payload)
+        response = get_client().patch(f"/users/{user_email}", json=payload)
         if response.status_code == 204:
+            metrics.inc('operations_total', op='assign', result='ok')
+            record_license_change(user_email, license_type)
             print(f"✅ License assigned successfully for {user_email}")
             return True
         else:
+            metrics.inc('operations_total', op='assign', result='failed')
+            record_unknown_user(user_email, response)
             print(f"❌ Failed to assign license: {response.status_code} - {response.text}")
             return False
+    except CircuitOpenError:
+        # Let the bulk engine defer this user rather than count a failure
+        raise
     except Exception as e:
+        metrics.inc('operations_total', op='assign', result='error')
         print(f"❌ Error assigning license: {str(e)}")
         return False
 
 if __name__ == "__main__":
+    Config.require(ZOOM_SETTINGS, 'DEFAULT_USER_EMAIL')
     # Example usage:
     # assign_license("user@example.com", license_type=2)  # Assign Licensed user
     assign_license(Config.DEFAULT_USER_EMAIL)
@@ -0,0 +1,85 @@
+"""
+Measure how long each CLI command takes to import what it needs.
+
+Every sample runs in a fresh interpreter, so nothing is cached between runs:
+
+    python bench/import_time.py --repeat 10
+
+Reports the median and best wall time per command (interpreter startup
+included) and the slowest top-level imports from `python -X importtime`.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each command imports before it does any work (see cli.py)
+COMMANDS = {
+    'baseline': [],
+    'help': ['cli'],
+    'preview': ['cli', 'todays_schedule'],
+    'usage': ['cli', 'assign'],
+    'assign': ['cli', 'assign'],
+    'unassign': ['cli', 'unassign'],
+    'run': ['cli', 'app'],
+    'plan': ['cli', 'app'],
+    'sync': ['cli', 'app', 'incremental'],
+}
+
+
+def _script(modules):
+    return "; ".join(f"import {module}" for module in modules) or "pass"
+
+
+def time_imports(modules, repeat):
+    """
+    Returns:
+        list: Wall time in milliseconds of each fresh-interpreter run.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", _script(modules)], cwd=ROOT, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def slowest_imports(modules, top=5):
+    """
+    Returns:
+        list: (cumulative ms, module) for the slowest imports directly below the entry modules.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", _script(modules)],
+                            cwd=ROOT, check=True, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # Depth 0 is an entry module, depth 1 its direct imports
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((int(parts[1]) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI import time per command.")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh-interpreter runs per command")
+    parser.add_argument('--commands', nargs='+', choices=sorted(COMMANDS), default=list(COMMANDS))
+    args = parser.parse_args()
+
+    print(f"{'command':<10} {'median ms':>10} {'best ms':>10}   slowest imports")
+    for command in args.commands:
+        modules = COMMANDS[command]
+        samples = time_imports(modules, args.repeat)
+        slowest = ", ".join(f"{name} {ms:.0f}" for ms, name in slowest_imports(modules)) if modules else ""
+        print(f"{command:<10} {statistics.median(samples):>10.1f} {min(samples):>10.1f}   {slowest}")
+
+
+if __name__ == "__main__":
+    main()
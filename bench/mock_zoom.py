@@ -0,0 +1,200 @@
+"""
+Local stand-in for the parts of the Zoom API the license manager uses.
+
+Endpoints:
+    POST  /oauth/token
+    POST  /bot{token}/{method}    (Telegram stand-in for run notifications)
+    GET   /v2/users               (paginated with next_page_token)
+    GET   /v2/users/{email}
+    PATCH /v2/users/{email}
+    GET   /v2/accounts/me/plans
+    GET   /__stats                (request counters, for the benchmark runner)
+
+Latency, a per-second rate limit and a random 5xx error rate are configurable.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class MockZoomState:
+    def __init__(self, users, total_licenses, latency=0.0, rate_limit=0, error_rate=0.0):
+        # email -> type
+        self.users = dict(users)
+        self.emails = sorted(self.users)
+        self.total_licenses = total_licenses
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.window_start = time.monotonic()
+        self.window_count = 0
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def admit(self):
+        """Fixed one-second window limiter. Returns seconds until reset if over limit."""
+        if not self.rate_limit:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            if self.window_count > self.rate_limit:
+                return max(0.0, 1.0 - (now - self.window_start))
+        return None
+
+
+class MockZoomHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        if payload:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _gate(self):
+        """Apply latency, rate limiting and injected errors. Returns True if handled."""
+        state = self.state
+        if state.latency:
+            time.sleep(state.latency)
+        retry_after = state.admit()
+        if retry_after is not None:
+            state.count('429')
+            self._send(429, {'code': 429, 'message': "You have reached the maximum per-second rate limit"}, {
+                'Retry-After': f"{retry_after:.3f}",
+                'X-RateLimit-Type': 'QPS',
+                'X-RateLimit-Limit': str(state.rate_limit),
+                'X-RateLimit-Remaining': '0'
+            })
+            return True
+        if state.error_rate and random.random() < state.error_rate:
+            state.count('5xx')
+            self._send(503, {'code': 503, 'message': 'Injected error'})
+            return True
+        return False
+
+    def do_POST(self):
+        self._read_body()
+        path = urlparse(self.path).path
+        self.state.count('POST ' + path)
+        if path == '/oauth/token':
+            self._send(200, {'access_token': 'mock-token', 'token_type': 'bearer', 'expires_in': 3600})
+        elif path.startswith('/bot'):
+            self._send(200, {'ok': True, 'result': {}})
+        else:
+            self._send(404, {'code': 404, 'message': 'Not found'})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        state = self.state
+
+        if path == '/__stats':
+            with state.lock:
+                self._send(200, dict(state.counts))
+            return
+
+        state.count('GET ' + ('/v2/users/{email}' if path.startswith('/v2/users/') else path))
+        if self._gate():
+            return
+
+        if path == '/v2/accounts/me/plans':
+            self._send(200, {'plans': [{'type': 2, 'hosts': state.total_licenses}]})
+        elif path == '/v2/users':
+            query = parse_qs(parsed.query)
+            page_size = min(int(query.get('page_size', ['30'])[0]), 2000)
+            start = int(query.get('next_page_token', ['0'])[0] or 0)
+            emails = state.emails[start:start + page_size]
+            body = {
+                'page_size': page_size,
+                'total_records': len(state.emails),
+                'next_page_token': str(start + page_size) if start + page_size < len(state.emails) else '',
+                'users': [{'email': email, 'type': state.users[email], 'status': 'active'} for email in emails]
+            }
+            self._send(200, body)
+        elif path.startswith('/v2/users/'):
+            email = unquote(path[len('/v2/users/'):])
+            if email in state.users:
+                self._send(200, {'email': email, 'type': state.users[email], 'status': 'active'})
+            else:
+                self._send(404, {'code': 1001, 'message': 'User does not exist: ' + email})
+        else:
+            self._send(404, {'code': 404, 'message': 'Not found'})
+
+    def do_PATCH(self):
+        body = self._read_body()
+        path = urlparse(self.path).path
+        state = self.state
+        state.count('PATCH /v2/users/{email}')
+        if self._gate():
+            return
+
+        email = unquote(path[len('/v2/users/'):]) if path.startswith('/v2/users/') else None
+        if email not in state.users:
+            self._send(404, {'code': 1001, 'message': f'User does not exist: {email}'})
+            return
+        new_type = json.loads(body or b'{}').get('type')
+        with state.lock:
+            licensed = sum(1 for t in state.users.values() if t == 2)
+            if new_type == 2 and state.users[email] != 2 and licensed >= state.total_licenses:
+                self._send(400, {'code': 200, 'message': 'No available licenses'})
+                return
+            state.users[email] = new_type
+        self._send(204)
+
+
+def make_server(host, port, state):
+    handler = type('BoundMockZoomHandler', (MockZoomHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(host, port, users, total_licenses, latency, rate_limit, error_rate, ready=None):
+    """Run the mock until the process is terminated (used by the benchmark runner)."""
+    state = MockZoomState(users, total_licenses, latency, rate_limit, error_rate)
+    server = make_server(host, port, state)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local mock of the Zoom API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--users', type=int, default=1000, help="Number of users on the mock account")
+    parser.add_argument('--licenses', type=int, default=None, help="Total licenses (default: number of users)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds added to every API call")
+    parser.add_argument('--rate-limit', type=int, default=0, help="Requests per second before 429 (0 = unlimited)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of API calls that return 503")
+    args = parser.parse_args()
+
+    users = {f"user{i:06d}@example.edu": random.choice([1, 2]) for i in range(args.users)}
+    print(f"🧪 Mock Zoom API on http://{args.host}:{args.port} with {args.users} users")
+    serve(args.host, args.port, users, args.licenses or args.users, args.latency, args.rate_limit, args.error_rate)
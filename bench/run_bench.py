@@ -0,0 +1,156 @@
+"""
+Benchmark the license run against a local mock Zoom API and a synthetic schedule.
+
+Each size runs the production entry point, app.manage_licenses(), in its own
+subprocess so peak RSS is measured per size:
+
+    python bench/run_bench.py --sizes 100 1000 10000
+
+The schedule cache starts empty, so every run fetches the schedule as it
+would after a timetable change. Phase times come from the run's own JSON
+run report. Reports wall time per phase, Zoom requests/sec and peak RSS.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The benchmark never talks to real services; satisfy Config validation
+for _name in ('ZOOM_ACCOUNT_ID', 'ZOOM_CLIENT_ID', 'ZOOM_CLIENT_SECRET', 'DEFAULT_USER_EMAIL',
+              'DB_USER', 'DB_PASSWORD', 'DB_NAME', 'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID'):
+    os.environ.setdefault(_name, 'bench')
+os.environ.setdefault('EXEMPT_USERS', 'admin@example.edu')
+os.environ['ZOOM_TOKEN_CACHE_FILE'] = ''
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_size(args):
+    """Run one benchmark size in this process and return the report dict."""
+    import mock_zoom
+    import synth_schedule
+    from config import Config
+
+    db = synth_schedule.generate(':memory:', args.users, exam_days=args.exam_days)
+    rng = random.Random(7)
+    zoom_users = {synth_schedule.email_for(i): rng.choice([1, 2]) for i in range(args.users)}
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=mock_zoom.serve,
+        args=('127.0.0.1', 0, zoom_users, args.users, args.latency, args.rate_limit, args.error_rate, ready),
+        daemon=True
+    )
+    server.start()
+    port = ready.get(timeout=10)
+    base = f"http://127.0.0.1:{port}"
+
+    Config.ZOOM_AUTH_URL = f"{base}/oauth/token"
+    Config.ZOOM_API_BASE_URL = f"{base}/v2"
+    Config.TELEGRAM_API_URL = f"{base}/botbench/sendMessage"
+    Config.LICENSE_MAX_WORKERS = args.workers
+    Config.ZOOM_RATE_LIMIT_LIGHT = args.client_rate
+    Config.ZOOM_RATE_LIMIT_MEDIUM = args.client_rate
+    # Cold cache: no schedule snapshot, lookahead plan or applied state yet
+    Config.CACHE_DIR = tempfile.mkdtemp(prefix='zoom-bench-')
+    Config.METRICS_REPORT_FILE = os.path.join(Config.CACHE_DIR, 'run_report.json')
+
+    import getschedule
+    from app import manage_licenses
+    from notifier import notifier
+
+    class SQLitePool:
+        def get_connection(self):
+            return synth_schedule.SQLiteConnection(db)
+
+    getschedule._pool = SQLitePool()
+
+    devnull = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, devnull
+    started = time.perf_counter()
+    try:
+        manage_licenses()
+        notifier.flush()
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    wall = time.perf_counter() - started
+
+    with open(Config.METRICS_REPORT_FILE) as f:
+        report = json.load(f)
+    phases = {name: round(seconds, 4) for name, seconds in report['phases'].items()}
+    operations = report['counters'].get('operations_total', {})
+
+    with urllib.request.urlopen(f"{base}/__stats") as response:
+        stats = json.load(response)
+    server.terminate()
+
+    api_requests = sum(count for key, count in stats.items() if key.startswith(('GET', 'PATCH')))
+    return {
+        'users': args.users,
+        'wall_seconds': round(wall, 3),
+        'phases': phases,
+        'assign': sum(count for key, count in operations.items() if 'op=assign' in key),
+        'unassign': sum(count for key, count in operations.items() if 'op=unassign' in key),
+        'failed': sum(count for key, count in operations.items() if 'result=ok' not in key),
+        'api_requests': api_requests,
+        'requests_per_second': round(api_requests / wall, 1) if wall else None,
+        'http_429': stats.get('429', 0),
+        'http_5xx': stats.get('5xx', 0),
+        'peak_rss_mb': round(_peak_rss_mb(), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the license run against a local mock Zoom API.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--users', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workers', type=int, default=16, help="Concurrent license updates")
+    parser.add_argument('--client-rate', type=float, default=80, help="Client-side requests/second limit")
+    parser.add_argument('--latency', type=float, default=0.02, help="Mock API latency in seconds")
+    parser.add_argument('--rate-limit', type=int, default=80, help="Mock API requests/second before 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of mock calls returning 503")
+    parser.add_argument('--exam-days', type=int, default=0, help="Active exam period length starting today")
+    parser.add_argument('--json', metavar='PATH', help="Also write the results to a JSON file")
+    args = parser.parse_args()
+
+    if args.users is not None:
+        # Child mode: run a single size and print the report as JSON
+        print(json.dumps(run_size(args)))
+        return
+
+    results = []
+    for size in args.sizes:
+        child_args = [sys.executable, os.path.abspath(__file__), '--users', str(size)]
+        for flag in ('workers', 'client_rate', 'latency', 'rate_limit', 'error_rate', 'exam_days'):
+            child_args += [f"--{flag.replace('_', '-')}", str(getattr(args, flag))]
+        output = subprocess.run(child_args, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"👥 {result['users']:>6} users | ⏱️ {result['wall_seconds']:>8.2f}s | "
+              f"{result['requests_per_second']:>7} req/s | {result['api_requests']:>6} requests | "
+              f"429s {result['http_429']:>4} | RSS {result['peak_rss_mb']:>6.1f} MB")
+        print(f"        phases: {result['phases']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
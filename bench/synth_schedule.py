@@ -0,0 +1,174 @@
+"""
+Synthetic schedule generator for benchmarks.
+
+Creates a SQLite database with the tables the license manager reads
+(days, users, course_unit_programme_mappings, exam_schedules, exams) and
+fills it with N lecturers. SQLiteConnection adapts it to the small part of
+the mysql.connector API that getschedule.py uses, so the real queries run
+against it unchanged.
+"""
+import argparse
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+SCHEMA = """
+CREATE TABLE days (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, updated_at TEXT);
+CREATE TABLE course_unit_programme_mappings (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    day_id INTEGER NOT NULL,
+    academic_session_id INTEGER NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    updated_at TEXT
+);
+CREATE INDEX idx_mappings_session_day ON course_unit_programme_mappings (academic_session_id, day_id);
+CREATE TABLE exam_schedules (id INTEGER PRIMARY KEY, is_active INTEGER, start_date TEXT, end_date TEXT, updated_at TEXT);
+CREATE TABLE exams (
+    id INTEGER PRIMARY KEY,
+    exam_schedule_id INTEGER NOT NULL,
+    exam_date TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    updated_at TEXT
+);
+CREATE INDEX idx_exams_schedule_date ON exams (exam_schedule_id, exam_date);
+"""
+
+
+def email_for(user_id):
+    return f"user{user_id:06d}@example.edu"
+
+
+def generate(path, users, academic_session_id=2, exam_days=0, seed=42):
+    """
+    Fill a SQLite database with a synthetic schedule.
+
+    Args:
+        path (str): Database file (':memory:' works too).
+        users (int): Number of lecturers.
+        academic_session_id (int): Session the teaching rows belong to.
+        exam_days (int): Length of an active exam period starting today (0 = none).
+        seed (int): Random seed for reproducible data.
+
+    Returns:
+        sqlite3.Connection: Open connection to the generated database.
+    """
+    rng = random.Random(seed)
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.executescript(SCHEMA)
+    now = datetime.now().isoformat(sep=' ', timespec='seconds')
+
+    db.executemany("INSERT INTO days (id, name) VALUES (?, ?)", list(enumerate(DAY_NAMES, 1)))
+    db.executemany("INSERT INTO users (id, email, updated_at) VALUES (?, ?, ?)",
+                   [(i, email_for(i), now) for i in range(users)])
+
+    mappings = []
+    for user_id in range(users):
+        for day_id in rng.sample(range(1, 6), rng.randint(1, 3)):
+            for _ in range(rng.randint(1, 4)):
+                start_hour = rng.randint(7, 18)
+                mappings.append((user_id, day_id, academic_session_id,
+                                 f"{start_hour:02d}:00:00", f"{start_hour + 2:02d}:00:00", now))
+    db.executemany(
+        "INSERT INTO course_unit_programme_mappings "
+        "(user_id, day_id, academic_session_id, start_time, end_time, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        mappings
+    )
+
+    if exam_days:
+        start = date.today()
+        end = start + timedelta(days=exam_days - 1)
+        db.execute("INSERT INTO exam_schedules (id, is_active, start_date, end_date, updated_at) VALUES (1, 1, ?, ?, ?)",
+                   (start.isoformat(), end.isoformat(), now))
+        exams = []
+        for offset in range(exam_days):
+            exam_date = (start + timedelta(days=offset)).isoformat()
+            for user_id in rng.sample(range(users), max(1, users // 10)):
+                start_hour = rng.choice([9, 14])
+                exams.append((1, exam_date, user_id, f"{start_hour:02d}:00:00", f"{start_hour + 3:02d}:00:00", now))
+        db.executemany(
+            "INSERT INTO exams (exam_schedule_id, exam_date, user_id, start_time, end_time, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            exams
+        )
+
+    db.commit()
+    return db
+
+
+def _from_sqlite(value):
+    # SQLite stores dates as ISO text; mysql.connector would return date objects
+    if isinstance(value, str) and len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _to_sqlite(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class SQLiteCursor:
+    def __init__(self, db):
+        self._cursor = db.cursor()
+
+    def execute(self, query, params=()):
+        query = query.replace('CAST(%s AS DATE)', '?').replace('%s', '?')
+        self._cursor.execute(query, [_to_sqlite(p) for p in params])
+
+    def _convert(self, rows):
+        return [tuple(_from_sqlite(v) for v in row) for row in rows]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._convert([row])[0]
+
+    def fetchmany(self, size=1):
+        return self._convert(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self._convert(self._cursor.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Minimal mysql.connector-style wrapper around a sqlite3 connection."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def cursor(self, buffered=None, **kwargs):
+        return SQLiteCursor(self._db)
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic schedule database.")
+    parser.add_argument('path', help="SQLite file to create")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--exam-days', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    db = generate(args.path, args.users, exam_days=args.exam_days, seed=args.seed)
+    count = db.execute("SELECT COUNT(*) FROM course_unit_programme_mappings").fetchone()[0]
+    print(f"✅ Wrote {args.users} users and {count} mappings to {args.path}")
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import Config
+from assign import assign_license
+from unassign import unassign_license
+from metrics import metrics
+from circuit import CircuitOpenError
+
+NO_SEAT_MESSAGE = "No free license seat"
+DEFERRED_MESSAGE = "Deferred: Zoom unavailable (circuit open)"
+
+
+def _run_phase(emails, operation, label, failure_message, max_workers, op_name=None, journal=None):
+    """
+    Run one license operation for every email on a bounded thread pool.
+
+    Args:
+        emails (iterable): Emails to process.
+        operation (callable): assign_license or unassign_license.
+        label (str): Verb used in progress output (e.g. "Unassigning from").
+        failure_message (str): Error recorded when the operation returns False.
+        max_workers (int): Maximum number of PATCH requests in flight.
+        op_name (str, optional): Operation name recorded in the journal ("assign"/"unassign").
+        journal (RunJournal, optional): Journal to record each result in.
+
+    Returns:
+        list: (email, error) tuples for every user that failed.
+    """
+    failed = []
+    if not emails:
+        return failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(operation, email): email for email in emails}
+        for i, future in enumerate(as_completed(futures), 1):
+            email = futures[future]
+            try:
+                if future.result():
+                    print(f"{i}. {label} {email}... ✅ Done")
+                    error = None
+                else:
+                    print(f"{i}. {label} {email}... ❌ Failed")
+                    error = failure_message
+            except CircuitOpenError:
+                # ZoomClient skipped the call; reported once for the whole run, not per user
+                error = DEFERRED_MESSAGE
+            except Exception as e:
+                error = str(e)
+                print(f"{i}. {label} {email}... ❌ Error: {error}")
+            if error is not None:
+                failed.append((email, error))
+            if journal is not None:
+                journal.record(op_name, email, error is None, error)
+
+    elapsed = time.perf_counter() - started
+    metrics.set_gauge('operations_per_second', round(len(emails) / elapsed, 3) if elapsed else 0, op=op_name)
+    return failed
+
+
+def run_bulk_license_changes(emails_to_unassign, emails_to_assign, max_workers=None, journal=None, free_seats=None):
+    """
+    Apply license changes concurrently.
+
+    All unassignments finish before any assignment starts so the account
+    never goes over its seat count.
+
+    Args:
+        emails_to_unassign (iterable): Users whose license should be removed.
+        emails_to_assign (iterable): Users who should receive a license.
+        max_workers (int, optional): Max in-flight requests. Defaults to Config.LICENSE_MAX_WORKERS.
+        journal (RunJournal, optional): Records every result so an interrupted run can resume.
+        free_seats (int, optional): Seats free before the run. When given, assignments
+                                    beyond the seats actually freed are not attempted;
+                                    emails_to_assign should already be in priority order.
+
+    Returns:
+        tuple: (failed_unassign, failed_assign), each a list of (email, error) tuples.
+    """
+    if max_workers is None:
+        max_workers = Config.LICENSE_MAX_WORKERS
+    max_workers = max(1, max_workers)
+
+    emails_to_unassign = list(emails_to_unassign)
+    emails_to_assign = list(emails_to_assign)
+
+    if emails_to_unassign:
+        print(f"\n🔴 Unassigning licenses for {len(emails_to_unassign)} users...")
+    else:
+        print("\nℹ️ No users to unassign from yesterday.")
+    with metrics.phase('unassign'):
+        failed_unassign = _run_phase(emails_to_unassign, unassign_license, "Unassigning from",
+                                     "Failed to unassign license", max_workers, 'unassign', journal)
+
+    # If some unassignments failed, fewer seats are free than planned
+    no_seat = []
+    if free_seats is not None:
+        available = max(0, free_seats + len(emails_to_unassign) - len(failed_unassign))
+        emails_to_assign, no_seat = emails_to_assign[:available], emails_to_assign[available:]
+        if no_seat:
+            print(f"\n⚠️  Only {available} seats free; skipping {len(no_seat)} lowest-priority assignments.")
+            for email in no_seat:
+                if journal is not None:
+                    journal.record('assign', email, False, NO_SEAT_MESSAGE)
+
+    if emails_to_assign:
+        print(f"\n🟢 Assigning licenses to {len(emails_to_assign)} users...")
+    else:
+        print("\nℹ️ No new users to assign licenses to today.")
+    with metrics.phase('assign'):
+        failed_assign = _run_phase(emails_to_assign, assign_license, "Assigning to",
+                                   "Failed to assign license", max_workers, 'assign', journal)
+    failed_assign += [(email, NO_SEAT_MESSAGE) for email in no_seat]
+    return failed_unassign, failed_assign
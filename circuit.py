@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+
+import requests
+from config import Config
+from metrics import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a dependency that is known to be down."""
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker for one dependency.
+
+    Tracks the outcome of the last `window` calls. Once at least
+    `min_calls` have been seen and the failure ratio reaches `threshold`,
+    the circuit opens and every call fails fast with CircuitOpenError.
+    After `cooldown` seconds one trial call is let through (half-open); its
+    outcome closes the circuit again or re-opens it. The trial belongs to
+    the thread that claimed it, so that thread's retries of the same call
+    are let through too.
+    """
+
+    def __init__(self, name, threshold=None, min_calls=None, window=None, cooldown=None):
+        self.name = name
+        self.threshold = Config.CIRCUIT_ERROR_THRESHOLD if threshold is None else threshold
+        self.min_calls = Config.CIRCUIT_MIN_CALLS if min_calls is None else min_calls
+        self.window = Config.CIRCUIT_WINDOW if window is None else window
+        self.cooldown = Config.CIRCUIT_COOLDOWN_SECONDS if cooldown is None else cooldown
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._outcomes = deque(maxlen=self.window)
+            self._state = CLOSED
+            self._opened_at = None
+            self._trial_owner = None
+            self.opened_count = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def is_open(self):
+        """True while calls would be rejected (open and still cooling down)."""
+        with self._lock:
+            return self._state == OPEN and time.monotonic() - self._opened_at < self.cooldown
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError if the call should not be made.
+
+        Raises:
+            CircuitOpenError: While the circuit is open.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._trial_owner is None:
+                    self._trial_owner = threading.get_ident()
+                    return
+                if self._trial_owner == threading.get_ident():
+                    return
+        raise CircuitOpenError(f"{self.name} circuit is open; skipping call")
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+            if self._state == HALF_OPEN:
+                print(f"✅ {self.name} is responding again; circuit closed.")
+                self._state = CLOSED
+                self._trial_owner = None
+                self._outcomes.clear()
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+                return
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.threshold:
+                self._open()
+                print(f"⚡ {self.name} circuit opened: {failures} of the last {len(self._outcomes)} calls failed. "
+                      f"Remaining calls will be deferred.")
+
+    def end_trial(self):
+        """Free this thread's trial slot if its call ended without an outcome."""
+        with self._lock:
+            if self._trial_owner == threading.get_ident():
+                self._trial_owner = None
+
+    def _open(self):
+        # Caller holds the lock
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_owner = None
+        self.opened_count += 1
+        metrics.inc('circuit_opened_total', dependency=self.name)
+
+
+# Breaker for the Zoom API, shared by every request in the process
+zoom_breaker = CircuitBreaker('Zoom API')
@@ -0,0 +1,161 @@
+"""
+Single entry point for the license tools.
+
+    python cli.py run [--resume]          # full assign/unassign run
+    python cli.py plan [--output FILE]    # dry run: planned changes and cost estimate
+    python cli.py run --apply-plan [FILE] # apply a plan saved earlier today
+    python cli.py sync                    # apply schedule changes since the last sync
+    python cli.py preview [--offline]     # today's and yesterday's schedule
+    python cli.py usage                   # license seats used and free
+    python cli.py assign EMAIL...         # license specific users
+    python cli.py unassign EMAIL...       # move specific users back to Basic
+
+Each command imports only the modules it needs and checks only the
+settings it uses, so a preview starts without loading the Zoom client and
+without Zoom or Telegram secrets.
+"""
+import argparse
+import sys
+from config import Config, DB_SETTINGS, ZOOM_SETTINGS
+
+
+def _check(validate, *args):
+    """Run a Config check and exit with status 2 if a setting is missing."""
+    try:
+        validate(*args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+
+def cmd_run(args):
+    _check(Config.validate_config)
+    from app import manage_licenses
+    from runlock import run_lock
+    saved_plan = None
+    if args.apply_plan is not None:
+        from run_plan import load_plan
+        try:
+            saved_plan = load_plan(args.apply_plan or None)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+    with run_lock() as acquired:
+        if not acquired:
+            print("⏳ Another license run is in progress. Exiting.")
+            return 0
+        manage_licenses(resume=args.resume, saved_plan=saved_plan)
+    return 0
+
+
+def cmd_plan(args):
+    _check(Config.require, ZOOM_SETTINGS, DB_SETTINGS)
+    from app import plan_licenses
+    return 0 if plan_licenses(args.output) is not None else 1
+
+
+def cmd_sync(args):
+    # A sync may fall back to a full run, which needs every setting
+    _check(Config.validate_config)
+    from runlock import run_lock
+    from incremental import sync_licenses
+    with run_lock() as acquired:
+        if not acquired:
+            print("⏳ Another license run is in progress. Exiting.")
+            return 0
+        result = sync_licenses()
+    return 0 if result is not None and not result['failed'] else 1
+
+
+def cmd_preview(args):
+    if not args.offline:
+        _check(Config.require, DB_SETTINGS)
+    from todays_schedule import main
+    main(offline=args.offline)
+    return 0
+
+
+def cmd_usage(args):
+    _check(Config.require, ZOOM_SETTINGS)
+    from assign import get_license_usage
+    usage = get_license_usage()
+    if not usage:
+        return 1
+    print("📊 License Usage:")
+    print(f"Total Licenses: {usage['total_licenses']}")
+    print(f"Used Licenses: {usage['used_licenses']}")
+    print(f"Available Licenses: {usage['available_licenses']}")
+    return 0
+
+
+def _change_licenses(operation, emails, **kwargs):
+    """Apply a license change to each email; return 0 only if all succeed."""
+    from circuit import CircuitOpenError
+    results = []
+    for email in emails:
+        try:
+            results.append(operation(email, **kwargs))
+        except CircuitOpenError as e:
+            print(f"⏸️  Skipped {email}: {e}")
+            results.append(False)
+    return 0 if all(results) else 1
+
+
+def cmd_assign(args):
+    _check(Config.require, ZOOM_SETTINGS)
+    from assign import assign_license
+    return _change_licenses(assign_license, args.emails, license_type=args.type)
+
+
+def cmd_unassign(args):
+    _check(Config.require, ZOOM_SETTINGS)
+    from unassign import unassign_license
+    return _change_licenses(unassign_license, args.emails)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Zoom license automation.")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    run = commands.add_parser('run', help="Assign and unassign licenses from the schedule")
+    mode = run.add_mutually_exclusive_group()
+    mode.add_argument('--resume', action='store_true',
+                      help="Retry only the unfinished operations of the last interrupted run")
+    mode.add_argument('--apply-plan', nargs='?', const='', metavar='FILE',
+                      help="Apply a plan saved earlier today by the plan command")
+    run.set_defaults(handler=cmd_run)
+
+    plan = commands.add_parser('plan', help="Dry run: write planned changes and a cost estimate as JSON")
+    plan.add_argument('--output', metavar='FILE', help="Plan file (default: PLAN_FILE or CACHE_DIR/run_plan.json)")
+    plan.set_defaults(handler=cmd_plan)
+
+    sync = commands.add_parser('sync', help="Apply today's schedule changes since the last sync or run")
+    sync.set_defaults(handler=cmd_sync)
+
+    preview = commands.add_parser('preview', help="Show today's and yesterday's license schedule")
+    preview.add_argument('--offline', action='store_true',
+                         help="Answer from the local schedule snapshot without touching the database")
+    preview.set_defaults(handler=cmd_preview)
+
+    usage = commands.add_parser('usage', help="Show licensed seats used and available")
+    usage.set_defaults(handler=cmd_usage)
+
+    assign = commands.add_parser('assign', help="Assign licenses to the given users")
+    assign.add_argument('emails', nargs='+', metavar='EMAIL')
+    assign.add_argument('--type', type=int, default=2, help="License type to set (default: 2, Licensed)")
+    assign.set_defaults(handler=cmd_assign)
+
+    unassign = commands.add_parser('unassign', help="Move the given users back to Basic")
+    unassign.add_argument('emails', nargs='+', metavar='EMAIL')
+    unassign.set_defaults(handler=cmd_unassign)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
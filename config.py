@@ -1,5 +1,7 @@
 import os
+import importlib.util
 from dotenv import load_dotenv
+from identity import normalize_email
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,42 +17,186 @@ class Config:
     DB_USER = os.getenv('DB_USER')
     DB_PASSWORD = os.getenv('DB_PASSWORD')
     DB_NAME = os.getenv('DB_NAME')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '3'))
+    # Seconds before a connect gives up
+    DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '10'))
+    # Seconds a query may wait on the server for a read or write
+    DB_QUERY_TIMEOUT = int(os.getenv('DB_QUERY_TIMEOUT', '60'))
+    
+    # Academic session whose teaching schedule drives license assignment
+    ACADEMIC_SESSION_ID = int(os.getenv('ACADEMIC_SESSION_ID', '2'))
+    
+    # Rows fetched per round-trip when streaming schedule results
+    DB_FETCH_BATCH_SIZE = int(os.getenv('DB_FETCH_BATCH_SIZE', '1000'))
+    
+    # Local cache directory (schedule snapshot, run state)
+    CACHE_DIR = os.getenv('CACHE_DIR', '.cache')
+    SCHEDULE_SNAPSHOT_FILE = os.getenv('SCHEDULE_SNAPSHOT_FILE', '')
+    
+    # Run journals used by --resume (defaults to CACHE_DIR/journal)
+    JOURNAL_DIR = os.getenv('JOURNAL_DIR', '')
+    JOURNAL_KEEP = int(os.getenv('JOURNAL_KEEP', '30'))
+    
+    # Run metrics: Prometheus node_exporter textfile (empty disables) and JSON report
+    METRICS_TEXTFILE = os.getenv('METRICS_TEXTFILE', '')
+    METRICS_REPORT_FILE = os.getenv('METRICS_REPORT_FILE', '')
     
     # Default user email for testing
     DEFAULT_USER_EMAIL = os.getenv('DEFAULT_USER_EMAIL')
     
-    # Users who should never be unassigned
-    EXEMPT_USERS = [email.strip() for email in os.getenv('EXEMPT_USERS', '').split(',') if email.strip()]
+    # Users who should never be unassigned (canonical emails, de-duplicated)
+    EXEMPT_USERS = list(dict.fromkeys(filter(None, map(normalize_email, os.getenv('EXEMPT_USERS', '').split(',')))))
     
     # API Endpoints
     ZOOM_AUTH_URL = "https://zoom.us/oauth/token"
     ZOOM_API_BASE_URL = "https://api.zoom.us/v2"
     
+    # OAuth token caching (leave ZOOM_TOKEN_CACHE_FILE empty to keep it in memory only)
+    ZOOM_TOKEN_CACHE_FILE = os.getenv('ZOOM_TOKEN_CACHE_FILE', '')
+    ZOOM_TOKEN_REFRESH_MARGIN = int(os.getenv('ZOOM_TOKEN_REFRESH_MARGIN', '300'))
+    
+    # Maximum number of license PATCH requests in flight at once
+    LICENSE_MAX_WORKERS = int(os.getenv('LICENSE_MAX_WORKERS', '8'))
+    
+    # Zoom rate limits (requests per second per API category, 0 disables the limiter)
+    # Defaults match the Pro plan; Business and higher plans allow 80/60/40.
+    ZOOM_RATE_LIMIT_LIGHT = float(os.getenv('ZOOM_RATE_LIMIT_LIGHT', '30'))
+    ZOOM_RATE_LIMIT_MEDIUM = float(os.getenv('ZOOM_RATE_LIMIT_MEDIUM', '20'))
+    ZOOM_RATE_LIMIT_HEAVY = float(os.getenv('ZOOM_RATE_LIMIT_HEAVY', '10'))
+    
+    # Daily request quotas per category (0 means no local limit)
+    ZOOM_DAILY_LIMIT_LIGHT = int(os.getenv('ZOOM_DAILY_LIMIT_LIGHT', '0'))
+    ZOOM_DAILY_LIMIT_MEDIUM = int(os.getenv('ZOOM_DAILY_LIMIT_MEDIUM', '0'))
+    ZOOM_DAILY_LIMIT_HEAVY = int(os.getenv('ZOOM_DAILY_LIMIT_HEAVY', '0'))
+    
+    # Retry behaviour for 429 and 5xx responses
+    ZOOM_MAX_RETRIES = int(os.getenv('ZOOM_MAX_RETRIES', '5'))
+    ZOOM_BACKOFF_BASE = float(os.getenv('ZOOM_BACKOFF_BASE', '0.5'))
+    ZOOM_MAX_RETRY_WAIT = float(os.getenv('ZOOM_MAX_RETRY_WAIT', '60'))
+    
+    # Users per page when listing /users (Zoom accepts up to 2000)
+    ZOOM_USERS_PAGE_SIZE = int(os.getenv('ZOOM_USERS_PAGE_SIZE', '2000'))
+    
+    # HTTP timeouts for Zoom (OAuth and API), in seconds
+    ZOOM_CONNECT_TIMEOUT = float(os.getenv('ZOOM_CONNECT_TIMEOUT', '5'))
+    ZOOM_READ_TIMEOUT = float(os.getenv('ZOOM_READ_TIMEOUT', '30'))
+    
+    # Circuit breaker: open once CIRCUIT_ERROR_THRESHOLD of the last CIRCUIT_WINDOW
+    # Zoom calls failed (after at least CIRCUIT_MIN_CALLS), then probe again
+    # after CIRCUIT_COOLDOWN_SECONDS
+    CIRCUIT_ERROR_THRESHOLD = float(os.getenv('CIRCUIT_ERROR_THRESHOLD', '0.5'))
+    CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '10'))
+    CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '20'))
+    CIRCUIT_COOLDOWN_SECONDS = float(os.getenv('CIRCUIT_COOLDOWN_SECONDS', '60'))
+    
     # Telegram Configuration
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
     TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
     TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    TELEGRAM_TIMEOUT = float(os.getenv('TELEGRAM_TIMEOUT', '10'))
+    TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', '5'))
+    TELEGRAM_BACKOFF_BASE = float(os.getenv('TELEGRAM_BACKOFF_BASE', '1.0'))
+    # How long a run waits at exit for queued notifications to go out
+    TELEGRAM_FLUSH_TIMEOUT = float(os.getenv('TELEGRAM_FLUSH_TIMEOUT', '60'))
+    # Failure lists longer than this are attached as a file instead of inlined
+    TELEGRAM_INLINE_LIST_LIMIT = int(os.getenv('TELEGRAM_INLINE_LIST_LIMIT', '25'))
+    
+    # Daemon mode: daily run times (HH:MM, comma-separated), weekdays, and an
+    # optional extra reconciliation interval in minutes (0 disables it)
+    DAEMON_RUN_TIMES = [t.strip() for t in os.getenv('DAEMON_RUN_TIMES', '01:00').split(',') if t.strip()]
+    DAEMON_DAYS = [d.strip().lower()[:3] for d in os.getenv('DAEMON_DAYS', 'mon,tue,wed,thu,fri').split(',') if d.strip()]
+    DAEMON_INTERVAL_MINUTES = int(os.getenv('DAEMON_INTERVAL_MINUTES', '0'))
+    
+    # Zoom webhooks (python webhook.py) keep a local user index current.
+    # The index is only used when a secret token is configured.
+    ZOOM_WEBHOOK_SECRET_TOKEN = os.getenv('ZOOM_WEBHOOK_SECRET_TOKEN', '')
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8085'))
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/zoom/webhook')
+    USER_INDEX_FILE = os.getenv('USER_INDEX_FILE', '')
+    # Full /users resync interval for the index, in hours
+    USER_INDEX_RESYNC_HOURS = float(os.getenv('USER_INDEX_RESYNC_HOURS', '24'))
+    
+    # Scheduled emails with no Zoom account are skipped for this many hours
+    # (0 disables the negative cache)
+    NEGATIVE_CACHE_TTL_HOURS = float(os.getenv('NEGATIVE_CACHE_TTL_HOURS', '72'))
+    NEGATIVE_CACHE_FILE = os.getenv('NEGATIVE_CACHE_FILE', '')
+    
+    # Days of schedule the lookahead plan precomputes after each run (0 disables it)
+    LOOKAHEAD_DAYS = int(os.getenv('LOOKAHEAD_DAYS', '7'))
+    LOOKAHEAD_FILE = os.getenv('LOOKAHEAD_FILE', '')
+    
+    # Who gets a seat first when there are not enough free licenses:
+    # 'exam' (invigilators first) and/or 'start_time' (earliest session first)
+    ASSIGN_PRIORITY = [p.strip() for p in os.getenv('ASSIGN_PRIORITY', 'exam,start_time').split(',') if p.strip()]
+    
+    # Dry-run plans (python app.py --plan): default output file, and the PATCH
+    # latency assumed when no earlier run report has measured one
+    PLAN_FILE = os.getenv('PLAN_FILE', '')
+    PLAN_PATCH_LATENCY = float(os.getenv('PLAN_PATCH_LATENCY', '0.3'))
+    
+    # Intra-day sync (python incremental.py): state file, and how often the
+    # daemon runs it between full runs in minutes (0 disables it)
+    INCREMENTAL_STATE_FILE = os.getenv('INCREMENTAL_STATE_FILE', '')
+    DAEMON_SYNC_MINUTES = int(os.getenv('DAEMON_SYNC_MINUTES', '0'))
+    # Minutes a sync waits before retrying a failed full run (doubles per failure)
+    INCREMENTAL_RETRY_MINUTES = int(os.getenv('INCREMENTAL_RETRY_MINUTES', '15'))
+    
+    # 'day': cron, the daemon and the intra-day sync manage licenses per day.
+    # 'slot': only slots.py --run does, per session; day-level runs do nothing.
+    LICENSE_MODE = os.getenv('LICENSE_MODE', 'day').strip().lower()
+    
+    # Just-in-time slot licensing (python slots.py --run)
+    SLOT_LEAD_MINUTES = int(os.getenv('SLOT_LEAD_MINUTES', '15'))
+    SLOT_RELEASE_MINUTES = int(os.getenv('SLOT_RELEASE_MINUTES', '10'))
     
     @classmethod
-    def validate_config(cls):
-        """Validate that all required configuration values are set."""
-        required_vars = [
-            'ZOOM_ACCOUNT_ID',
-            'ZOOM_CLIENT_ID',
-            'ZOOM_CLIENT_SECRET',
-            'DEFAULT_USER_EMAIL',
-            'DB_HOST',
-            'DB_USER',
-            'DB_PASSWORD',
-            'DB_NAME',
-            'TELEGRAM_BOT_TOKEN',
-            'TELEGRAM_CHAT_ID',
-            'EXEMPT_USERS'
-        ]
+    def reload(cls):
+        """
+        Re-read .env and the environment into this class in place.
         
-        missing_vars = [var for var in required_vars if not getattr(cls, var)]
+        Modules hold a reference to this class, so values are copied onto it
+        rather than replacing it. If the new configuration is invalid a
+        ValueError is raised and the current values are kept.
+        """
+        load_dotenv(override=True)
+        spec = importlib.util.spec_from_file_location('_config_reload', __file__)
+        fresh = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(fresh)
+        fresh.Config.validate_config()
+        for name, value in vars(fresh.Config).items():
+            if name.isupper():
+                setattr(cls, name, value)
+    
+    @classmethod
+    def require(cls, *names):
+        """
+        Check that the given settings are set.
+        
+        Each command calls this with only the settings it uses, so a schedule
+        preview does not need Zoom or Telegram secrets.
+        
+        Args:
+            *names (str): Setting names, or groups such as ZOOM_SETTINGS.
+        
+        Raises:
+            ValueError: If any of them is empty.
+        """
+        flat = []
+        for name in names:
+            flat.extend([name] if isinstance(name, str) else name)
+        missing_vars = [var for var in flat if not getattr(cls, var)]
         if missing_vars:
             raise ValueError(f"Missing required configuration: {', '.join(missing_vars)}")
+    
+    @classmethod
+    def validate_config(cls):
+        """Validate that all settings a full license run needs are set."""
+        cls.require(ZOOM_SETTINGS, DB_SETTINGS, TELEGRAM_SETTINGS, 'DEFAULT_USER_EMAIL', 'EXEMPT_USERS')
+        if cls.LICENSE_MODE not in ('day', 'slot'):
+            raise ValueError(f"LICENSE_MODE must be 'day' or 'slot', not '{cls.LICENSE_MODE}'")
 
-# Validate configuration when imported
-Config.validate_config()
+# Setting groups for Config.require()
+ZOOM_SETTINGS = ('ZOOM_ACCOUNT_ID', 'ZOOM_CLIENT_ID', 'ZOOM_CLIENT_SECRET')
+DB_SETTINGS = ('DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_NAME')
+TELEGRAM_SETTINGS = ('TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID')
@@ -0,0 +1,219 @@
+"""
+Long-running scheduler for the license manager.
+
+Runs manage_licenses at the configured times (DAEMON_RUN_TIMES on
+DAEMON_DAYS, plus every DAEMON_INTERVAL_MINUTES if set) while keeping the
+Zoom session, OAuth token and MySQL pool warm between runs. Between full
+runs, the intra-day sync (incremental.py) runs every DAEMON_SYNC_MINUTES
+if set.
+
+Signals:
+    SIGTERM / SIGINT  finish the current run, then exit
+    SIGHUP            reload .env before the next run
+"""
+import argparse
+import signal
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import requests
+from mysql.connector import Error
+from config import Config, DB_SETTINGS, ZOOM_SETTINGS
+import getschedule
+import zoom_client
+from zoom_auth import token_provider
+from app import manage_licenses
+from runlock import run_lock
+from incremental import sync_licenses
+
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+# Settings that require a new connection when they change
+ZOOM_RESET_SETTINGS = ZOOM_SETTINGS + ('ZOOM_API_BASE_URL', 'ZOOM_AUTH_URL')
+DB_RESET_SETTINGS = DB_SETTINGS + ('DB_POOL_SIZE', 'DB_CONNECT_TIMEOUT', 'DB_QUERY_TIMEOUT')
+
+
+def next_run_time(now, last_run=None):
+    """
+    Return the next time a run is due.
+
+    Args:
+        now (datetime): Current time.
+        last_run (datetime, optional): When the previous run started; used
+                                       for DAEMON_INTERVAL_MINUTES.
+    """
+    candidates = []
+    for offset in range(8):
+        day = now.date() + timedelta(days=offset)
+        if DAY_NAMES[day.weekday()] not in Config.DAEMON_DAYS:
+            continue
+        for run_time in Config.DAEMON_RUN_TIMES:
+            hour, minute = (int(part) for part in run_time.split(':'))
+            when = datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+            if when > now:
+                candidates.append(when)
+        if candidates:
+            break
+
+    if Config.DAEMON_INTERVAL_MINUTES > 0:
+        interval = timedelta(minutes=Config.DAEMON_INTERVAL_MINUTES)
+        candidates.append(max(now, (last_run or now) + interval))
+
+    return min(candidates) if candidates else None
+
+
+def next_sync_time(now, last_sync=None):
+    """
+    Return when the next intra-day sync is due, or None if it is disabled.
+
+    Syncs only run on DAEMON_DAYS, like the scheduled runs.
+
+    Args:
+        now (datetime): Current time.
+        last_sync (datetime, optional): When the previous sync or run started.
+    """
+    if Config.DAEMON_SYNC_MINUTES <= 0:
+        return None
+    due = max(now, (last_sync or now) + timedelta(minutes=Config.DAEMON_SYNC_MINUTES))
+    for offset in range(8):
+        day = due.date() + timedelta(days=offset)
+        if DAY_NAMES[day.weekday()] in Config.DAEMON_DAYS:
+            return due if offset == 0 else datetime.combine(day, datetime.min.time())
+    return None
+
+
+class LicenseDaemon:
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stopping = False
+        self._reload_requested = False
+
+    # --- signal handling -------------------------------------------------
+
+    def _handle_stop(self, signum, frame):
+        print(f"\n🛑 Received {signal.Signals(signum).name}; stopping after the current run.")
+        self._stopping = True
+        self._wake.set()
+
+    def _handle_reload(self, signum, frame):
+        print("\n🔄 Received SIGHUP; configuration will be reloaded.")
+        self._reload_requested = True
+        self._wake.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+    # --- warm connections ------------------------------------------------
+
+    def warm_up(self):
+        """Open the Zoom session, fetch a token and fill the DB pool once."""
+        try:
+            token_provider.get_token()
+            zoom_client.get_client()
+            print("✅ Zoom client ready")
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Could not warm up Zoom client: {e}")
+        try:
+            getschedule.get_pool()
+            print("✅ Database pool ready")
+        except Error as e:
+            print(f"⚠️  Could not warm up database pool: {e}")
+
+    def reload_config(self):
+        self._reload_requested = False
+        before = {name: getattr(Config, name) for name in ZOOM_RESET_SETTINGS + DB_RESET_SETTINGS}
+        try:
+            Config.reload()
+        except ValueError as e:
+            print(f"❌ Reload failed, keeping current configuration: {e}")
+            return
+
+        if any(before[name] != getattr(Config, name) for name in ZOOM_RESET_SETTINGS):
+            print("🔁 Zoom settings changed; resetting Zoom client and token.")
+            token_provider.invalidate()
+            zoom_client._client = None
+        if any(before[name] != getattr(Config, name) for name in DB_RESET_SETTINGS):
+            print("🔁 Database settings changed; resetting connection pool.")
+            getschedule._pool = None
+        print("✅ Configuration reloaded")
+
+    # --- main loop -------------------------------------------------------
+
+    def run_once(self):
+        with run_lock() as acquired:
+            if not acquired:
+                print("⏳ Another license run is in progress; skipping this slot.")
+                return
+            try:
+                manage_licenses()
+            except Exception as e:
+                # Keep the daemon alive; the next slot will try again
+                print(f"❌ License run failed: {e}")
+
+    def sync_once(self):
+        with run_lock() as acquired:
+            if not acquired:
+                print("⏳ Another license run is in progress; skipping this sync.")
+                return
+            try:
+                sync_licenses()
+            except Exception as e:
+                print(f"❌ License sync failed: {e}")
+
+    def serve(self, run_now=False):
+        self.install_signal_handlers()
+        self.warm_up()
+        last_run = last_sync = None
+
+        if run_now:
+            last_run = last_sync = datetime.now()
+            self.run_once()
+
+        while not self._stopping:
+            if self._reload_requested:
+                self.reload_config()
+
+            now = datetime.now()
+            run_due = next_run_time(now, last_run)
+            sync_due = next_sync_time(now, last_sync)
+            if run_due is None and sync_due is None:
+                print("❌ No run times configured (check DAEMON_RUN_TIMES and DAEMON_DAYS).")
+                return
+            # A full run also brings the sync up to date, so it wins a tie
+            sync = run_due is None or (sync_due is not None and sync_due < run_due)
+            due = sync_due if sync else run_due
+            print(f"⏰ Next {'sync' if sync else 'run'} at {due.strftime('%Y-%m-%d %H:%M')}")
+
+            self._wake.clear()
+            self._wake.wait(timeout=max(0.0, (due - now).total_seconds()))
+            if self._stopping:
+                break
+            if self._reload_requested or datetime.now() < due:
+                # Woken by SIGHUP; recompute the schedule with the new settings
+                continue
+
+            if sync:
+                last_sync = datetime.now()
+                self.sync_once()
+            else:
+                last_run = last_sync = datetime.now()
+                self.run_once()
+
+        print("👋 License daemon stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the license manager as a long-running scheduler.")
+    parser.add_argument('--now', action='store_true', help="Run once immediately on startup")
+    args = parser.parse_args()
+    Config.validate_config()
+    if Config.LICENSE_MODE == 'slot':
+        print("❌ LICENSE_MODE=slot: run slots.py --run instead of the daemon.")
+        sys.exit(2)
+
+    print(f"🚀 Starting license daemon (runs at {', '.join(Config.DAEMON_RUN_TIMES)} "
+          f"on {', '.join(Config.DAEMON_DAYS)})")
+    LicenseDaemon().serve(run_now=args.now)
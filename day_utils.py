@@ -30,7 +30,7 @@ def get_day_schedule(schedule, day_name=None):
     Get the schedule for a specific day or today if no day is specified.
     
     Args:
-        schedule (dict): The schedule dictionary from get_email_schedule()
+        schedule (dict): The schedule dictionary from load_schedule() or get_email_schedule()
         day_name (str, optional): The day name to get schedule for. Defaults to today.
         
     Returns:
@@ -1,14 +1,84 @@
-import mysql.connector
-from mysql.connector import Error
-from collections import defaultdict
-from config import Config
+import threading
+import time
+from contextlib import contextmanager
+from mysql.connector import Error, pooling
+from config import Config, DB_SETTINGS
+from schedule_index import ScheduleIndex
+from metrics import metrics
 from datetime import datetime, timedelta
 
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Returns the process-wide MySQL connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name="zoom_license",
+                    pool_size=Config.DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    host=Config.DB_HOST,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    database=Config.DB_NAME,
+                    connection_timeout=Config.DB_CONNECT_TIMEOUT,
+                    # connection_timeout only bounds the connect under the C
+                    # extension; these bound every query in both implementations
+                    read_timeout=Config.DB_QUERY_TIMEOUT,
+                    write_timeout=Config.DB_QUERY_TIMEOUT
+                )
+    return _pool
+
+@contextmanager
+def db_connection(connection=None):
+    """
+    Yields a database connection for the duration of a block.
+    
+    If an existing connection is passed in it is reused (and left open) so a
+    whole run can share one connection. Otherwise a connection is borrowed
+    from the pool and returned to it afterwards.
+    """
+    if connection is not None:
+        yield connection
+        return
+    
+    connection = get_pool().get_connection()
+    try:
+        yield connection
+    finally:
+        # close() on a pooled connection hands it back to the pool
+        connection.close()
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+def day_names(target_date):
+    """
+    Returns the forms a `days.name` row may use for the date's weekday.
+    
+    The table may hold full ("Monday") or short ("MON") names; queries compare
+    them against UPPER(d.name).
+    
+    Returns:
+        tuple: (full name, short name), upper-cased, e.g. ("MONDAY", "MON").
+    """
+    full = target_date.strftime('%A').upper()
+    return full, full[:3]
+
 def get_exam_users_for_date(connection, target_date):
     """
     Checks if the target_date falls within an active exam period and fetches
     the assigned users (invigilators) for that specific date.
     
+    Not used by the license run, which reads exam overrides as part of
+    build_schedule_index(); kept for ad-hoc scripts and answered by the same
+    query, so both pick the same exam schedule.
+    
     Args:
         connection: Active MySQL connection.
         target_date (date): The date to check (datetime.date object).
@@ -16,67 +86,25 @@ def get_exam_users_for_date(connection, target_date):
     Returns:
         list: List of user emails if exam exists, else None.
     """
-    cursor = connection.cursor()
-    
-    # 1. Check if the date is within an active exam schedule
-    # We check if there exists an active schedule where target_date is between start and end
-    check_schedule_query = """
-    SELECT id 
-    FROM exam_schedules 
-    WHERE is_active = 1 
-      AND %s BETWEEN start_date AND end_date
-    LIMIT 1;
-    """
-    
-    cursor.execute(check_schedule_query, (target_date,))
-    schedule_row = cursor.fetchone()
-    
-    if not schedule_row:
-        return None
-        
-    schedule_id = schedule_row[0]
-    # print(f"DEBUG: Found active exam schedule ID: {schedule_id} for date {target_date}")
-    
-    # 2. Fetch users assigned to exams on this specific date for this schedule
-    # Join with users table to get emails
-    exam_users_query = """
-    SELECT DISTINCT u.email
-    FROM exams e
-    JOIN users u ON e.user_id = u.id
-    WHERE e.exam_schedule_id = %s
-      AND e.exam_date = %s
-      AND u.email IS NOT NULL;
-    """
-    
-    cursor.execute(exam_users_query, (schedule_id, target_date))
-    rows = cursor.fetchall()
-    
-    if not rows:
-        return [] # Exam period active, but no exams scheduled for this specific day? Return empty list to override teaching schedule.
-        
-    return [row[0] for row in rows]
+    target_date = _as_date(target_date)
+    index = build_schedule_index(connection, [target_date])
+    return sorted(index.emails(target_date)) if index.is_exam(target_date) else None
 
-def check_exam_period(target_date=None):
+def check_exam_period(target_date=None, connection=None):
     """
     Checks if the given date (default today) falls within an active exam period.
     
+    Not used by the license run; see build_schedule_index().
+    
     Returns:
         bool: True if active exam period, False otherwise.
     """
     if target_date is None:
         target_date = datetime.now()
         
-    connection = None
     try:
-        connection = mysql.connector.connect(
-            host=Config.DB_HOST,
-            user=Config.DB_USER,
-            password=Config.DB_PASSWORD,
-            database=Config.DB_NAME
-        )
-        
-        if connection.is_connected():
-            cursor = connection.cursor()
+        with db_connection(connection) as conn:
+            cursor = conn.cursor()
             check_schedule_query = """
             SELECT id 
             FROM exam_schedules 
@@ -84,103 +112,194 @@ def check_exam_period(target_date=None):
               AND %s BETWEEN start_date AND end_date
             LIMIT 1;
             """
+            started = time.perf_counter()
             cursor.execute(check_schedule_query, (target_date,))
-            return cursor.fetchone() is not None
+            found = cursor.fetchone() is not None
+            metrics.observe('db_query_duration_seconds', time.perf_counter() - started, query='exam_period')
+            cursor.close()
+            return found
             
     except Error as e:
         print(f"❌ Error checking exam period: {e}")
         return False
-        
-    finally:
-        if connection and connection.is_connected():
-            connection.close()
 
-def get_email_schedule():
+def _targets_sql(count):
+    return " UNION ALL ".join(["SELECT CAST(%s AS DATE) AS target_date, %s AS day_name, %s AS day_abbr"] * count)
+
+def _schedule_query(target_count):
     """
-    Connects to the database, fetches user emails mapped to days,
-    and returns them as a dictionary.
+    Builds the date-targeted schedule statement.
     
-    Prioritizes Exam Schedule over Teaching Schedule:
-    - If today/yesterday is an Exam Day, returns exam users.
-    - Otherwise, returns standard teaching schedule users.
-    """
-    # Use defaultdict to easily append to lists
-    schedule = defaultdict(list)
-    connection = None  # Initialize connection to None
-    
-    # The SQL query joins the tables to get unique user emails by day for academic session 2
-    teaching_query = """
-    SELECT DISTINCT
-        d.id AS day_id,
-        d.name AS day_name,
-        u.email AS user_email
-    FROM 
-        course_unit_programme_mappings AS m
-    JOIN 
-        users AS u ON m.user_id = u.id
-    JOIN 
-        days AS d ON m.day_id = d.id
-    WHERE 
-        m.academic_session_id = 2
-    ORDER BY
-        d.id, u.email;
+    Teaching rows are filtered to the weekdays of the target dates in SQL, and
+    exam overrides from exams/exam_schedules are merged into the same result:
+    a date inside an active exam period only gets its invigilators. If several
+    active exam schedules cover a date, the one with the lowest id is used.
+    UNION ALL lets the server stream rows; duplicates are removed client-side.
+    """
+    return f"""
+    WITH targets AS (
+        {_targets_sql(target_count)}
+    ),
+    exam_targets AS (
+        SELECT t.target_date, MIN(es.id) AS exam_schedule_id
+        FROM targets AS t
+        JOIN exam_schedules AS es
+          ON es.is_active = 1
+         AND t.target_date BETWEEN es.start_date AND es.end_date
+        GROUP BY t.target_date
+    )
+    SELECT et.target_date, 1 AS is_exam, u.email
+    FROM exam_targets AS et
+    LEFT JOIN exams AS e
+      ON e.exam_schedule_id = et.exam_schedule_id
+     AND e.exam_date = et.target_date
+    LEFT JOIN users AS u
+      ON u.id = e.user_id
+     AND u.email IS NOT NULL
+    UNION ALL
+    SELECT t.target_date, 0 AS is_exam, u.email
+    FROM targets AS t
+    JOIN days AS d ON UPPER(d.name) IN (t.day_name, t.day_abbr)
+    JOIN course_unit_programme_mappings AS m
+      ON m.day_id = d.id
+     AND m.academic_session_id = %s
+    JOIN users AS u ON u.id = m.user_id
+    WHERE u.email IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM exam_targets AS et WHERE et.target_date = t.target_date
+      );
     """
 
+def iter_schedule_rows(connection, target_dates, academic_session_id=None, batch_size=None):
+    """
+    Streams (date, is_exam, email) rows for the target dates.
+    
+    Uses an unbuffered cursor and fetchmany() so only one batch of rows is
+    held client-side at a time. Rows may repeat; an exam date with no exams
+    yields a single row with email None.
+    
+    Args:
+        connection: Active MySQL connection.
+        target_dates (list): Dates to fetch (datetime or date objects).
+        academic_session_id (int, optional): Defaults to Config.ACADEMIC_SESSION_ID.
+        batch_size (int, optional): Rows per fetchmany(). Defaults to Config.DB_FETCH_BATCH_SIZE.
+    """
+    if academic_session_id is None:
+        academic_session_id = Config.ACADEMIC_SESSION_ID
+    batch_size = batch_size or Config.DB_FETCH_BATCH_SIZE
+    target_dates = sorted({_as_date(d) for d in target_dates})
+    if not target_dates:
+        return
+    
+    params = []
+    for target_date in target_dates:
+        params.extend([target_date, *day_names(target_date)])
+    params.append(academic_session_id)
+    
+    started = time.perf_counter()
+    row_count = 0
+    cursor = connection.cursor(buffered=False)
     try:
-        # Establish the database connection using Config
-        connection = mysql.connector.connect(
-            host=Config.DB_HOST,
-            user=Config.DB_USER,
-            password=Config.DB_PASSWORD,
-            database=Config.DB_NAME
-        )
+        cursor.execute(_schedule_query(len(target_dates)), tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            row_count += len(rows)
+            for target_date, is_exam, email in rows:
+                yield _as_date(target_date), bool(is_exam), email
+    finally:
+        cursor.close()
+        metrics.observe('db_query_duration_seconds', time.perf_counter() - started, query='schedule')
+        metrics.inc('db_rows_total', row_count, query='schedule')
+
+def build_schedule_index(connection, target_dates, academic_session_id=None, batch_size=None):
+    """
+    Streams the schedule for the target dates into a de-duplicated ScheduleIndex.
+    
+    Peak memory is one fetch batch plus one interned string per distinct email.
+    
+    Returns:
+        ScheduleIndex: Emails and exam status per date.
+    """
+    target_dates = sorted({_as_date(d) for d in target_dates})
+    index = ScheduleIndex(target_dates)
+    for target_date, is_exam, email in iter_schedule_rows(connection, target_dates, academic_session_id, batch_size):
+        if is_exam:
+            index.mark_exam(target_date)
+        index.add(target_date, email)
+    return index
+
+def fetch_schedule_for_dates(connection, target_dates, academic_session_id=None):
+    """
+    Fetches the license schedule for specific calendar dates in one statement.
+    
+    Thin wrapper over build_schedule_index() that returns plain dicts.
+    
+    Args:
+        connection: Active MySQL connection.
+        target_dates (list): Dates to fetch (datetime or date objects).
+        academic_session_id (int, optional): Defaults to Config.ACADEMIC_SESSION_ID.
         
-        if connection.is_connected():
-            print("✅ Successfully connected to the database.")
-            cursor = connection.cursor()
-            
-            # --- 1. Fetch Standard Teaching Schedule (Baseline) ---
-            cursor.execute(teaching_query)
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                _, day_name, user_email = row
-                schedule[day_name].append(user_email)
-            
-            # --- 2. Check and Override for Exam Schedule ---
-            # We need to check specifically for 'today' and 'yesterday' because
-            # the license logic depends on these two days.
-            
-            today = datetime.now()
-            yesterday = today - timedelta(days=1)
-            
-            # Helper to process a specific date
-            def process_exam_override(date_obj):
-                exam_users = get_exam_users_for_date(connection, date_obj.date())
-                
-                if exam_users is not None:
-                    day_name_full = date_obj.strftime('%A') # e.g., "Monday"
-                    print(f"ℹ️  Exam Period Active for {day_name_full} ({date_obj.date()}). Overriding schedule.")
-                    
-                    # specific overrides
-                    # We treat the schedule dictionary as keyed by Day Name (Monday, Tuesday...)
-                    # If it's an exam day, we REPLACE the list for that day name with exam users.
-                    schedule[day_name_full] = exam_users
-                    
-            process_exam_override(today)
-            process_exam_override(yesterday)
-            
-            return schedule
+    Returns:
+        tuple: (by_date, exam_status) where by_date maps each date -> sorted list
+               of emails and exam_status maps each date -> bool.
+    """
+    index = build_schedule_index(connection, target_dates, academic_session_id)
+    return index.to_dict(), index.exam_status()
 
+def load_schedule(target_dates=None, connection=None, academic_session_id=None):
+    """
+    Fetches the schedule for the given dates, keyed by day name.
+    
+    Prioritizes Exam Schedule over Teaching Schedule:
+    - If a target date is an Exam Day, its weekday holds the exam users.
+    - Otherwise, it holds the standard teaching schedule users.
+    
+    Args:
+        target_dates (list, optional): Dates to fetch. Defaults to today and yesterday.
+        connection (optional): Connection to reuse instead of borrowing from the pool.
+        academic_session_id (int, optional): Defaults to Config.ACADEMIC_SESSION_ID.
+        
+    Returns:
+        tuple: (schedule, exam_status) where schedule maps day name -> list of
+               emails and exam_status maps each target date -> bool.
+    """
+    if target_dates is None:
+        today = datetime.now()
+        target_dates = [today, today - timedelta(days=1)]
+    
+    with db_connection(connection) as conn:
+        by_date, exam_status = fetch_schedule_for_dates(conn, target_dates, academic_session_id)
+    
+    schedule = {}
+    for target_date, emails in by_date.items():
+        day_name = target_date.strftime('%A') # e.g., "Monday"
+        if exam_status[target_date]:
+            print(f"ℹ️  Exam Period Active for {day_name} ({target_date}). Overriding schedule.")
+        schedule[day_name] = emails
+    
+    return schedule, exam_status
+
+def get_email_schedule(connection=None):
+    """
+    Connects to the database, fetches user emails mapped to days,
+    and returns them as a dictionary.
+    
+    Covers the seven days starting yesterday, so every weekday appears once
+    and exam overrides are applied for each actual date.
+    
+    Returns:
+        dict: Day name -> list of emails, or None if the database is unavailable.
+    """
+    yesterday = datetime.now() - timedelta(days=1)
+    try:
+        schedule, _ = load_schedule([yesterday + timedelta(days=i) for i in range(7)], connection=connection)
+        print("✅ Successfully fetched schedule from the database.")
+        return schedule
     except Error as e:
         print(f"❌ Error while connecting to MySQL: {e}")
         return None
-        
-    finally:
-        # Ensure the connection is closed
-        if connection and connection.is_connected():
-            connection.close()
-            print("✅ Database connection closed.")
 
 
 def print_schedule(schedule):
@@ -202,9 +321,10 @@ def print_schedule(schedule):
 
 
 if __name__ == "__main__":
+    Config.require(DB_SETTINGS)
     # 1. Fetch the data from the database
     email_schedule = get_email_schedule()
     
     # 2. Print the formatted schedule
     if email_schedule:
-        print_schedule(email_schedule)
\ No newline at end of file
+        print_schedule(email_schedule)
@@ -0,0 +1,73 @@
+import sys
+import threading
+
+
+def normalize_email(email):
+    """
+    Canonical form of an email address: stripped, lower-cased and interned.
+
+    Returns:
+        str: The canonical email, or None if it is empty.
+    """
+    if not email:
+        return None
+    email = email.strip().lower()
+    return sys.intern(email) if email else None
+
+
+class IdentityIndex:
+    """
+    Maps canonical emails to compact integer IDs.
+
+    Emails reach a run from MySQL, from EXEMPT_USERS and from Zoom. Each is
+    normalised once on the way in, so "Jane@Uni.ac " and "jane@uni.ac" are
+    the same user, and set arithmetic (today vs yesterday, exempt filtering)
+    runs on small ints. IDs are only meaningful within one process.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._emails = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._emails)
+
+    def id_of(self, email):
+        """Return the ID for an email, allocating one the first time it is seen."""
+        email = normalize_email(email)
+        if email is None:
+            return None
+        user_id = self._ids.get(email)
+        if user_id is None:
+            with self._lock:
+                user_id = self._ids.get(email)
+                if user_id is None:
+                    user_id = self._ids[email] = len(self._emails)
+                    self._emails.append(email)
+        return user_id
+
+    def find(self, email):
+        """Return the ID for an email without allocating one, or None."""
+        return self._ids.get(normalize_email(email))
+
+    def ids(self, emails):
+        """Return the set of IDs for an iterable of emails, skipping blanks."""
+        ids = {self.id_of(email) for email in emails}
+        ids.discard(None)
+        return ids
+
+    def email(self, user_id):
+        return self._emails[user_id]
+
+    def emails(self, ids):
+        """Return the canonical emails for a set of IDs, sorted."""
+        return sorted(self._emails[user_id] for user_id in ids)
+
+
+_index = IdentityIndex()
+
+
+def get_identity_index():
+    """Return the process-wide IdentityIndex."""
+    return _index
@@ -0,0 +1,444 @@
+"""
+Intra-day license sync from schedule changes.
+
+The full run (app.py) re-reads the schedule and lists every Zoom user.
+This sync remembers a high-water mark per schedule table (row count,
+latest updated_at and highest id). Each pass reads only the rows changed
+since then and PATCHes only the users whose license should now differ, so
+it is cheap enough to run every few minutes:
+
+    python incremental.py
+
+It keeps a map of today's schedule rows to users, so a row that moves from
+one lecturer to another unassigns the first and assigns the second. A full
+run is done instead when the changes cannot be followed row by row:
+
+- nothing has been synced today yet and no full run has completed today
+- an exam schedule was added, edited or removed (the whole day may switch
+  between teaching and exams)
+- rows were deleted
+
+A failed full run is not retried on every pass; the sync backs off first.
+
+Rows whose updated_at is not maintained by the application are invisible
+to the sync; the next full run still picks them up.
+"""
+import html
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from mysql.connector import Error
+from config import Config
+from getschedule import db_connection, day_names
+from identity import get_identity_index, normalize_email
+from lookahead import load_applied_state, save_applied_state
+from negative_cache import get_negative_cache
+from assign import get_license_usage
+from planner import apply_capacity
+from bulk import run_bulk_license_changes
+from circuit import zoom_breaker
+from notifier import notifier
+from runlock import run_lock
+
+STATE_VERSION = 1
+
+# Used when a table has no updated_at values yet
+EPOCH = '1970-01-01 00:00:00'
+
+MARKS_QUERY = """
+SELECT 'mappings', COUNT(*), MAX(updated_at), MAX(id)
+FROM course_unit_programme_mappings WHERE academic_session_id = %s
+UNION ALL
+SELECT 'exams', COUNT(*), MAX(updated_at), MAX(id) FROM exams
+UNION ALL
+SELECT 'exam_schedules', COUNT(*), MAX(updated_at), MAX(id) FROM exam_schedules
+UNION ALL
+SELECT 'users', COUNT(*), MAX(updated_at), MAX(id) FROM users;
+"""
+
+# Overlapping exam schedules: the full run uses the lowest id, and so does the sync
+ACTIVE_EXAM_SCHEDULES_QUERY = """
+SELECT id FROM exam_schedules
+WHERE is_active = 1 AND %s BETWEEN start_date AND end_date
+ORDER BY id
+LIMIT 1;
+"""
+
+TEACHING_ROWS_QUERY = """
+SELECT m.id, m.user_id, u.email
+FROM course_unit_programme_mappings AS m
+JOIN days AS d ON d.id = m.day_id
+LEFT JOIN users AS u ON u.id = m.user_id
+WHERE m.academic_session_id = %s
+  AND UPPER(d.name) IN (%s, %s);
+"""
+
+EXAM_ROWS_QUERY = """
+SELECT e.id, e.user_id, u.email
+FROM exams AS e
+LEFT JOIN users AS u ON u.id = e.user_id
+WHERE e.exam_schedule_id = %s AND e.exam_date = %s;
+"""
+
+CHANGED_MAPPINGS_QUERY = """
+SELECT m.id, m.user_id, u.email, d.name
+FROM course_unit_programme_mappings AS m
+LEFT JOIN days AS d ON d.id = m.day_id
+LEFT JOIN users AS u ON u.id = m.user_id
+WHERE m.academic_session_id = %s
+  AND m.updated_at >= %s;
+"""
+
+CHANGED_EXAMS_QUERY = """
+SELECT e.id, e.user_id, u.email, e.exam_date, e.exam_schedule_id
+FROM exams AS e
+LEFT JOIN users AS u ON u.id = e.user_id
+WHERE e.updated_at >= %s;
+"""
+
+CHANGED_USERS_QUERY = """
+SELECT id, email FROM users WHERE updated_at >= %s;
+"""
+
+
+def _state_path():
+    return Config.INCREMENTAL_STATE_FILE or os.path.join(Config.CACHE_DIR, 'incremental_state.json')
+
+
+def load_state(path=None):
+    """Returns the saved sync state, or None if there is no usable one."""
+    try:
+        with open(path or _state_path()) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(state, path=None):
+    path = path or _state_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def fetch_marks(connection, academic_session_id=None):
+    """
+    Returns:
+        dict: Table -> {'count', 'updated_at', 'max_id'} high-water marks.
+    """
+    if academic_session_id is None:
+        academic_session_id = Config.ACADEMIC_SESSION_ID
+    cursor = connection.cursor()
+    cursor.execute(MARKS_QUERY, (academic_session_id,))
+    marks = {table: {'count': int(count or 0),
+                     'updated_at': str(updated_at) if updated_at is not None else None,
+                     'max_id': int(max_id or 0)}
+                  for table, count, updated_at, max_id in cursor.fetchall()}
+    cursor.close()
+    return marks
+
+
+def fetch_baseline(connection, target_date, academic_session_id=None):
+    """
+    Read every schedule row that puts someone on target_date's schedule.
+
+    Returns:
+        dict: Sync state without marks: 'date', 'exam_schedule_ids', 'rows'
+              ("m:<id>" or "e:<id>" -> user id) and 'emails' (user id -> email).
+    """
+    if academic_session_id is None:
+        academic_session_id = Config.ACADEMIC_SESSION_ID
+    day = target_date.isoformat()
+    cursor = connection.cursor()
+    cursor.execute(ACTIVE_EXAM_SCHEDULES_QUERY, (day,))
+    exam_schedule_ids = sorted(str(schedule_id) for schedule_id, in cursor.fetchall())
+
+    # Same rule as the full run: an exam period replaces the teaching schedule
+    if exam_schedule_ids:
+        cursor.execute(EXAM_ROWS_QUERY, (exam_schedule_ids[0], day))
+        prefix = 'e'
+    else:
+        cursor.execute(TEACHING_ROWS_QUERY, (academic_session_id, *day_names(target_date)))
+        prefix = 'm'
+    rows, emails = {}, {}
+    for row_id, user_id, email in cursor.fetchall():
+        if user_id is None:
+            continue
+        rows[f"{prefix}:{row_id}"] = str(user_id)
+        if email:
+            emails[str(user_id)] = email
+    cursor.close()
+    return {
+        'version': STATE_VERSION,
+        'date': day,
+        'exam_schedule_ids': exam_schedule_ids,
+        'rows': rows,
+        'emails': emails
+    }
+
+
+def desired_emails(state):
+    """Canonical emails of everyone today's schedule rows point at."""
+    emails = state['emails']
+    return {normalize_email(emails.get(user_id)) for user_id in state['rows'].values()} - {None}
+
+
+def _is_new(row_id, previous, current):
+    # Rows inserted after the current marks were taken are counted next time
+    return previous['max_id'] < row_id <= current['max_id']
+
+
+def apply_changes(connection, state, marks, academic_session_id=None):
+    """
+    Fold schedule rows changed since the state's marks into the state.
+
+    Returns:
+        tuple: (affected emails, reason). reason is None when the changes were
+               applied, or says why a full run is needed instead.
+    """
+    if academic_session_id is None:
+        academic_session_id = Config.ACADEMIC_SESSION_ID
+    previous = state['marks']
+    if marks['exam_schedules'] != previous['exam_schedules']:
+        return set(), "exam schedules changed"
+
+    today = state['date']
+    exam_day = bool(state['exam_schedule_ids'])
+    rows, emails = state['rows'], state['emails']
+    affected = set()
+
+    def update_row(key, user_id, email, relevant):
+        old_user = rows.pop(key, None)
+        if old_user is not None:
+            affected.add(emails.get(old_user))
+        if relevant and user_id is not None:
+            rows[key] = str(user_id)
+            if email:
+                emails[str(user_id)] = email
+            affected.add(email)
+
+    cursor = connection.cursor()
+    inserted = {'mappings': 0, 'exams': 0, 'users': 0}
+
+    # A changed email moves the license from the old address to the new one.
+    # Read these first: the row queries below already join the new address.
+    cursor.execute(CHANGED_USERS_QUERY, (previous['users']['updated_at'] or EPOCH,))
+    for user_id, email in cursor.fetchall():
+        inserted['users'] += _is_new(user_id, previous['users'], marks['users'])
+        old_email = emails.get(str(user_id))
+        if old_email is not None and old_email != email:
+            affected.update((old_email, email))
+            if email:
+                emails[str(user_id)] = email
+            else:
+                del emails[str(user_id)]
+
+    cursor.execute(CHANGED_MAPPINGS_QUERY, (academic_session_id, previous['mappings']['updated_at'] or EPOCH))
+    weekday = day_names(date.fromisoformat(today))
+    for row_id, user_id, email, day_name in cursor.fetchall():
+        inserted['mappings'] += _is_new(row_id, previous['mappings'], marks['mappings'])
+        update_row(f"m:{row_id}", user_id, email, not exam_day and str(day_name).upper() in weekday)
+
+    cursor.execute(CHANGED_EXAMS_QUERY, (previous['exams']['updated_at'] or EPOCH,))
+    for row_id, user_id, email, exam_date, schedule_id in cursor.fetchall():
+        inserted['exams'] += _is_new(row_id, previous['exams'], marks['exams'])
+        relevant = exam_day and str(exam_date)[:10] == today and str(schedule_id) in state['exam_schedule_ids']
+        update_row(f"e:{row_id}", user_id, email, relevant)
+
+    cursor.close()
+
+    # Updates keep the row count; anything else means rows were deleted
+    for table, count in inserted.items():
+        if marks[table]['count'] != previous[table]['count'] + count:
+            return affected, f"rows deleted from {table}"
+
+    state['marks'] = marks
+    return set(filter(None, map(normalize_email, affected))), None
+
+
+def _format_users(emails, limit=None):
+    limit = Config.TELEGRAM_INLINE_LIST_LIMIT if limit is None else limit
+    lines = [f"• {html.escape(email)}" for email in emails[:limit]]
+    if len(emails) > limit:
+        lines.append(f"… and {len(emails) - limit} more")
+    return "\n".join(lines) or "• None"
+
+
+def _full_run_blocked(state, now):
+    """Return when a failed full run may be retried, or None if it may run now."""
+    retry_at = (state or {}).get('full_run_retry_at')
+    if retry_at and now < datetime.fromisoformat(retry_at):
+        return retry_at
+    return None
+
+
+def _record_full_run_failure(state, now):
+    """Back off after a failed full run: INCREMENTAL_RETRY_MINUTES, doubling up to 16x."""
+    state = dict(state or {'version': STATE_VERSION, 'date': None})
+    failures = state.get('full_run_failures', 0) + 1
+    delay = timedelta(minutes=Config.INCREMENTAL_RETRY_MINUTES * 2 ** min(failures - 1, 4))
+    state['full_run_failures'] = failures
+    state['full_run_retry_at'] = (now + delay).isoformat(timespec='seconds')
+    try:
+        save_state(state)
+    except OSError as e:
+        print(f"⚠️  Could not save sync state: {e}")
+    return state['full_run_retry_at']
+
+
+def _fit_capacity(to_unassign, to_assign, today):
+    """
+    Trim assignments to the free seats, like a full run does.
+
+    Returns:
+        tuple: (to_assign, deferred, free_seats). free_seats is None when the
+               seat count could not be read and nothing was trimmed.
+    """
+    usage = get_license_usage()
+    if usage is None:
+        print("⚠️  Could not read seat usage; assigning without a capacity check.")
+        return to_assign, [], None
+    capacity = apply_capacity(to_unassign, to_assign, usage['used_licenses'], today,
+                              total_licenses=usage['total_licenses'])
+    if capacity['deferred']:
+        print(f"🪑 No free seat for {len(capacity['deferred'])} users; retried next sync.")
+    return capacity['to_assign'], capacity['deferred'], capacity['free_seats']
+
+
+def sync_licenses(connection=None):
+    """
+    Apply today's schedule changes since the last sync.
+
+    Falls back to a full run (app.manage_licenses) when the changes cannot be
+    followed row by row. Callers hold the run lock.
+
+    Returns:
+        dict: {'assigned', 'unassigned', 'failed', 'full_run'}, or None if the
+              schedule could not be read or a needed full run failed (or is
+              backing off after a failure).
+    """
+    # app imports a lot; only the full-run fallback needs it
+    from app import manage_licenses
+
+    if Config.LICENSE_MODE == 'slot':
+        print("⏭️  LICENSE_MODE=slot: slots.py --run manages licenses; skipping the sync.")
+        return None
+    zoom_breaker.reset()
+    today = date.today()
+    state = load_state()
+    full_run = False
+    try:
+        with db_connection(connection) as conn:
+            marks = fetch_marks(conn)
+            applied_date, applied = load_applied_state()
+            # A full run today gives a baseline to sync from without another one
+            rebaseline = applied_date == today
+            if state is None or state.get('date') != today.isoformat():
+                reason = "no sync yet today"
+            elif rebaseline and set(applied) != set(state['licensed']):
+                reason = "a full run changed licenses since the last sync"
+            else:
+                believed = set(state['licensed'])
+                candidates, reason = apply_changes(conn, state, marks)
+                candidates |= set(state['retry'])
+                rebaseline = False
+
+            if reason is not None:
+                if not rebaseline:
+                    retry_at = _full_run_blocked(state, datetime.now())
+                    if retry_at:
+                        print(f"⏳ Full run needed ({reason}), but the last one failed; next attempt after {retry_at}.")
+                        return None
+                    print(f"🔄 Full run needed: {reason}.")
+                    manage_licenses()
+                    full_run = True
+                    applied_date, applied = load_applied_state()
+                    if applied_date != today:
+                        retry_at = _record_full_run_failure(state, datetime.now())
+                        print(f"⚠️  The full run did not complete; the next attempt is after {retry_at}.")
+                        return None
+                else:
+                    print(f"🔄 Re-reading today's schedule: {reason}.")
+                # Marks first, so edits made while reading the rows are re-read next time
+                marks = fetch_marks(conn)
+                state = fetch_baseline(conn, today)
+                state['marks'] = marks
+                believed = set(applied)
+                # The full run may have missed edits made while it ran; diff everyone once
+                candidates = believed | desired_emails(state)
+    except Error as e:
+        print(f"❌ Error while connecting to MySQL: {e}")
+        return None
+
+    identities = get_identity_index()
+    candidate_ids = identities.ids(candidates)
+    desired_ids = identities.ids(desired_emails(state))
+    believed_ids = identities.ids(believed)
+    exempt_ids = identities.ids(Config.EXEMPT_USERS)
+    to_assign = identities.emails((candidate_ids & desired_ids) - believed_ids)
+    to_unassign = identities.emails((candidate_ids & believed_ids) - desired_ids - exempt_ids)
+
+    try:
+        to_assign, _ = get_negative_cache().split(to_assign)
+        to_unassign, _ = get_negative_cache().split(to_unassign)
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not read negative cache: {e}")
+
+    deferred, free_seats = [], None
+    if to_assign:
+        to_assign, deferred, free_seats = _fit_capacity(to_unassign, to_assign, today)
+
+    failed, assigned, unassigned = [], [], []
+    if to_assign or to_unassign:
+        print(f"🔁 Schedule changed: {len(to_unassign)} to unassign, {len(to_assign)} to assign")
+        failed_unassign, failed_assign = run_bulk_license_changes(to_unassign, to_assign, free_seats=free_seats)
+        failed = sorted(email for email, _ in failed_unassign + failed_assign)
+        assigned = [email for email in to_assign if email not in failed]
+        unassigned = [email for email in to_unassign if email not in failed]
+        believed.difference_update(unassigned)
+        believed.update(assigned)
+
+        message = (f"<b>🔁 Intra-day License Update</b>\n"
+                   f"<b>🟢 Assigned:</b> {len(assigned)}/{len(to_assign)}\n{_format_users(assigned)}\n"
+                   f"<b>🔴 Unassigned:</b> {len(unassigned)}/{len(to_unassign)}\n{_format_users(unassigned)}")
+        if failed:
+            message += f"\n<b>❌ Failed (retried next sync):</b>\n{_format_users(failed)}"
+        notifier.send(message)
+    elif not full_run:
+        print("✅ No license changes needed.")
+
+    # Only confirmed changes are believed; the rest are retried next sync
+    state['licensed'] = sorted(believed)
+    state['retry'] = sorted(set(failed) | set(deferred))
+    state['synced_at'] = datetime.now().isoformat(timespec='seconds')
+    try:
+        save_state(state)
+        # The next full run diffs against this, so mid-day assignments are released
+        save_applied_state(today, believed)
+    except OSError as e:
+        print(f"⚠️  Could not save sync state: {e}")
+
+    return {
+        'assigned': len(assigned),
+        'unassigned': len(unassigned),
+        'failed': len(failed),
+        'full_run': full_run
+    }
+
+
+if __name__ == "__main__":
+    # A sync may fall back to a full run, which needs everything
+    Config.validate_config()
+    with run_lock() as acquired:
+        if not acquired:
+            print("⏳ Another license run is in progress. Exiting.")
+            sys.exit(0)
+        result = sync_licenses()
+    sys.exit(0 if result is not None and not result['failed'] else 1)
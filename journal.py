@@ -0,0 +1,142 @@
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+from config import Config
+
+
+class RunJournal:
+    """
+    Append-only JSONL journal of one license run.
+
+    The first line records the planned operations, each PATCH result is
+    appended as it completes, and a final line marks the run complete. If a
+    run dies part-way, the journal tells the next run exactly which
+    operations still need doing.
+
+    Record types:
+        {"event": "plan", "run_id": ..., "ops": [{"op": "unassign", "email": ...}, ...], "meta": {...}}
+        {"event": "result", "op": "assign", "email": ..., "ok": true, "error": null}
+        {"event": "complete"}
+    """
+
+    def __init__(self, path, run_id, ops, meta=None, results=None, completed=False):
+        self.path = path
+        self.run_id = run_id
+        self.ops = ops
+        self.meta = meta or {}
+        # (op, email) -> (ok, error) for the latest attempt of each operation
+        self.results = results or {}
+        self.completed = completed
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def directory():
+        return Config.JOURNAL_DIR or os.path.join(Config.CACHE_DIR, 'journal')
+
+    def _append(self, record, sync=False):
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+
+    @classmethod
+    def start(cls, emails_to_unassign, emails_to_assign, meta=None):
+        """Create a new journal and durably record the planned operations."""
+        directory = cls.directory()
+        os.makedirs(directory, exist_ok=True)
+        run_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        ops = [{'op': 'unassign', 'email': email} for email in emails_to_unassign]
+        ops += [{'op': 'assign', 'email': email} for email in emails_to_assign]
+
+        journal = cls(os.path.join(directory, f"run-{run_id}.jsonl"), run_id, ops, meta)
+        journal._append({
+            'event': 'plan',
+            'run_id': run_id,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'ops': ops,
+            'meta': journal.meta
+        }, sync=True)
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        """Replay a journal file. Returns None if it has no readable plan."""
+        plan = None
+        results = {}
+        completed = False
+        with open(path) as f:
+            content = f.read()
+        if content and not content.endswith("\n"):
+            # Terminate a torn final line so new records start on a fresh one
+            with open(path, 'a') as f:
+                f.write("\n")
+
+        for line in content.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-write
+                continue
+            event = record.get('event')
+            if event == 'plan':
+                plan = record
+            elif event == 'result':
+                results[(record['op'], record['email'])] = (record['ok'], record.get('error'))
+            elif event == 'complete':
+                completed = True
+        if plan is None:
+            return None
+        return cls(path, plan['run_id'], plan['ops'], plan.get('meta'), results, completed)
+
+    @classmethod
+    def latest_incomplete(cls):
+        """Return the most recent journal that never reached 'complete', if any."""
+        paths = sorted(glob.glob(os.path.join(cls.directory(), 'run-*.jsonl')), reverse=True)
+        for path in paths:
+            journal = cls.load(path)
+            if journal is None:
+                continue
+            if journal.completed:
+                # Only the latest run matters; an older crash was superseded
+                return None
+            return journal
+        return None
+
+    def record(self, op, email, ok, error=None):
+        """Append the result of one operation (thread-safe)."""
+        self.results[(op, email)] = (ok, error)
+        self._append({'event': 'result', 'op': op, 'email': email, 'ok': ok, 'error': error})
+
+    def pending(self):
+        """
+        Return the operations that have not succeeded yet.
+
+        Returns:
+            tuple: (emails_to_unassign, emails_to_assign)
+        """
+        unassign, assign = [], []
+        for item in self.ops:
+            ok, _ = self.results.get((item['op'], item['email']), (False, None))
+            if ok:
+                continue
+            (unassign if item['op'] == 'unassign' else assign).append(item['email'])
+        return unassign, assign
+
+    def complete(self):
+        """Mark the run as finished."""
+        self.completed = True
+        self._append({'event': 'complete', 'finished_at': datetime.now().isoformat(timespec='seconds')}, sync=True)
+
+    def prune(self, keep=None):
+        """Delete all but the newest `keep` journals (default Config.JOURNAL_KEEP)."""
+        keep = Config.JOURNAL_KEEP if keep is None else keep
+        paths = sorted(glob.glob(os.path.join(self.directory(), 'run-*.jsonl')), reverse=True)
+        for path in paths[keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
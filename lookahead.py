@@ -0,0 +1,245 @@
+"""
+Multi-day lookahead plan.
+
+Resolves the license set for every calendar date over the next
+LOOKAHEAD_DAYS in one batched pass (via the schedule snapshot), with exam
+overrides applied. For each run day (DAEMON_DAYS, which should match your
+cron days) it stores the assign/unassign delta against the previous run
+day. The first run day is compared with the state the last run actually
+applied, so a Friday-to-Monday transition is never lost over the weekend.
+
+The nightly run reads today's entry from the stored plan after a single
+fingerprint query confirms the schedule tables have not changed, and
+refreshes the plan after it has finished.
+
+    python lookahead.py            # precompute and print the plan
+    python lookahead.py --days 14
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+from mysql.connector import Error
+from config import Config, DB_SETTINGS
+from getschedule import db_connection
+from schedule_cache import get_schedule_index, load_snapshot, fetch_fingerprint
+from identity import get_identity_index, normalize_email
+
+LOOKAHEAD_VERSION = 1
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+
+def _plan_path():
+    return Config.LOOKAHEAD_FILE or os.path.join(Config.CACHE_DIR, 'lookahead.json')
+
+
+def _applied_path():
+    return os.path.join(Config.CACHE_DIR, 'applied_state.json')
+
+
+def _to_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_run_day(target_date):
+    return DAY_NAMES[target_date.weekday()] in Config.DAEMON_DAYS
+
+
+def load_applied_state():
+    """
+    Return what the last completed run left licensed.
+
+    Returns:
+        tuple: (date, set of emails), or (None, None) if no run has completed yet.
+    """
+    state = _read_json(_applied_path())
+    if not state:
+        return None, None
+    return date.fromisoformat(state['date']), set(state['emails'])
+
+
+def save_applied_state(target_date, emails):
+    """Record the scheduled users a completed run licensed on target_date."""
+    try:
+        _write_json(_applied_path(), {
+            'date': _to_date(target_date).isoformat(),
+            'emails': sorted(set(filter(None, map(normalize_email, emails))))
+        })
+    except OSError as e:
+        print(f"⚠️  Could not save applied license state: {e}")
+
+
+def compute_lookahead(start_date=None, days=None, connection=None, offline=False):
+    """
+    Resolve the schedule for yesterday plus the next `days` dates in one pass.
+
+    Args:
+        start_date (date, optional): First date to plan. Defaults to today.
+        days (int, optional): Number of dates to plan. Defaults to Config.LOOKAHEAD_DAYS.
+        connection: Optional open MySQL connection to reuse.
+        offline (bool): Resolve from the stored snapshot only.
+
+    Returns:
+        dict: {
+            'version', 'generated_at', 'start',
+            'days': {iso date: {'emails', 'exam', 'run_day', 'assign', 'unassign'}}
+        }
+        'assign'/'unassign' are only set on run days and are relative to the
+        previous run day, or to the last applied state for the first one.
+    """
+    start_date = _to_date(start_date or date.today())
+    days = Config.LOOKAHEAD_DAYS if days is None else days
+    # Yesterday is included so the run can still report it
+    dates = [start_date + timedelta(days=offset) for offset in range(-1, days)]
+
+    index = get_schedule_index(dates, connection=connection, offline=offline)
+    applied_date, previous = load_applied_state()
+    if applied_date is not None and applied_date >= start_date:
+        # Applied state from a run inside the window is not a valid baseline
+        previous = None
+
+    identities = get_identity_index()
+    if previous is not None:
+        previous = identities.ids(previous)
+    plan_days = {}
+    for target_date in dates:
+        emails = identities.ids(index.emails(target_date))
+        entry = {
+            'emails': identities.emails(emails),
+            'exam': index.is_exam(target_date),
+            'run_day': target_date >= start_date and is_run_day(target_date),
+            'assign': None,
+            'unassign': None
+        }
+        if entry['run_day']:
+            if previous is not None:
+                entry['assign'] = identities.emails(emails - previous)
+                entry['unassign'] = identities.emails(previous - emails)
+            previous = emails
+        plan_days[target_date.isoformat()] = entry
+
+    snapshot = load_snapshot()
+    return {
+        'version': LOOKAHEAD_VERSION,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'fingerprint': snapshot['fingerprint'] if snapshot else None,
+        'start': start_date.isoformat(),
+        'days': plan_days
+    }
+
+
+def save_lookahead(plan, path=None):
+    _write_json(path or _plan_path(), plan)
+
+
+def load_lookahead(path=None):
+    """Return the stored plan, or None if there is no usable one."""
+    plan = _read_json(path or _plan_path())
+    if not plan or plan.get('version') != LOOKAHEAD_VERSION:
+        return None
+    return plan
+
+
+def refresh_lookahead(start_date=None, days=None, connection=None):
+    """Compute and store a fresh plan. Returns it, or None on failure."""
+    days = Config.LOOKAHEAD_DAYS if days is None else days
+    if days <= 0:
+        return None
+    try:
+        plan = compute_lookahead(start_date, days, connection=connection)
+        save_lookahead(plan)
+        return plan
+    except (Error, OSError) as e:
+        print(f"⚠️  Could not refresh lookahead plan: {e}")
+        return None
+
+
+def get_precomputed_schedule(target_dates, connection=None):
+    """
+    Answer a schedule lookup from the stored plan, if it is still current.
+
+    The plan is used when the schedule fingerprint still matches the one it
+    was computed from, or when the database is unreachable.
+
+    Returns:
+        tuple: (schedule, exam_status) shaped like load_schedule(), or None if
+               the plan is missing, stale, disabled (LOOKAHEAD_DAYS=0), or
+               does not cover every date.
+    """
+    if Config.LOOKAHEAD_DAYS <= 0:
+        return None
+    plan = load_lookahead()
+    if plan is None or plan.get('fingerprint') is None:
+        return None
+    if any(_to_date(d).isoformat() not in plan['days'] for d in target_dates):
+        return None
+
+    try:
+        with db_connection(connection) as conn:
+            if fetch_fingerprint(conn) != plan['fingerprint']:
+                print("🔄 Schedule changed since the lookahead plan was computed.")
+                return None
+        print(f"📦 Using lookahead plan computed at {plan['generated_at']}.")
+    except Error as e:
+        print(f"⚠️  Database unavailable ({e}). Using lookahead plan computed at {plan['generated_at']}.")
+
+    schedule, exam_status = {}, {}
+    for target_date in target_dates:
+        target_date = _to_date(target_date)
+        entry = plan['days'][target_date.isoformat()]
+        day_name = target_date.strftime('%A')
+        if entry['exam']:
+            print(f"ℹ️  Exam Period Active for {day_name} ({target_date}). Overriding schedule.")
+        schedule[day_name] = entry['emails']
+        exam_status[target_date] = entry['exam']
+    return schedule, exam_status
+
+
+def print_lookahead(plan):
+    print(f"\n🗓️  Lookahead plan from {plan['start']} (computed {plan['generated_at']})")
+    print("=" * 50)
+    for iso_date, entry in plan['days'].items():
+        day = date.fromisoformat(iso_date)
+        marker = "📝" if entry['exam'] else "📚"
+        line = f"{marker} {day.strftime('%a %Y-%m-%d')}: {len(entry['emails'])} scheduled"
+        if entry['run_day'] and entry['assign'] is not None:
+            line += f" | +{len(entry['assign'])} / -{len(entry['unassign'])}"
+        elif not entry['run_day']:
+            line += " | no run"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute license sets and deltas for the coming days.")
+    parser.add_argument('--days', type=int, default=None, help="Days to plan (default LOOKAHEAD_DAYS)")
+    parser.add_argument('--offline', action='store_true', help="Use the stored schedule snapshot only")
+    args = parser.parse_args()
+    if not args.offline:
+        Config.require(DB_SETTINGS)
+
+    try:
+        lookahead = compute_lookahead(days=args.days, offline=args.offline)
+    except (Error, RuntimeError) as e:
+        print(f"❌ Could not compute lookahead plan: {e}")
+        sys.exit(1)
+    save_lookahead(lookahead)
+    print_lookahead(lookahead)
@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import Config
+
+# Histogram buckets (seconds) for per-request latency
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PREFIX = "zoom_license"
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+class Metrics:
+    """
+    In-process registry for one run: phase durations, latency histograms,
+    counters and gauges. Thread-safe and dependency-free.
+
+    Output goes to a Prometheus node_exporter textfile and a JSON run report.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.phases = {}
+            self.counters = {}
+            self.gauges = {}
+            # name -> label key -> [bucket counts..., +Inf count, sum]
+            self.histograms = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of work as a named phase of the run."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record one latency sample in a histogram."""
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            buckets = series.get(key)
+            if buckets is None:
+                buckets = series[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            buckets[len(LATENCY_BUCKETS)] += 1
+            buckets[-1] += seconds
+
+    def counter_total(self, name):
+        with self._lock:
+            return sum(self.counters.get(name, {}).values())
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {PREFIX}_phase_duration_seconds Wall time of each run phase.")
+            lines.append(f"# TYPE {PREFIX}_phase_duration_seconds gauge")
+            for phase, seconds in sorted(self.phases.items()):
+                lines.append(f'{PREFIX}_phase_duration_seconds{{phase="{phase}"}} {seconds:.6f}')
+
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {PREFIX}_{name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}_{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {PREFIX}_{name} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}_{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {PREFIX}_{name} histogram")
+                for key, buckets in sorted(series.items()):
+                    for i, bound in enumerate(LATENCY_BUCKETS):
+                        lines.append(f"{PREFIX}_{name}_bucket{_format_labels(key, {'le': bound})} {buckets[i]}")
+                    count = buckets[len(LATENCY_BUCKETS)]
+                    lines.append(f"{PREFIX}_{name}_bucket{_format_labels(key, {'le': '+Inf'})} {count}")
+                    lines.append(f"{PREFIX}_{name}_sum{_format_labels(key)} {buckets[-1]:.6f}")
+                    lines.append(f"{PREFIX}_{name}_count{_format_labels(key)} {count}")
+
+            lines.append(f"# TYPE {PREFIX}_last_run_timestamp_seconds gauge")
+            lines.append(f"{PREFIX}_last_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def to_report(self):
+        """Return a JSON-serialisable summary of the run."""
+        with self._lock:
+            histograms = {}
+            for name, series in self.histograms.items():
+                for key, buckets in series.items():
+                    count = buckets[len(LATENCY_BUCKETS)]
+                    label = ",".join(f"{k}={v}" for k, v in key) or "all"
+                    histograms.setdefault(name, {})[label] = {
+                        'count': count,
+                        'sum_seconds': round(buckets[-1], 6),
+                        'avg_seconds': round(buckets[-1] / count, 6) if count else None,
+                        'buckets': {str(bound): buckets[i] for i, bound in enumerate(LATENCY_BUCKETS)}
+                    }
+            return {
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+                'wall_seconds': round(time.time() - self.started_at, 3),
+                'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                'counters': {name: {",".join(f"{k}={v}" for k, v in key) or "all": value
+                                    for key, value in series.items()}
+                             for name, series in self.counters.items()},
+                'gauges': {name: {",".join(f"{k}={v}" for k, v in key) or "all": value
+                                  for key, value in series.items()}
+                           for name, series in self.gauges.items()},
+                'histograms': histograms
+            }
+
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # node_exporter may read at any moment; never expose a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_outputs(registry=None, textfile=None, report_file=None):
+    """
+    Write the Prometheus textfile and the JSON run report.
+
+    Args:
+        registry (Metrics, optional): Defaults to the shared registry.
+        textfile (str, optional): Defaults to Config.METRICS_TEXTFILE (empty disables).
+        report_file (str, optional): Defaults to Config.METRICS_REPORT_FILE.
+    """
+    registry = registry or metrics
+    textfile = Config.METRICS_TEXTFILE if textfile is None else textfile
+    if report_file is None:
+        report_file = Config.METRICS_REPORT_FILE or os.path.join(Config.CACHE_DIR, 'run_report.json')
+
+    try:
+        if textfile:
+            _atomic_write(textfile, registry.to_prometheus())
+        if report_file:
+            _atomic_write(report_file, json.dumps(registry.to_report(), indent=2))
+    except OSError as e:
+        print(f"⚠️  Could not write metrics: {e}")
+
+
+# Shared registry for the current run
+metrics = Metrics()
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+from config import Config
+from identity import normalize_email
+
+# Zoom error code for "User does not exist"
+USER_NOT_FOUND = 1001
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS unknown_users (
+    email TEXT PRIMARY KEY,
+    code INTEGER NOT NULL,
+    message TEXT,
+    first_seen REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def is_unknown_user_response(response):
+    """
+    Return the error code if a Zoom response says the user does not exist.
+
+    Returns:
+        int: 1001 or 404, or None for any other response.
+    """
+    try:
+        code = response.json().get('code')
+    except (ValueError, AttributeError):
+        code = None
+    if code == USER_NOT_FOUND:
+        return USER_NOT_FOUND
+    return 404 if response.status_code == 404 else None
+
+
+class NegativeCache:
+    """
+    Persistent record of scheduled emails that have no Zoom account.
+
+    Entries expire after NEGATIVE_CACHE_TTL_HOURS so a user who is created
+    later is eventually retried. They are dropped straight away when the
+    /users listing or a webhook shows the user exists.
+
+    Backed by SQLite so the webhook receiver and a run can share it safely.
+    """
+
+    def __init__(self, path=None, ttl_hours=None):
+        self.path = path or Config.NEGATIVE_CACHE_FILE or os.path.join(Config.CACHE_DIR, 'negative_cache.sqlite')
+        self.ttl_hours = Config.NEGATIVE_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def add(self, email, code, message=None):
+        """Remember that `email` has no Zoom account, keeping first_seen if already cached."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO unknown_users (email, code, message, first_seen, expires_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(email) DO UPDATE SET code = excluded.code, message = excluded.message, "
+                "expires_at = excluded.expires_at",
+                (normalize_email(email), code, message, now, now + self.ttl_hours * 3600))
+
+    def discard(self, emails):
+        """Drop entries for users now known to exist."""
+        emails = [(normalize_email(email),) for email in emails]
+        if not emails:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM unknown_users WHERE email = ?", emails)
+
+    def discard_existing(self, existing_emails):
+        """
+        Drop every cached email that appears in a user listing.
+
+        Args:
+            existing_emails (iterable): Canonical emails known to exist.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        existing = set(existing_emails)
+        stale = [email for email in self.entries() if email in existing]
+        self.discard(stale)
+        return len(stale)
+
+    def entries(self):
+        """
+        Returns:
+            dict: Email -> {'code', 'message', 'first_seen', 'expires_at'} for unexpired entries.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email, code, message, first_seen, expires_at FROM unknown_users WHERE expires_at > ?",
+                (time.time(),)).fetchall()
+        return {email: {'code': code, 'message': message, 'first_seen': first_seen, 'expires_at': expires_at}
+                for email, code, message, first_seen, expires_at in rows}
+
+    def split(self, emails):
+        """
+        Separate cached unknown users from the rest.
+
+        Returns:
+            tuple: (emails to process, emails skipped as unknown)
+        """
+        cached = self.entries()
+        keep, skipped = [], []
+        for email in emails:
+            (skipped if normalize_email(email) in cached else keep).append(email)
+        return keep, skipped
+
+    def prune(self):
+        """Delete expired entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM unknown_users WHERE expires_at <= ?", (time.time(),))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_negative_cache():
+    """Return the process-wide NegativeCache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = NegativeCache()
+        return _cache
+
+
+def record_unknown_user(email, response):
+    """Cache `email` if the response says the Zoom user does not exist."""
+    code = is_unknown_user_response(response)
+    if code is None or Config.NEGATIVE_CACHE_TTL_HOURS <= 0:
+        return False
+    try:
+        get_negative_cache().add(email, code, response.text[:200])
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not update negative cache for {email}: {e}")
+    return True
@@ -0,0 +1,161 @@
+import atexit
+import queue
+import random
+import threading
+import time
+
+import requests
+from config import Config
+from metrics import metrics
+
+# Telegram rejects messages longer than this many characters
+TELEGRAM_MAX_LENGTH = 4096
+
+
+def split_message(text, limit=TELEGRAM_MAX_LENGTH):
+    """
+    Split text into chunks of at most `limit` characters on line boundaries.
+
+    A single line longer than the limit is cut at the limit.
+
+    Returns:
+        list: Message chunks, in order.
+    """
+    chunks = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+class TelegramNotifier:
+    """
+    Delivers Telegram messages and documents from a background thread.
+
+    send() and send_document() only enqueue, so the run never waits on
+    Telegram. Each delivery is retried with exponential backoff (and
+    Telegram's retry_after on 429). flush() waits for the queue to drain and
+    is called automatically at interpreter exit.
+    """
+
+    def __init__(self, max_retries=None, backoff_base=None):
+        self.max_retries = Config.TELEGRAM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.TELEGRAM_BACKOFF_BASE if backoff_base is None else backoff_base
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    @staticmethod
+    def _method_url(method):
+        # TELEGRAM_API_URL points at sendMessage; other methods share its base
+        return f"{Config.TELEGRAM_API_URL.rsplit('/', 1)[0]}/{method}"
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="telegram-notifier", daemon=True)
+                self._thread.start()
+
+    def send(self, text, parse_mode='HTML'):
+        """Queue a message, split into several if it exceeds Telegram's limit."""
+        chunks = split_message(text)
+        if len(chunks) > 1:
+            # Number the parts so the chat shows they belong together
+            chunks = split_message(text, TELEGRAM_MAX_LENGTH - 16)
+            chunks = [f"({i}/{len(chunks)})\n{chunk}" for i, chunk in enumerate(chunks, 1)]
+        for chunk in chunks:
+            self._queue.put(('sendMessage', {'chat_id': Config.TELEGRAM_CHAT_ID, 'text': chunk,
+                                             'parse_mode': parse_mode}, None))
+        self._ensure_worker()
+
+    def send_document(self, filename, content, caption=None):
+        """Queue a text file attachment (e.g. a full failure list)."""
+        data = {'chat_id': Config.TELEGRAM_CHAT_ID}
+        if caption:
+            data['caption'] = caption[:1024]
+        self._queue.put(('sendDocument', data, {'document': (filename, content.encode('utf-8'), 'text/plain')}))
+        self._ensure_worker()
+
+    def flush(self, timeout=None):
+        """
+        Wait for queued notifications to be delivered.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to Config.TELEGRAM_FLUSH_TIMEOUT.
+
+        Returns:
+            bool: True if the queue drained in time.
+        """
+        timeout = Config.TELEGRAM_FLUSH_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline or self._thread is None or not self._thread.is_alive():
+                print(f"⚠️  {self._queue.unfinished_tasks} Telegram notifications were not delivered.")
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _worker(self):
+        while True:
+            method, data, files = self._queue.get()
+            try:
+                self._deliver(method, data, files)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, method, data, files):
+        error = None
+        attempt = 0
+        while True:
+            wait = None
+            try:
+                if files:
+                    response = self._session.post(self._method_url(method), data=data, files=files,
+                                                  timeout=Config.TELEGRAM_TIMEOUT)
+                else:
+                    response = self._session.post(self._method_url(method), json=data,
+                                                  timeout=Config.TELEGRAM_TIMEOUT)
+                if response.ok:
+                    metrics.inc('telegram_messages_total', method=method, result='ok')
+                    return True
+                if response.status_code == 400 and data.get('parse_mode') and 'parse' in response.text:
+                    # Unbalanced HTML would lose the whole message; resend it as
+                    # plain text right away without spending a retry
+                    data = {key: value for key, value in data.items() if key != 'parse_mode'}
+                    continue
+                if response.status_code == 429:
+                    try:
+                        wait = float(response.json().get('parameters', {}).get('retry_after'))
+                    except (ValueError, TypeError):
+                        wait = None
+                elif response.status_code < 500:
+                    print(f"❌ Failed to send Telegram notification: {response.status_code} - {response.text}")
+                    break
+                error = f"{response.status_code} - {response.text}"
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+
+            if attempt >= self.max_retries:
+                print(f"❌ Failed to send Telegram notification: {error}")
+                break
+            time.sleep(wait if wait is not None else self.backoff_base * (2 ** attempt) * (1 + random.random()))
+            attempt += 1
+        metrics.inc('telegram_messages_total', method=method, result='failed')
+        return False
+
+
+# Shared notifier; queued messages are flushed before the process exits
+notifier = TelegramNotifier()
+atexit.register(notifier.flush)
@@ -0,0 +1,127 @@
+from datetime import date, datetime
+import requests
+from mysql.connector import Error
+from config import Config
+from identity import normalize_email
+from assign import fetch_total_licenses
+from slots import fetch_sessions
+
+# Sort criteria understood by ASSIGN_PRIORITY, applied in the configured order
+PRIORITY_KEYS = {
+    'exam': lambda info: 0 if info.get('is_exam') else 1,
+    'start_time': lambda info: info.get('start') or datetime.max,
+}
+
+
+def fetch_assign_priorities(emails, target_date=None, connection=None):
+    """
+    Look up what each user is scheduled for today.
+
+    Args:
+        emails (iterable): Users waiting for a license.
+        target_date (date, optional): Defaults to today.
+        connection: Optional open MySQL connection to reuse.
+
+    Returns:
+        dict: Email -> {'is_exam': bool, 'start': earliest session start or None}.
+    """
+    wanted = set(filter(None, map(normalize_email, emails)))
+    priorities = {}
+    for email, start, _, is_exam in fetch_sessions(target_date or date.today(), connection=connection):
+        if email not in wanted:
+            continue
+        info = priorities.setdefault(email, {'is_exam': False, 'start': None})
+        info['is_exam'] = info['is_exam'] or is_exam
+        if info['start'] is None or start < info['start']:
+            info['start'] = start
+    return priorities
+
+
+def order_assignments(emails, priorities=None, order=None):
+    """
+    Sort users by the configured priority, then by email for a stable result.
+
+    Args:
+        emails (iterable): Users to order.
+        priorities (dict, optional): From fetch_assign_priorities().
+        order (list, optional): Criteria names. Defaults to Config.ASSIGN_PRIORITY.
+    """
+    priorities = priorities or {}
+    order = Config.ASSIGN_PRIORITY if order is None else order
+    keys = [PRIORITY_KEYS[name] for name in order if name in PRIORITY_KEYS]
+
+    def sort_key(email):
+        info = priorities.get(normalize_email(email), {})
+        return tuple(key(info) for key in keys) + (email,)
+
+    return sorted(emails, key=sort_key)
+
+
+def plan_capacity(emails_to_unassign, emails_to_assign, total_licenses, used_licenses, priorities=None, order=None):
+    """
+    Fit today's assignments into the seats that will be free.
+
+    Unassignments run first, so every planned unassignment frees one seat.
+    If there are still not enough seats, the lowest-priority users are
+    deferred instead of failing one request at a time.
+
+    Args:
+        emails_to_unassign (list): Users losing their license.
+        emails_to_assign (list): Users who need a license.
+        total_licenses (int): Paid seats on the account.
+        used_licenses (int): Seats currently in use.
+        priorities (dict, optional): From fetch_assign_priorities().
+        order (list, optional): Criteria names. Defaults to Config.ASSIGN_PRIORITY.
+
+    Returns:
+        dict: {
+            'to_assign': [...],            # in priority order, guaranteed a seat
+            'deferred': [...],             # no seat left for them
+            'free_seats': int,             # free before any change
+            'free_after_unassign': int,
+            'shortfall': int
+        }
+    """
+    free_seats = max(0, total_licenses - used_licenses)
+    free_after_unassign = free_seats + len(emails_to_unassign)
+    ordered = order_assignments(emails_to_assign, priorities, order)
+    return {
+        'to_assign': ordered[:free_after_unassign],
+        'deferred': ordered[free_after_unassign:],
+        'free_seats': free_seats,
+        'free_after_unassign': free_after_unassign,
+        'shortfall': max(0, len(ordered) - free_after_unassign)
+    }
+
+
+def apply_capacity(emails_to_unassign, emails_to_assign, used_licenses, target_date=None, total_licenses=None):
+    """
+    Fetch the seat count once and trim the assignment list to fit.
+
+    Priorities are only looked up when there is a shortfall, since order
+    does not matter when everyone gets a seat.
+
+    Args:
+        total_licenses (int, optional): Seat count already fetched for this run.
+
+    Returns:
+        dict: plan_capacity() result, or None if the seat count is unavailable.
+    """
+    if total_licenses is None:
+        try:
+            total_licenses = fetch_total_licenses()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Could not fetch seat count ({e}). Assigning without a capacity check.")
+            return None
+
+    plan = plan_capacity(emails_to_unassign, emails_to_assign, total_licenses, used_licenses)
+    if plan['shortfall']:
+        try:
+            priorities = fetch_assign_priorities(emails_to_assign, target_date)
+        except Error as e:
+            print(f"⚠️  Could not fetch session times for prioritising ({e}). Ordering by email.")
+            priorities = None
+        plan = plan_capacity(emails_to_unassign, emails_to_assign, total_licenses, used_licenses, priorities)
+    plan['total_licenses'] = total_licenses
+    plan['used_licenses'] = used_licenses
+    return plan
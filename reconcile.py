@@ -0,0 +1,127 @@
+import sqlite3
+from config import Config
+from identity import get_identity_index, normalize_email
+from zoom_users import iter_users, LICENSED
+from user_index import get_user_index, index_enabled
+from negative_cache import get_negative_cache
+
+BASIC = 1
+
+
+def fetch_user_snapshot(client=None, force_resync=False):
+    """
+    Take one snapshot of the account's active users.
+
+    When webhooks maintain the local user index (ZOOM_WEBHOOK_SECRET_TOKEN is
+    set), the snapshot is read from it. A full /users listing is only done when
+    the index is older than USER_INDEX_RESYNC_HOURS, and the index is rebuilt
+    from that listing.
+
+    Args:
+        client (ZoomClient, optional): Defaults to the shared client.
+        force_resync (bool): Always list /users, even if the index is fresh.
+
+    Returns:
+        dict: Canonical email -> current Zoom user type.
+    """
+    use_index = index_enabled()
+    if use_index and not force_resync:
+        index = get_user_index()
+        if index.is_fresh():
+            print("📇 Using webhook-maintained user index.")
+            return _forget_known_users(index.snapshot())
+
+    snapshot = {}
+    listed = []
+    for user in iter_users(client=client):
+        email = normalize_email(user.get('email'))
+        if email:
+            snapshot[email] = user.get('type')
+            if use_index:
+                listed.append({'email': email, 'id': user.get('id'), 'type': user.get('type'),
+                               'status': user.get('status', 'active')})
+    if use_index:
+        count = get_user_index().replace_all(listed)
+        print(f"📇 Resynced user index ({count} users).")
+    return _forget_known_users(snapshot)
+
+
+def _forget_known_users(snapshot):
+    """Drop negative-cache entries for users the snapshot shows exist."""
+    try:
+        dropped = get_negative_cache().discard_existing(snapshot)
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not update negative cache: {e}")
+        return snapshot
+    if dropped:
+        print(f"♻️  {dropped} previously unknown users now exist in Zoom")
+    return snapshot
+
+
+def plan_reconciliation(schedule, today_name, snapshot, exempt_users=None, previous=None):
+    """
+    Work out the minimum set of license changes for today.
+
+    Desired state:
+    - Everyone on today's schedule is Licensed.
+    - Anyone else who appears anywhere in the schedule is Basic,
+      unless they are exempt, in which case they keep their license.
+    Users outside the schedule are never touched.
+
+    Args:
+        schedule (dict): Day name -> list of emails (from load_schedule()).
+        today_name (str): Today's day name, e.g. "Monday".
+        snapshot (dict): Email -> current type (from fetch_user_snapshot()).
+        exempt_users (list, optional): Defaults to Config.EXEMPT_USERS.
+        previous (iterable, optional): Users the last completed run licensed. They
+                                       count as managed even if that run was days
+                                       ago (e.g. Friday, seen from Monday).
+
+    Returns:
+        dict: {
+            'to_assign': [...],      # scheduled today but not Licensed
+            'to_unassign': [...],    # Licensed but no longer scheduled
+            'exempted': [...],       # would be unassigned but are exempt
+            'missing': [...],        # scheduled today but no active Zoom user
+            'unchanged': [...],      # already right: scheduled and Licensed, or unscheduled and not Licensed
+            'noop': int              # len(unchanged)
+        }
+    """
+    if exempt_users is None:
+        exempt_users = Config.EXEMPT_USERS
+
+    # Set arithmetic runs on integer IDs of canonical emails
+    identities = get_identity_index()
+    exempt = identities.ids(exempt_users)
+    managed = identities.ids(email for emails in schedule.values() for email in emails)
+    managed |= identities.ids(previous or ())
+    today_ids = identities.ids(schedule.get(today_name, schedule.get(today_name.upper()[:3], [])))
+    unscheduled = managed - today_ids
+
+    to_assign, to_unassign, exempted, missing, unchanged = [], [], [], [], []
+
+    for email in identities.emails(today_ids):
+        current = snapshot.get(email)
+        if current is None:
+            missing.append(email)
+        elif current != LICENSED:
+            to_assign.append(email)
+        else:
+            unchanged.append(email)
+
+    for email in identities.emails(unscheduled):
+        if snapshot.get(email) != LICENSED:
+            unchanged.append(email)
+        elif identities.find(email) in exempt:
+            exempted.append(email)
+        else:
+            to_unassign.append(email)
+
+    return {
+        'to_assign': to_assign,
+        'to_unassign': to_unassign,
+        'exempted': exempted,
+        'missing': missing,
+        'unchanged': unchanged,
+        'noop': len(unchanged)
+    }
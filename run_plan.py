@@ -0,0 +1,186 @@
+import json
+import math
+import os
+from datetime import date, datetime
+from config import Config
+from user_index import get_user_index, index_enabled
+
+PLAN_VERSION = 1
+
+# Run plan keys the apply step needs, in the order they are written
+PLAN_KEYS = ('status_today', 'emails_to_unassign', 'emails_to_assign', 'exempted_users', 'unchanged_users',
+             'missing_users', 'unknown_users', 'deferred_users', 'free_seats', 'total_licenses',
+             'used_licenses', 'active_users', 'scheduled_today')
+
+PATCH_LATENCY_SERIES = 'endpoint=/users/{userId},method=PATCH'
+
+
+def plan_path(path=None):
+    return path or Config.PLAN_FILE or os.path.join(Config.CACHE_DIR, 'run_plan.json')
+
+
+def last_patch_latency(report_file=None):
+    """
+    Average PATCH latency measured by the last real run, from its JSON run report.
+
+    Returns:
+        float: Seconds, or None if no run has recorded one.
+    """
+    report_file = report_file or Config.METRICS_REPORT_FILE or os.path.join(Config.CACHE_DIR, 'run_report.json')
+    try:
+        with open(report_file) as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    series = report.get('histograms', {}).get('zoom_request_duration_seconds', {})
+    return series.get(PATCH_LATENCY_SERIES, {}).get('avg_seconds')
+
+
+def estimate_phase_seconds(count, workers, rate, latency):
+    """
+    Wall time for `count` PATCHes with `workers` in flight under a `rate`
+    requests/second limiter: whichever of the two is the bottleneck.
+    """
+    if count <= 0:
+        return 0.0
+    concurrency_bound = math.ceil(count / workers) * latency
+    rate_bound = count / rate + latency if rate > 0 else 0.0
+    return max(concurrency_bound, rate_bound)
+
+
+def estimate_plan(plan, workers=None, rate=None, latency=None):
+    """
+    Estimate what applying a run plan costs.
+
+    Retries are not modelled, so the numbers are for a healthy Zoom API.
+
+    Args:
+        plan (dict): From app.build_run_plan().
+        workers (int, optional): Defaults to Config.LICENSE_MAX_WORKERS.
+        rate (float, optional): PATCH requests/second. Defaults to Config.ZOOM_RATE_LIMIT_LIGHT.
+        latency (float, optional): Seconds per PATCH. Defaults to the last run's
+                                   average, then Config.PLAN_PATCH_LATENCY.
+
+    Returns:
+        dict: {'api_calls', 'wall_seconds', 'seats', 'assumptions'}
+    """
+    workers = max(1, Config.LICENSE_MAX_WORKERS if workers is None else workers)
+    rate = Config.ZOOM_RATE_LIMIT_LIGHT if rate is None else rate
+    measured = last_patch_latency() if latency is None else None
+    latency = latency if latency is not None else (measured or Config.PLAN_PATCH_LATENCY)
+
+    unassign = len(plan['emails_to_unassign'])
+    assign = len(plan['emails_to_assign'])
+
+    # The closing usage report re-lists /users unless the webhook index is current
+    usage_calls = 0 if plan.get('total_licenses') is not None else 1
+    if not (index_enabled() and get_user_index().is_fresh()):
+        usage_calls += max(1, math.ceil((plan.get('active_users') or 0) / Config.ZOOM_USERS_PAGE_SIZE))
+
+    unassign_seconds = estimate_phase_seconds(unassign, workers, rate, latency)
+    assign_seconds = estimate_phase_seconds(assign, workers, rate, latency)
+
+    seats = None
+    if plan.get('total_licenses') is not None and plan.get('used_licenses') is not None:
+        used_after = plan['used_licenses'] - unassign + assign
+        seats = {
+            'total': plan['total_licenses'],
+            'used_before': plan['used_licenses'],
+            'used_after': used_after,
+            'free_after': plan['total_licenses'] - used_after
+        }
+
+    return {
+        'api_calls': {
+            'unassign': unassign,
+            'assign': assign,
+            'usage_report': usage_calls,
+            'total': unassign + assign + usage_calls
+        },
+        'wall_seconds': {
+            'unassign': round(unassign_seconds, 1),
+            'assign': round(assign_seconds, 1),
+            'total': round(unassign_seconds + assign_seconds, 1)
+        },
+        'seats': seats,
+        'assumptions': {
+            'workers': workers,
+            'rate_per_second': rate,
+            'patch_latency_seconds': round(latency, 3),
+            'latency_source': 'last run' if measured else 'PLAN_PATCH_LATENCY'
+        }
+    }
+
+
+def save_plan(plan, estimate, path=None):
+    """
+    Write a run plan and its estimate as JSON.
+
+    Returns:
+        str: The path written.
+    """
+    path = plan_path(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {
+        'version': PLAN_VERSION,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'date': date.today().isoformat(),
+        'plan': {key: plan.get(key) for key in PLAN_KEYS},
+        'estimate': estimate
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(document, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_plan(path=None, today=None):
+    """
+    Read a plan written by save_plan() for applying.
+
+    A plan is only valid on the day it was made: the schedule it was
+    diffed against is per day.
+
+    Returns:
+        dict: The run plan, in the shape app.build_run_plan() returns.
+
+    Raises:
+        ValueError: If the file is unreadable, from another version, or stale.
+    """
+    path = plan_path(path)
+    try:
+        with open(path) as f:
+            document = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Cannot read plan {path}: {e}")
+    if document.get('version') != PLAN_VERSION:
+        raise ValueError(f"Plan {path} has unsupported version {document.get('version')}")
+    today = today or date.today()
+    if document.get('date') != today.isoformat():
+        raise ValueError(f"Plan {path} was made for {document.get('date')}, not {today.isoformat()}")
+    return document['plan']
+
+
+def print_plan(plan, estimate):
+    """Print the operations and estimate for a dry run."""
+    print("\n🧪 Dry run: no licenses were changed.")
+    print(f"- Unassign: {len(plan['emails_to_unassign'])}")
+    print(f"- Assign: {len(plan['emails_to_assign'])}")
+    print(f"- Skip (exempt): {len(plan['exempted_users'])}")
+    print(f"- Skip (already correct): {len(plan['unchanged_users'])}")
+    print(f"- Skip (not in Zoom): {len(plan['missing_users']) + len(plan['unknown_users'])}")
+    print(f"- Deferred (no free seat): {len(plan['deferred_users'])}")
+
+    calls, wall, assumptions = estimate['api_calls'], estimate['wall_seconds'], estimate['assumptions']
+    print(f"\n📡 Zoom API calls: {calls['total']} ({calls['unassign']} unassign, {calls['assign']} assign, "
+          f"{calls['usage_report']} for the usage report)")
+    print(f"⏱️  Estimated time: {wall['total']}s ({assumptions['workers']} workers, "
+          f"{assumptions['rate_per_second']:g} req/s, {assumptions['patch_latency_seconds']}s per PATCH "
+          f"from {assumptions['latency_source']})")
+    seats = estimate['seats']
+    if seats:
+        print(f"🪑 Seats after the run: {seats['used_after']} used of {seats['total']} "
+              f"({seats['free_after']} free)")
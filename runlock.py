@@ -0,0 +1,25 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from config import Config
+
+
+@contextmanager
+def run_lock():
+    """
+    Hold an exclusive lock for the duration of a run.
+
+    Yields True if the lock was acquired, or False if another run (cron,
+    the daemon, an intra-day sync or a slot batch) already holds it.
+    """
+    os.makedirs(Config.CACHE_DIR, exist_ok=True)
+    with open(os.path.join(Config.CACHE_DIR, 'run.lock'), 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,243 @@
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from config import Config, DB_SETTINGS
+from schedule_index import ScheduleIndex
+from metrics import metrics
+
+SNAPSHOT_VERSION = 2
+
+# Tables whose changes invalidate the snapshot
+FINGERPRINT_QUERY = """
+SELECT 'course_unit_programme_mappings', COUNT(*), MAX(updated_at)
+FROM course_unit_programme_mappings WHERE academic_session_id = %s
+UNION ALL
+SELECT 'exam_schedules', COUNT(*), MAX(updated_at) FROM exam_schedules
+UNION ALL
+SELECT 'exams', COUNT(*), MAX(updated_at) FROM exams
+UNION ALL
+SELECT 'users', COUNT(*), MAX(updated_at) FROM users
+UNION ALL
+SELECT 'days', COUNT(*), MAX(id) FROM days;
+"""
+
+# Dates older than this many days before a run's earliest date are dropped
+KEEP_DAYS = 7
+
+
+def _snapshot_path():
+    return Config.SCHEDULE_SNAPSHOT_FILE or os.path.join(Config.CACHE_DIR, 'schedule_snapshot.json')
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def fetch_fingerprint(connection, academic_session_id=None):
+    """
+    Returns a cheap fingerprint of the schedule tables (row count and latest
+    updated_at per table). Any edit, insert or delete changes it.
+    """
+    if academic_session_id is None:
+        academic_session_id = Config.ACADEMIC_SESSION_ID
+    started = time.perf_counter()
+    cursor = connection.cursor()
+    cursor.execute(FINGERPRINT_QUERY, (academic_session_id,))
+    fingerprint = {table: [count, str(latest) if latest is not None else None]
+                   for table, count, latest in cursor.fetchall()}
+    cursor.close()
+    metrics.observe('db_query_duration_seconds', time.perf_counter() - started, query='fingerprint')
+    fingerprint['academic_session_id'] = academic_session_id
+    return fingerprint
+
+
+def fetch_snapshot(connection, target_dates, academic_session_id=None, fingerprint=None, base=None):
+    """
+    Fetches the schedule for the target dates and records it in a snapshot.
+
+    Rows come from getschedule.build_schedule_index(), the same date-targeted,
+    streamed query as an uncached lookup, so the snapshot only caches its
+    result per date.
+
+    Args:
+        connection: Active MySQL connection.
+        target_dates (list): Dates to fetch.
+        academic_session_id (int, optional): Defaults to Config.ACADEMIC_SESSION_ID.
+        fingerprint (dict, optional): Fingerprint taken before the fetch.
+        base (dict, optional): Snapshot taken at the same fingerprint whose
+                               dates are kept alongside the new ones.
+    """
+    from getschedule import build_schedule_index
+    if academic_session_id is None:
+        academic_session_id = Config.ACADEMIC_SESSION_ID
+    if fingerprint is None:
+        fingerprint = fetch_fingerprint(connection, academic_session_id)
+
+    target_dates = sorted({_to_date(d) for d in target_dates})
+    index = build_schedule_index(connection, target_dates, academic_session_id)
+
+    oldest = (target_dates[0] - timedelta(days=KEEP_DAYS)).isoformat() if target_dates else ''
+    dates = {day: entry for day, entry in (base or {}).get('dates', {}).items() if day >= oldest}
+    for target_date, emails in index.to_dict().items():
+        dates[target_date.isoformat()] = {'exam': index.is_exam(target_date), 'emails': emails}
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        'fingerprint': fingerprint,
+        'dates': dates
+    }
+
+
+def missing_dates(snapshot, target_dates):
+    """Return the target dates the snapshot has no entry for."""
+    dates = snapshot['dates'] if snapshot else {}
+    return sorted({_to_date(d) for d in target_dates if _to_date(d).isoformat() not in dates})
+
+
+def load_snapshot(path=None):
+    """Returns the stored snapshot, or None if there is no usable one."""
+    path = path or _snapshot_path()
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def save_snapshot(snapshot, path=None):
+    """Writes the snapshot atomically as compact JSON."""
+    path = path or _snapshot_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def resolve_index(snapshot, target_dates):
+    """
+    Reads the schedule for the target dates back out of a snapshot.
+
+    Returns:
+        ScheduleIndex: Emails and exam status per date.
+
+    Raises:
+        KeyError: If a target date is not in the snapshot (see missing_dates()).
+    """
+    target_dates = sorted({_to_date(d) for d in target_dates})
+    index = ScheduleIndex(target_dates)
+    for target_date in target_dates:
+        entry = snapshot['dates'][target_date.isoformat()]
+        if entry['exam']:
+            index.mark_exam(target_date)
+        for email in entry['emails']:
+            index.add(target_date, email)
+    return index
+
+
+def get_schedule_index(target_dates, connection=None, offline=False):
+    """
+    Returns the schedule for the target dates, using the local snapshot
+    whenever the database has not changed since it was taken.
+
+    - offline=True answers from the snapshot without touching the database.
+    - If the fingerprint changed, the target dates are fetched into a new snapshot.
+    - Dates the snapshot does not cover yet are fetched and added to it.
+    - If the database is unreachable, the last snapshot is used instead.
+
+    Returns:
+        ScheduleIndex: Emails and exam status per date.
+
+    Raises:
+        mysql.connector.Error: If the database is unreachable and the snapshot
+                               does not cover every target date.
+        RuntimeError: If offline=True and the snapshot does not cover every target date.
+    """
+    snapshot = load_snapshot()
+
+    if offline:
+        missing = missing_dates(snapshot, target_dates)
+        if missing:
+            raise RuntimeError(f"No schedule snapshot for {', '.join(d.isoformat() for d in missing)} "
+                               f"at {_snapshot_path()}")
+        print(f"📦 Using schedule snapshot from {snapshot['fetched_at']} (offline).")
+        return resolve_index(snapshot, target_dates)
+
+    # Imported here so offline previews never load the MySQL driver
+    from mysql.connector import Error
+    from getschedule import db_connection
+    try:
+        with db_connection(connection) as conn:
+            fingerprint = fetch_fingerprint(conn)
+            missing = missing_dates(snapshot, target_dates)
+            if snapshot is None or snapshot['fingerprint'] != fingerprint:
+                print("🔄 Schedule changed; refreshing snapshot from the database.")
+                metrics.inc('schedule_snapshot_total', result='refresh')
+                snapshot = fetch_snapshot(conn, target_dates, fingerprint=fingerprint)
+            elif missing:
+                print(f"🔄 Adding {len(missing)} dates to the schedule snapshot.")
+                metrics.inc('schedule_snapshot_total', result='extend')
+                snapshot = fetch_snapshot(conn, missing, fingerprint=fingerprint, base=snapshot)
+            else:
+                print(f"📦 Schedule unchanged since {snapshot['fetched_at']}; using snapshot.")
+                metrics.inc('schedule_snapshot_total', result='hit')
+                return resolve_index(snapshot, target_dates)
+            try:
+                save_snapshot(snapshot)
+            except OSError as e:
+                print(f"⚠️  Could not save schedule snapshot: {e}")
+    except Error as e:
+        if missing_dates(snapshot, target_dates):
+            raise
+        print(f"⚠️  Database unavailable ({e}). Using schedule snapshot from {snapshot['fetched_at']}.")
+        metrics.inc('schedule_snapshot_total', result='fallback')
+
+    return resolve_index(snapshot, target_dates)
+
+
+def load_schedule_cached(target_dates=None, connection=None, offline=False):
+    """
+    Snapshot-backed equivalent of getschedule.load_schedule().
+
+    Returns:
+        tuple: (schedule, exam_status) where schedule maps day name -> list of
+               emails and exam_status maps each target date -> bool.
+    """
+    if target_dates is None:
+        today = datetime.now()
+        target_dates = [today, today - timedelta(days=1)]
+
+    index = get_schedule_index(target_dates, connection=connection, offline=offline)
+    schedule = {}
+    for target_date, emails in index.to_dict().items():
+        day_name = target_date.strftime('%A')
+        if index.is_exam(target_date):
+            print(f"ℹ️  Exam Period Active for {day_name} ({target_date}). Overriding schedule.")
+        schedule[day_name] = emails
+    return schedule, index.exam_status()
+
+
+if __name__ == "__main__":
+    from mysql.connector import Error
+    Config.require(DB_SETTINGS)
+    # Refresh the snapshot (if the database changed) and report what it holds
+    try:
+        get_schedule_index([datetime.now()])
+    except Error as e:
+        print(f"❌ Error while connecting to MySQL: {e}")
+        sys.exit(1)
+    snapshot = load_snapshot()
+    print(f"Snapshot taken: {snapshot['fetched_at']}")
+    print(f"Dates cached: {', '.join(sorted(snapshot['dates']))}")
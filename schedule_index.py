@@ -0,0 +1,50 @@
+from identity import normalize_email
+
+
+class ScheduleIndex:
+    """
+    Compact, de-duplicated index of scheduled emails per date.
+
+    Each email is normalised and interned once, so a lecturer who teaches on every
+    day of the week costs one string plus a set entry per day rather than
+    one string per course-unit mapping row.
+    """
+
+    __slots__ = ('_by_date', '_exam_dates')
+
+    def __init__(self, target_dates=()):
+        self._by_date = {target_date: set() for target_date in target_dates}
+        self._exam_dates = set()
+
+    def add(self, target_date, email):
+        emails = self._by_date.get(target_date)
+        if emails is None:
+            emails = self._by_date[target_date] = set()
+        email = normalize_email(email)
+        if email:
+            emails.add(email)
+
+    def mark_exam(self, target_date):
+        self._exam_dates.add(target_date)
+        self._by_date.setdefault(target_date, set())
+
+    def is_exam(self, target_date):
+        return target_date in self._exam_dates
+
+    def emails(self, target_date):
+        """Return the set of emails scheduled on target_date."""
+        return self._by_date.get(target_date, set())
+
+    def dates(self):
+        return sorted(self._by_date)
+
+    def __len__(self):
+        return sum(len(emails) for emails in self._by_date.values())
+
+    def exam_status(self):
+        """Return {date: bool} for every indexed date."""
+        return {target_date: target_date in self._exam_dates for target_date in self._by_date}
+
+    def to_dict(self):
+        """Return {date: sorted list of emails}, the shape the older API returned."""
+        return {target_date: sorted(emails) for target_date, emails in sorted(self._by_date.items())}
@@ -0,0 +1,352 @@
+"""
+Just-in-time, slot-level licensing.
+
+Instead of holding a seat all day, each lecturer or invigilator gets a
+license SLOT_LEAD_MINUTES before their first session and gives it back
+SLOT_RELEASE_MINUTES after their session ends. Sessions that overlap or sit
+closer together than the lead + release window are merged, so nobody's
+license flaps between back-to-back classes.
+
+Session times come from course_unit_programme_mappings.start_time/end_time
+and, on exam days, exams.start_time/end_time. Rows without times are
+treated as lasting the whole day.
+
+    python slots.py            # report today's slots and peak concurrent demand
+    python slots.py --run      # apply assign/release events as they fall due
+"""
+import argparse
+import heapq
+import signal
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime, time, timedelta
+
+from mysql.connector import Error
+from config import Config, DB_SETTINGS, ZOOM_SETTINGS
+from identity import normalize_email
+from getschedule import db_connection, day_names
+from bulk import run_bulk_license_changes
+from circuit import zoom_breaker
+from negative_cache import get_negative_cache
+from runlock import run_lock
+
+# Seconds before events that could not be applied are tried again
+RETRY_SECONDS = 30
+
+SLOTS_QUERY = """
+WITH exam_targets AS (
+    SELECT es.id AS exam_schedule_id
+    FROM exam_schedules AS es
+    WHERE es.is_active = 1
+      AND %s BETWEEN es.start_date AND es.end_date
+    ORDER BY es.id
+    LIMIT 1
+)
+SELECT u.email, e.start_time, e.end_time, 1 AS is_exam
+FROM exams AS e
+JOIN exam_targets AS et ON et.exam_schedule_id = e.exam_schedule_id
+JOIN users AS u ON u.id = e.user_id
+WHERE e.exam_date = %s
+  AND u.email IS NOT NULL
+UNION ALL
+SELECT u.email, m.start_time, m.end_time, 0 AS is_exam
+FROM course_unit_programme_mappings AS m
+JOIN days AS d ON d.id = m.day_id
+JOIN users AS u ON u.id = m.user_id
+WHERE UPPER(d.name) IN (%s, %s)
+  AND m.academic_session_id = %s
+  AND u.email IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM exam_targets);
+"""
+
+ASSIGN = 'assign'
+RELEASE = 'unassign'
+
+
+def _to_time(value, default):
+    """Normalise a MySQL TIME (timedelta), time or 'HH:MM[:SS]' string."""
+    if value is None:
+        return default
+    if isinstance(value, time):
+        return value
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds()) % 86400
+        return time(seconds // 3600, (seconds % 3600) // 60, seconds % 60)
+    parts = [int(part) for part in str(value).split(':')]
+    return time(*parts[:3])
+
+
+def fetch_sessions(target_date, connection=None, academic_session_id=None):
+    """
+    Fetch every session on target_date.
+
+    Exam days replace the teaching timetable, as in the day-level schedule.
+
+    Returns:
+        list: (email, start datetime, end datetime, is_exam) tuples.
+    """
+    if academic_session_id is None:
+        academic_session_id = Config.ACADEMIC_SESSION_ID
+    if isinstance(target_date, datetime):
+        target_date = target_date.date()
+
+    with db_connection(connection) as conn:
+        cursor = conn.cursor()
+        cursor.execute(SLOTS_QUERY, (target_date, target_date, *day_names(target_date), academic_session_id))
+        rows = cursor.fetchall()
+        cursor.close()
+
+    sessions = []
+    for email, start, end, is_exam in rows:
+        email = normalize_email(email)
+        if not email:
+            continue
+        start_dt = datetime.combine(target_date, _to_time(start, time.min))
+        end_dt = datetime.combine(target_date, _to_time(end, time(23, 59, 59)))
+        if end_dt <= start_dt:
+            end_dt = start_dt + timedelta(minutes=1)
+        sessions.append((email, start_dt, end_dt, bool(is_exam)))
+    return sessions
+
+
+def fetch_slots(target_date, connection=None, academic_session_id=None):
+    """
+    Fetch every (email, start, end) session on target_date.
+
+    Returns:
+        list: (email, start datetime, end datetime) tuples.
+    """
+    return [session[:3] for session in fetch_sessions(target_date, connection, academic_session_id)]
+
+
+def merge_slots(slots, lead=None, release=None):
+    """
+    Turn sessions into license holding windows per user.
+
+    Each session is widened by the lead and release times, then overlapping
+    windows for the same user are merged.
+
+    Returns:
+        dict: email -> sorted list of (hold_from, hold_until) tuples.
+    """
+    lead = timedelta(minutes=Config.SLOT_LEAD_MINUTES if lead is None else lead)
+    release = timedelta(minutes=Config.SLOT_RELEASE_MINUTES if release is None else release)
+
+    by_user = {}
+    for email, start, end in slots:
+        by_user.setdefault(email, []).append((start - lead, end + release))
+
+    windows = {}
+    for email, spans in by_user.items():
+        spans.sort()
+        merged = [list(spans[0])]
+        for start, end in spans[1:]:
+            if start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        windows[email] = [tuple(span) for span in merged]
+    return windows
+
+
+def peak_concurrency(windows):
+    """
+    Sweep the holding windows to find the maximum number of seats in use.
+
+    Returns:
+        tuple: (peak seat count, datetime when the peak starts)
+    """
+    edges = []
+    for spans in windows.values():
+        for start, end in spans:
+            edges.append((start, 1))
+            edges.append((end, -1))
+    # Releases sort before assigns at the same instant
+    edges.sort(key=lambda edge: (edge[0], edge[1]))
+
+    current = peak = 0
+    peak_at = None
+    for when, delta in edges:
+        current += delta
+        if current > peak:
+            peak, peak_at = current, when
+    return peak, peak_at
+
+
+class SlotScheduler:
+    """Priority queue of upcoming assign/release events."""
+
+    def __init__(self, windows=None, exempt_users=None):
+        self._exempt = set(map(normalize_email, Config.EXEMPT_USERS if exempt_users is None else exempt_users))
+        self._events = []
+        self._seq = 0
+        self.add_windows(windows or {})
+
+    def add_windows(self, windows):
+        """Queue the assign and release events for a day's holding windows."""
+        for email, spans in windows.items():
+            for start, end in spans:
+                self._push(start, ASSIGN, email)
+                if email not in self._exempt:
+                    self._push(end, RELEASE, email)
+
+    def _push(self, when, action, email):
+        # The sequence number keeps ordering stable for events at the same time
+        heapq.heappush(self._events, (when, self._seq, action, email))
+        self._seq += 1
+
+    def __len__(self):
+        return len(self._events)
+
+    def next_event_time(self):
+        return self._events[0][0] if self._events else None
+
+    def pop_due(self, now):
+        """
+        Pop every event due at or before now.
+
+        Each user is settled by their latest event, so a daemon started
+        during a session licenses that user even though their earlier
+        windows are popped in the same batch. A user released and then
+        re-assigned in one batch keeps their seat without a call.
+
+        Returns:
+            tuple: (emails_to_unassign, emails_to_assign)
+        """
+        first, last = {}, {}
+        while self._events and self._events[0][0] <= now:
+            _, _, action, email = heapq.heappop(self._events)
+            first.setdefault(email, action)
+            last[email] = action
+        to_unassign = [email for email, action in last.items() if action == RELEASE]
+        to_assign = [email for email, action in last.items() if action == ASSIGN and first[email] != RELEASE]
+        return to_unassign, to_assign
+
+    def requeue(self, when, emails_to_unassign, emails_to_assign):
+        """Put events back (e.g. when the run lock was busy) to retry at `when`."""
+        for email in emails_to_unassign:
+            self._push(when, RELEASE, email)
+        for email in emails_to_assign:
+            self._push(when, ASSIGN, email)
+
+
+def plan_day(target_date=None, connection=None):
+    """Fetch sessions for a date and return (windows, peak, peak_at)."""
+    target_date = target_date or date.today()
+    windows = merge_slots(fetch_slots(target_date, connection=connection))
+    peak, peak_at = peak_concurrency(windows)
+    return windows, peak, peak_at
+
+
+def print_report(target_date, windows, peak, peak_at):
+    print(f"\n🕒 Slot plan for {target_date.strftime('%A %Y-%m-%d')}")
+    print("=" * 40)
+    print(f"👥 Users with sessions: {len(windows)}")
+    print(f"🎟️  Seat-windows: {sum(len(spans) for spans in windows.values())}")
+    if peak_at:
+        print(f"📈 Peak concurrent demand: {peak} seats at {peak_at.strftime('%H:%M')}")
+    else:
+        print("📈 Peak concurrent demand: 0 seats")
+    print(f"   (day-level licensing would need {len(windows)} seats)")
+
+
+def _in_window(windows, email, when):
+    return any(start <= when < end for start, end in windows.get(email, ()))
+
+
+def retry_events(windows, failed_unassign, failed_assign, when):
+    """
+    Pick the failed events worth trying again at `when`.
+
+    An assign is retried only while the user's window is still open, and a
+    release only while it is still closed, so a late retry never undoes a
+    later event. Users Zoom has said do not exist are dropped.
+
+    Returns:
+        tuple: (emails_to_unassign, emails_to_assign)
+    """
+    to_unassign = [email for email, _ in failed_unassign if not _in_window(windows, email, when)]
+    to_assign = [email for email, _ in failed_assign if _in_window(windows, email, when)]
+    try:
+        to_unassign, _ = get_negative_cache().split(to_unassign)
+        to_assign, _ = get_negative_cache().split(to_assign)
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not read negative cache: {e}")
+    return to_unassign, to_assign
+
+
+def run_slots(stop_event):
+    """
+    Apply slot events for today, then each following day, until stopped.
+
+    One scheduler lives for the whole run: events still queued at midnight
+    (releases of windows that run past it, retries) carry into the next day,
+    and keep firing while the new day's sessions cannot be fetched.
+    """
+    scheduler = SlotScheduler()
+    windows = {}
+    planned_day = None
+    while not stop_event.is_set():
+        today = date.today()
+        midnight = datetime.combine(today + timedelta(days=1), time.min)
+        until = midnight
+        if planned_day != today:
+            try:
+                day_windows, peak, peak_at = plan_day(today)
+            except Error as e:
+                print(f"❌ Error while fetching slots: {e}")
+                until = min(midnight, datetime.now() + timedelta(seconds=60))
+            else:
+                print_report(today, day_windows, peak, peak_at)
+                if len(scheduler):
+                    print(f"↪️  {len(scheduler)} events carried over from the previous day.")
+                scheduler.add_windows(day_windows)
+                windows, planned_day = day_windows, today
+
+        while not stop_event.is_set() and datetime.now() < until:
+            now = datetime.now()
+            to_unassign, to_assign = scheduler.pop_due(now)
+            if to_unassign or to_assign:
+                with run_lock() as acquired:
+                    retry_at = now + timedelta(seconds=RETRY_SECONDS)
+                    if acquired:
+                        # Each batch judges Zoom afresh, like a full run does
+                        zoom_breaker.reset()
+                        failed_unassign, failed_assign = run_bulk_license_changes(to_unassign, to_assign)
+                        retry_unassign, retry_assign = retry_events(windows, failed_unassign, failed_assign, retry_at)
+                        if retry_unassign or retry_assign:
+                            print(f"🔁 {len(retry_unassign) + len(retry_assign)} slot events failed; "
+                                  f"retrying in {RETRY_SECONDS}s.")
+                            scheduler.requeue(retry_at, retry_unassign, retry_assign)
+                    else:
+                        print("⏳ Another license run is in progress; events will be retried.")
+                        scheduler.requeue(retry_at, to_unassign, to_assign)
+
+            upcoming = scheduler.next_event_time() or until
+            stop_event.wait(max(1.0, (min(upcoming, until) - datetime.now()).total_seconds()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Just-in-time license slots from class and exam times.")
+    parser.add_argument('--date', type=date.fromisoformat, default=None, help="Date to report (YYYY-MM-DD)")
+    parser.add_argument('--run', action='store_true', help="Apply assign/release events as they fall due")
+    args = parser.parse_args()
+    Config.require(DB_SETTINGS, *([ZOOM_SETTINGS] if args.run else []))
+
+    if args.run and Config.LICENSE_MODE != 'slot':
+        # Day-level runs would reassign seats this mode has released
+        print("❌ slots.py --run needs LICENSE_MODE=slot, which turns off day-level runs.")
+        sys.exit(2)
+
+    if args.run:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        run_slots(stop)
+    else:
+        target = args.date or date.today()
+        try:
+            print_report(target, *plan_day(target))
+        except Error as e:
+            print(f"❌ Error while fetching slots: {e}")
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from metrics import metrics
+
+
+class Stages:
+    """
+    Run named units of I/O concurrently, each once its dependencies are done.
+
+    A stage starts as soon as every stage listed in `after` has finished, so
+    independent fetches overlap and the wait is the longest chain of
+    dependent fetches rather than the sum of all of them. Each stage is timed
+    as a metrics phase under its own name.
+
+    If a dependency raises, the stages after it raise the same exception.
+    Use as a context manager; leaving the block waits for running stages and
+    cancels any that have not started.
+    """
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+        self._futures = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # shutdown(cancel_futures=True) needs Python 3.9; cancel() is a no-op
+        # for stages that are already running or done
+        for future in self._futures.values():
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+    def add(self, name, func, *args, after=(), **kwargs):
+        """
+        Schedule `func(*args, **kwargs)` as stage `name`.
+
+        Args:
+            name (str): Stage name, also used as the metrics phase.
+            func (callable): Work to run.
+            after (iterable): Names of stages that must finish first. They
+                              must already have been added, which also rules
+                              out cycles.
+        """
+        dependencies = [self._futures[dependency] for dependency in after]
+
+        def run():
+            # Dependencies were submitted earlier, so they are already running
+            # or done and waiting on them cannot starve the pool
+            for dependency in dependencies:
+                dependency.result()
+            with metrics.phase(name):
+                return func(*args, **kwargs)
+
+        self._futures[name] = self._executor.submit(run)
+
+    def wait(self):
+        """Block until every stage has finished, whether or not it succeeded."""
+        wait(self._futures.values())
+
+    def result(self, name):
+        """
+        Wait for a stage and return its result.
+
+        Raises:
+            Exception: Whatever the stage, or one of its dependencies, raised.
+        """
+        return self._futures[name].result()
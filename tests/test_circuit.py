@@ -0,0 +1,78 @@
+"""
+Circuit breaker recovery through the bulk engine, against the local mock Zoom API.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'bench')]
+
+import mock_zoom
+import zoom_client
+from bulk import run_bulk_license_changes, DEFERRED_MESSAGE
+from circuit import zoom_breaker, CLOSED, OPEN
+from config import Config
+from zoom_auth import token_provider
+
+EMAILS = [f"user{i}@example.edu" for i in range(6)]
+
+
+class CircuitRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.state = mock_zoom.MockZoomState({email: 1 for email in EMAILS}, total_licenses=10)
+        self.server = mock_zoom.make_server('127.0.0.1', 0, self.state)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        self.saved = {name: getattr(Config, name) for name in
+                      ('ZOOM_API_BASE_URL', 'ZOOM_AUTH_URL', 'ZOOM_MAX_RETRIES', 'CACHE_DIR')}
+        Config.ZOOM_API_BASE_URL = f"{base}/v2"
+        Config.ZOOM_AUTH_URL = f"{base}/oauth/token"
+        Config.ZOOM_MAX_RETRIES = 0
+        Config.CACHE_DIR = tempfile.mkdtemp()
+        token_provider.invalidate()
+        zoom_client._client = None
+
+        self.breaker_settings = (zoom_breaker.min_calls, zoom_breaker.window, zoom_breaker.cooldown)
+        zoom_breaker.min_calls, zoom_breaker.window, zoom_breaker.cooldown = 2, 4, 0.2
+        zoom_breaker.reset()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for name, value in self.saved.items():
+            setattr(Config, name, value)
+        zoom_breaker.min_calls, zoom_breaker.window, zoom_breaker.cooldown = self.breaker_settings
+        zoom_breaker.reset()
+        token_provider.invalidate()
+        zoom_client._client = None
+
+    def test_open_cooldown_half_open_closed(self):
+        # Outage: the first calls fail, the circuit opens and the rest are deferred
+        self.state.error_rate = 1.0
+        _, failed = run_bulk_license_changes([], EMAILS, max_workers=1)
+        self.assertEqual(zoom_breaker.state, OPEN)
+        self.assertEqual(len(failed), len(EMAILS))
+        self.assertIn(DEFERRED_MESSAGE, [error for _, error in failed])
+
+        # Still cooling down: nothing reaches Zoom
+        self.state.error_rate = 0.0
+        _, failed = run_bulk_license_changes([], EMAILS, max_workers=1)
+        self.assertEqual({error for _, error in failed}, {DEFERRED_MESSAGE})
+
+        # After the cooldown the trial call goes through and closes the circuit
+        time.sleep(zoom_breaker.cooldown)
+        _, failed = run_bulk_license_changes([], EMAILS, max_workers=1)
+        self.assertEqual(failed, [])
+        self.assertEqual(zoom_breaker.state, CLOSED)
+        self.assertTrue(all(self.state.users[email] == 2 for email in EMAILS))
+
+
+if __name__ == "__main__":
+    unittest.main()
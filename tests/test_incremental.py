@@ -0,0 +1,296 @@
+"""
+Intra-day sync: high-water marks, full-run fallbacks, backoff and the
+believed-state diff, against a small SQLite schedule.
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'bench')]
+
+import getschedule
+import incremental
+import synth_schedule
+from config import Config
+from incremental import apply_changes, fetch_baseline, fetch_marks, load_state, save_state, sync_licenses
+from lookahead import load_applied_state, save_applied_state
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+SESSION = 2
+
+
+def email(user_id):
+    return synth_schedule.email_for(user_id)
+
+
+class ScheduleDB:
+    """A few users and teaching rows; every write gets a later updated_at."""
+
+    def __init__(self, users=8):
+        self.db = sqlite3.connect(':memory:', check_same_thread=False)
+        self.db.executescript(synth_schedule.SCHEMA)
+        self.db.executemany("INSERT INTO days (id, name) VALUES (?, ?)",
+                            list(enumerate(synth_schedule.DAY_NAMES, 1)))
+        self._clock = datetime(2026, 1, 1)
+        for user_id in range(1, users + 1):
+            self.db.execute("INSERT INTO users (id, email, updated_at) VALUES (?, ?, ?)",
+                            (user_id, email(user_id), self.stamp()))
+        self.connection = synth_schedule.SQLiteConnection(self.db)
+
+    def stamp(self):
+        self._clock += timedelta(seconds=1)
+        return self._clock.isoformat(sep=' ')
+
+    def add_mapping(self, user_id, day=TODAY):
+        cursor = self.db.execute(
+            "INSERT INTO course_unit_programme_mappings (user_id, day_id, academic_session_id, updated_at) "
+            "VALUES (?, ?, ?, ?)", (user_id, day.weekday() + 1, SESSION, self.stamp()))
+        return cursor.lastrowid
+
+    def move_mapping(self, row_id, user_id):
+        self.db.execute("UPDATE course_unit_programme_mappings SET user_id = ?, updated_at = ? WHERE id = ?",
+                        (user_id, self.stamp(), row_id))
+
+    def delete_mapping(self, row_id):
+        self.db.execute("DELETE FROM course_unit_programme_mappings WHERE id = ?", (row_id,))
+
+    def rename_user(self, user_id, new_email):
+        self.db.execute("UPDATE users SET email = ?, updated_at = ? WHERE id = ?", (new_email, self.stamp(), user_id))
+
+    def add_exam_schedule(self):
+        self.db.execute("INSERT INTO exam_schedules (is_active, start_date, end_date, updated_at) VALUES (1, ?, ?, ?)",
+                        (TODAY.isoformat(), TODAY.isoformat(), self.stamp()))
+
+
+class ApplyChangesTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = ScheduleDB()
+        self.row1 = self.schedule.add_mapping(1)
+        self.row2 = self.schedule.add_mapping(2)
+        self.schedule.add_mapping(3, day=TOMORROW)
+        conn = self.schedule.connection
+        marks = fetch_marks(conn, SESSION)
+        self.state = fetch_baseline(conn, TODAY, SESSION)
+        self.state['marks'] = marks
+
+    def apply(self):
+        conn = self.schedule.connection
+        return apply_changes(conn, self.state, fetch_marks(conn, SESSION), SESSION)
+
+    def test_baseline_holds_todays_rows(self):
+        self.assertEqual(self.state['rows'], {f"m:{self.row1}": '1', f"m:{self.row2}": '2'})
+        self.assertEqual(incremental.desired_emails(self.state), {email(1), email(2)})
+
+    def test_moved_row_affects_both_users(self):
+        self.schedule.move_mapping(self.row2, 4)
+        affected, reason = self.apply()
+        self.assertIsNone(reason)
+        self.assertEqual(affected, {email(2), email(4)})
+        self.assertEqual(incremental.desired_emails(self.state), {email(1), email(4)})
+
+    def test_inserted_rows(self):
+        self.schedule.add_mapping(5)
+        self.schedule.add_mapping(6, day=TOMORROW)
+        affected, reason = self.apply()
+        self.assertIsNone(reason)
+        self.assertEqual(affected, {email(5)})
+        self.assertEqual(self.state['marks']['mappings']['count'], 5)
+
+    def test_nothing_changed(self):
+        marks = self.state['marks']
+        self.assertEqual(self.apply(), (set(), None))
+        self.assertEqual(self.state['marks'], marks)
+
+    def test_deleted_row_needs_a_full_run(self):
+        self.schedule.delete_mapping(self.row1)
+        _, reason = self.apply()
+        self.assertEqual(reason, "rows deleted from mappings")
+
+    def test_exam_schedule_change_needs_a_full_run(self):
+        self.schedule.add_exam_schedule()
+        self.assertEqual(self.apply(), (set(), "exam schedules changed"))
+
+    def test_changed_email_affects_old_and_new_address(self):
+        self.schedule.rename_user(1, 'renamed@example.edu')
+        affected, reason = self.apply()
+        self.assertIsNone(reason)
+        self.assertEqual(affected, {email(1), 'renamed@example.edu'})
+        self.assertIn('renamed@example.edu', incremental.desired_emails(self.state))
+
+
+class SyncLicensesTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = ScheduleDB()
+        self.row1 = self.schedule.add_mapping(1)
+        self.row2 = self.schedule.add_mapping(2)
+        self.schedule.add_mapping(3, day=TOMORROW)
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        settings = {'CACHE_DIR': self.cache_dir, 'INCREMENTAL_STATE_FILE': '', 'EXEMPT_USERS': [],
+                    'LICENSE_MODE': 'day', 'ACADEMIC_SESSION_ID': SESSION, 'INCREMENTAL_RETRY_MINUTES': 15}
+        for name, value in settings.items():
+            self.patch(mock.patch.object(Config, name, value))
+
+        schedule = self.schedule
+
+        class Pool:
+            def get_connection(self):
+                return schedule.connection
+
+        self.patch(mock.patch.object(getschedule, '_pool', Pool()))
+        self.bulk_calls = []
+        self.bulk_failures = ([], [])
+        self.patch(mock.patch.object(incremental, 'run_bulk_license_changes', self.run_bulk))
+        self.usage = {'total_licenses': 100, 'used_licenses': 0, 'available_licenses': 100}
+        self.patch(mock.patch.object(incremental, 'get_license_usage', lambda: dict(self.usage)))
+        negative_cache = mock.Mock(split=lambda emails: (list(emails), []))
+        self.patch(mock.patch.object(incremental, 'get_negative_cache', return_value=negative_cache))
+        self.patch(mock.patch.object(incremental, 'notifier'))
+        self.full_run = self.patch(mock.patch('app.manage_licenses', side_effect=self.complete_full_run))
+        self.patch(mock.patch('builtins.print'))
+
+    def patch(self, patcher):
+        started = patcher.start()
+        self.addCleanup(patcher.stop)
+        return started
+
+    def run_bulk(self, to_unassign, to_assign, free_seats=None):
+        self.bulk_calls.append((sorted(to_unassign), sorted(to_assign)))
+        failed_unassign, failed_assign = self.bulk_failures
+        self.bulk_failures = ([], [])
+        return failed_unassign, failed_assign
+
+    def complete_full_run(self):
+        # A completed run records who it left licensed
+        state = fetch_baseline(self.schedule.connection, TODAY, SESSION)
+        save_applied_state(TODAY, incremental.desired_emails(state))
+
+    def sync(self):
+        return sync_licenses(connection=self.schedule.connection)
+
+    def test_first_sync_runs_a_full_run_and_takes_a_baseline(self):
+        result = self.sync()
+        self.assertTrue(result['full_run'])
+        self.full_run.assert_called_once_with()
+        self.assertEqual(self.bulk_calls, [])
+        self.assertEqual(load_state()['licensed'], [email(1), email(2)])
+
+    def test_moved_row_moves_the_license(self):
+        self.sync()
+        self.schedule.move_mapping(self.row2, 4)
+        result = self.sync()
+        self.assertEqual(self.full_run.call_count, 1)
+        self.assertEqual(self.bulk_calls, [([email(2)], [email(4)])])
+        self.assertEqual((result['assigned'], result['unassigned'], result['full_run']), (1, 1, False))
+        self.assertEqual(load_applied_state(), (TODAY, {email(1), email(4)}))
+
+    def test_user_still_scheduled_elsewhere_keeps_the_license(self):
+        self.schedule.add_mapping(2)
+        self.sync()
+        self.schedule.move_mapping(self.row2, 4)
+        self.sync()
+        self.assertEqual(self.bulk_calls, [([], [email(4)])])
+
+    def test_rows_for_other_days_change_nothing(self):
+        self.sync()
+        self.schedule.add_mapping(5, day=TOMORROW)
+        result = self.sync()
+        self.assertEqual(self.bulk_calls, [])
+        self.assertEqual(result['assigned'], 0)
+
+    def test_deleted_row_falls_back_to_a_full_run(self):
+        self.sync()
+        self.schedule.delete_mapping(self.row1)
+        self.assertTrue(self.sync()['full_run'])
+        self.assertEqual(self.full_run.call_count, 2)
+        self.assertEqual(load_state()['licensed'], [email(2)])
+
+    def test_exam_schedule_change_falls_back_to_a_full_run(self):
+        self.sync()
+        self.schedule.add_exam_schedule()
+        self.assertTrue(self.sync()['full_run'])
+        self.assertEqual(self.full_run.call_count, 2)
+
+    def test_failed_assignment_is_retried_next_sync(self):
+        self.sync()
+        self.schedule.move_mapping(self.row2, 4)
+        # A later edit moves the marks past the moved row, so only the retry list brings it back
+        self.schedule.add_mapping(6, day=TOMORROW)
+        self.bulk_failures = ([], [(email(4), "500 - boom")])
+        self.assertEqual(self.sync()['failed'], 1)
+        self.assertEqual(load_state()['retry'], [email(4)])
+        self.assertEqual(load_applied_state(), (TODAY, {email(1)}))
+
+        self.sync()
+        self.assertEqual(self.bulk_calls[-1], ([], [email(4)]))
+        self.assertEqual(load_state()['retry'], [])
+        self.assertEqual(load_applied_state(), (TODAY, {email(1), email(4)}))
+
+    def test_no_free_seat_defers_until_next_sync(self):
+        self.sync()
+        self.schedule.add_mapping(5)
+        self.schedule.add_mapping(6, day=TOMORROW)
+        self.usage.update(used_licenses=100, available_licenses=0)
+        self.sync()
+        self.assertEqual(self.bulk_calls, [])
+        self.assertEqual(load_state()['retry'], [email(5)])
+
+        self.usage.update(used_licenses=99, available_licenses=1)
+        self.sync()
+        self.assertEqual(self.bulk_calls, [([], [email(5)])])
+
+    def test_failed_full_run_backs_off(self):
+        self.full_run.side_effect = None
+        self.assertIsNone(self.sync())
+        state = load_state()
+        self.assertEqual(state['full_run_failures'], 1)
+        retry_at = datetime.fromisoformat(state['full_run_retry_at'])
+        self.assertAlmostEqual((retry_at - datetime.now()).total_seconds(), 15 * 60, delta=5)
+
+        # Still backing off: no second full run
+        self.assertIsNone(self.sync())
+        self.assertEqual(self.full_run.call_count, 1)
+
+        state['full_run_retry_at'] = (datetime.now() - timedelta(seconds=1)).isoformat(timespec='seconds')
+        save_state(state)
+        self.assertIsNone(self.sync())
+        self.assertEqual(self.full_run.call_count, 2)
+        state = load_state()
+        self.assertEqual(state['full_run_failures'], 2)
+        retry_at = datetime.fromisoformat(state['full_run_retry_at'])
+        self.assertAlmostEqual((retry_at - datetime.now()).total_seconds(), 30 * 60, delta=5)
+
+        self.full_run.side_effect = self.complete_full_run
+        state['full_run_retry_at'] = (datetime.now() - timedelta(seconds=1)).isoformat(timespec='seconds')
+        save_state(state)
+        self.assertTrue(self.sync()['full_run'])
+        self.assertNotIn('full_run_retry_at', load_state())
+
+    def test_full_run_elsewhere_rebaselines_without_another(self):
+        self.sync()
+        # A scheduled full run licensed only user 1, e.g. user 2's assignment failed
+        save_applied_state(TODAY, [email(1)])
+        result = self.sync()
+        self.assertEqual(self.full_run.call_count, 1)
+        self.assertFalse(result['full_run'])
+        self.assertEqual(self.bulk_calls, [([], [email(2)])])
+
+    def test_believed_state_comes_from_confirmed_licenses(self):
+        self.full_run.side_effect = lambda: save_applied_state(TODAY, [email(1)])
+        self.sync()
+        self.assertEqual(self.bulk_calls, [([], [email(2)])])
+        self.assertEqual(load_state()['licensed'], [email(1), email(2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
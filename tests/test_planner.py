@@ -0,0 +1,91 @@
+"""
+Seat-capacity planning: free-seat trimming and deferral order.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import requests
+from mysql.connector import Error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import planner
+from planner import apply_capacity
+
+
+def at(hour):
+    return datetime(2026, 10, 19, hour)
+
+
+SESSIONS = [
+    ('late@x.edu', at(15), at(16), False),
+    ('early@x.edu', at(8), at(9), False),
+    ('invigilator@x.edu', at(14), at(17), True),
+    ('late@x.edu', at(10), at(11), False),
+]
+
+
+class ApplyCapacityTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(planner, 'fetch_sessions', return_value=SESSIONS)
+        self.fetch_sessions = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(planner.Config, 'ASSIGN_PRIORITY', ['exam', 'start_time'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enough_seats_skips_the_priority_lookup(self):
+        plan = apply_capacity(['old@x.edu'], ['b@x.edu', 'a@x.edu'], used_licenses=9, total_licenses=10)
+        self.assertEqual(plan['to_assign'], ['a@x.edu', 'b@x.edu'])
+        self.assertEqual(plan['deferred'], [])
+        self.assertEqual((plan['free_seats'], plan['free_after_unassign'], plan['shortfall']), (1, 2, 0))
+        self.fetch_sessions.assert_not_called()
+
+    def test_shortfall_defers_the_lowest_priority(self):
+        to_assign = ['nosession@x.edu', 'late@x.edu', 'early@x.edu', 'Invigilator@X.edu']
+        # One free seat plus one freed by the unassignment
+        plan = apply_capacity(['old@x.edu'], to_assign, used_licenses=9, total_licenses=10)
+        self.assertEqual(plan['to_assign'], ['Invigilator@X.edu', 'early@x.edu'])
+        self.assertEqual(plan['deferred'], ['late@x.edu', 'nosession@x.edu'])
+        self.assertEqual(plan['shortfall'], 2)
+        self.assertEqual((plan['total_licenses'], plan['used_licenses']), (10, 9))
+
+    def test_configured_order(self):
+        with mock.patch.object(planner.Config, 'ASSIGN_PRIORITY', ['start_time']):
+            plan = apply_capacity([], ['invigilator@x.edu', 'late@x.edu', 'early@x.edu'],
+                                  used_licenses=8, total_licenses=10)
+        self.assertEqual(plan['to_assign'], ['early@x.edu', 'late@x.edu'])
+        self.assertEqual(plan['deferred'], ['invigilator@x.edu'])
+
+    def test_overcommitted_account_has_no_free_seats(self):
+        plan = apply_capacity(['old@x.edu'], ['a@x.edu', 'b@x.edu'], used_licenses=12, total_licenses=10)
+        self.assertEqual(plan['free_seats'], 0)
+        self.assertEqual(plan['to_assign'], ['a@x.edu'])
+        self.assertEqual(plan['deferred'], ['b@x.edu'])
+
+    def test_session_lookup_failure_orders_by_email(self):
+        self.fetch_sessions.side_effect = Error("gone")
+        with mock.patch('builtins.print'):
+            plan = apply_capacity([], ['c@x.edu', 'invigilator@x.edu', 'a@x.edu'], used_licenses=8, total_licenses=10)
+        self.assertEqual(plan['to_assign'], ['a@x.edu', 'c@x.edu'])
+        self.assertEqual(plan['deferred'], ['invigilator@x.edu'])
+
+    def test_seat_count_is_fetched_once_when_not_given(self):
+        with mock.patch.object(planner, 'fetch_total_licenses', return_value=3) as fetch:
+            plan = apply_capacity([], ['a@x.edu'], used_licenses=1)
+        fetch.assert_called_once_with()
+        self.assertEqual(plan['free_seats'], 2)
+
+    def test_unavailable_seat_count_skips_the_check(self):
+        error = requests.exceptions.ConnectionError("down")
+        with mock.patch.object(planner, 'fetch_total_licenses', side_effect=error), mock.patch('builtins.print'):
+            self.assertIsNone(apply_capacity([], ['a@x.edu'], used_licenses=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
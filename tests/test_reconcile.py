@@ -0,0 +1,60 @@
+"""
+Reconciliation of the schedule against a Zoom user snapshot.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reconcile import plan_reconciliation, BASIC
+from zoom_users import LICENSED
+
+
+class PlanReconciliationTest(unittest.TestCase):
+    def plan(self, schedule, snapshot, exempt_users=(), previous=None, today='Monday'):
+        return plan_reconciliation(schedule, today, snapshot, exempt_users=list(exempt_users), previous=previous)
+
+    def test_scheduled_users(self):
+        plan = self.plan({'Monday': ['basic@x.edu', 'licensed@x.edu', 'gone@x.edu']},
+                         {'basic@x.edu': BASIC, 'licensed@x.edu': LICENSED})
+        self.assertEqual(plan['to_assign'], ['basic@x.edu'])
+        self.assertEqual(plan['missing'], ['gone@x.edu'])
+        self.assertEqual(plan['unchanged'], ['licensed@x.edu'])
+        self.assertEqual(plan['to_unassign'], [])
+
+    def test_unscheduled_managed_users(self):
+        schedule = {'Sunday': ['licensed@x.edu', 'basic@x.edu', 'admin@x.edu'], 'Monday': []}
+        snapshot = {'licensed@x.edu': LICENSED, 'basic@x.edu': BASIC, 'admin@x.edu': LICENSED}
+        plan = self.plan(schedule, snapshot, exempt_users=['Admin@X.edu'])
+        self.assertEqual(plan['to_unassign'], ['licensed@x.edu'])
+        self.assertEqual(plan['exempted'], ['admin@x.edu'])
+        self.assertEqual(plan['unchanged'], ['basic@x.edu'])
+        self.assertEqual(plan['noop'], 1)
+
+    def test_users_outside_the_schedule_are_left_alone(self):
+        plan = self.plan({'Monday': []}, {'someone@x.edu': LICENSED})
+        self.assertEqual(plan['to_unassign'], [])
+        self.assertEqual(plan['unchanged'], [])
+
+    def test_previously_licensed_users_are_managed(self):
+        # Friday's run licensed them; seen from Monday they are on neither day
+        plan = self.plan({'Sunday': [], 'Monday': ['kept@x.edu']},
+                         {'friday@x.edu': LICENSED, 'kept@x.edu': LICENSED},
+                         previous=['Friday@X.edu', 'kept@x.edu'])
+        self.assertEqual(plan['to_unassign'], ['friday@x.edu'])
+        self.assertEqual(plan['unchanged'], ['kept@x.edu'])
+
+    def test_emails_are_compared_canonically(self):
+        plan = self.plan({'Monday': [' User@X.EDU ']}, {'user@x.edu': BASIC})
+        self.assertEqual(plan['to_assign'], ['user@x.edu'])
+
+    def test_short_day_names(self):
+        plan = self.plan({'MON': ['basic@x.edu']}, {'basic@x.edu': BASIC})
+        self.assertEqual(plan['to_assign'], ['basic@x.edu'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Schedule queries against a `days` table holding full or short day names.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'bench')]
+
+import synth_schedule
+from getschedule import build_schedule_index, day_names
+from incremental import fetch_baseline
+from slots import fetch_sessions
+
+MONDAY = date(2026, 10, 19)
+
+
+class DayNamesTest(unittest.TestCase):
+    def setUp(self):
+        self.db = synth_schedule.generate(':memory:', 40)
+        self.connection = synth_schedule.SQLiteConnection(self.db)
+
+    def schedules(self):
+        index = build_schedule_index(self.connection, [MONDAY])
+        return (sorted(index.emails(MONDAY)),
+                sorted(session[0] for session in fetch_sessions(MONDAY, connection=self.connection)),
+                sorted(fetch_baseline(self.connection, MONDAY)['rows']))
+
+    def test_day_names(self):
+        self.assertEqual(day_names(MONDAY), ('MONDAY', 'MON'))
+
+    def test_short_names_match_like_full_names(self):
+        full = self.schedules()
+        self.assertTrue(all(full))
+
+        self.db.execute("UPDATE days SET name = UPPER(SUBSTR(name, 1, 3))")
+        self.assertEqual(self.schedules(), full)
+
+        self.db.execute("UPDATE days SET name = LOWER(name)")
+        self.assertEqual(self.schedules(), full)
+
+
+if __name__ == "__main__":
+    unittest.main()
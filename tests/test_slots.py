@@ -0,0 +1,126 @@
+"""
+Slot scheduler events and day rollover, on a simulated clock.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import slots
+from slots import SlotScheduler
+
+DAY = date(2026, 10, 19)
+
+
+def at(hour, minute=0, second=0, day=DAY):
+    return datetime(day.year, day.month, day.day, hour, minute, second)
+
+
+class Clock:
+    """Stands in for the wall clock and the stop event of run_slots()."""
+
+    def __init__(self, start, stop):
+        self.now = start
+        self.stop = stop
+
+    def is_set(self):
+        return self.now >= self.stop
+
+    def wait(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+class SlotSchedulerTest(unittest.TestCase):
+    def test_start_inside_a_window_assigns(self):
+        windows = {'a@example.edu': [(at(7, 45), at(9, 10)), (at(13, 45), at(15, 10))]}
+        scheduler = SlotScheduler(windows, exempt_users=[])
+        self.assertEqual(scheduler.pop_due(at(14)), ([], ['a@example.edu']))
+        self.assertEqual(scheduler.pop_due(at(15, 10)), (['a@example.edu'], []))
+
+    def test_start_after_closed_windows_releases(self):
+        windows = {'a@example.edu': [(at(7, 45), at(9, 10))]}
+        scheduler = SlotScheduler(windows, exempt_users=[])
+        self.assertEqual(scheduler.pop_due(at(14)), (['a@example.edu'], []))
+
+    def test_release_then_assign_in_one_batch_keeps_seat(self):
+        windows = {'a@example.edu': [(at(7, 45), at(9, 10)), (at(9, 20), at(11))]}
+        scheduler = SlotScheduler(windows, exempt_users=[])
+        self.assertEqual(scheduler.pop_due(at(8)), ([], ['a@example.edu']))
+        self.assertEqual(scheduler.pop_due(at(9, 30)), ([], []))
+        self.assertEqual(len(scheduler), 1)
+
+    def test_exempt_users_are_never_released(self):
+        windows = {'a@example.edu': [(at(7, 45), at(9, 10))]}
+        scheduler = SlotScheduler(windows, exempt_users=['A@example.edu'])
+        self.assertEqual(scheduler.pop_due(at(10)), ([], ['a@example.edu']))
+        self.assertEqual(len(scheduler), 0)
+
+
+class RunSlotsRolloverTest(unittest.TestCase):
+    def run_slots(self, windows_by_day, start, stop):
+        clock = Clock(start, stop)
+        calls = []
+
+        class FakeDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now
+
+        class FakeDate(date):
+            @classmethod
+            def today(cls):
+                return clock.now.date()
+
+        @contextmanager
+        def run_lock():
+            yield True
+
+        def run_bulk(to_unassign, to_assign):
+            calls.append((clock.now, list(to_unassign), list(to_assign)))
+            return [], []
+
+        def plan_day(target_date):
+            windows = windows_by_day.get(target_date, {})
+            return windows, *slots.peak_concurrency(windows)
+
+        with mock.patch.multiple(slots, datetime=FakeDatetime, date=FakeDate, run_lock=run_lock,
+                                 run_bulk_license_changes=run_bulk, plan_day=plan_day,
+                                 print_report=lambda *args: None), \
+                mock.patch.object(slots.Config, 'EXEMPT_USERS', []), \
+                mock.patch('builtins.print'):
+            slots.run_slots(clock)
+        return calls
+
+    def test_release_after_midnight_is_carried_into_the_next_day(self):
+        # An all-day row ends at 23:59:59; the release time pushes it past midnight
+        release_at = at(23, 59, 59) + timedelta(minutes=10)
+        windows = {DAY: {'a@example.edu': [(at(13, 45), release_at)]}}
+        calls = self.run_slots(windows, at(23), release_at + timedelta(hours=1))
+
+        self.assertEqual(calls[0][1:], ([], ['a@example.edu']))
+        released = [when for when, to_unassign, _ in calls if 'a@example.edu' in to_unassign]
+        self.assertEqual(len(released), 1)
+        self.assertGreaterEqual(released[0], release_at)
+
+    def test_next_day_windows_are_added_to_carried_events(self):
+        next_day = DAY + timedelta(days=1)
+        windows = {
+            DAY: {'a@example.edu': [(at(22), at(0, 15, day=next_day))]},
+            next_day: {'b@example.edu': [(at(0, 5, day=next_day), at(1, day=next_day))]},
+        }
+        calls = self.run_slots(windows, at(22), at(2, day=next_day))
+
+        events = [(email, 'release') for _, to_unassign, _ in calls for email in to_unassign]
+        events += [(email, 'assign') for _, _, to_assign in calls for email in to_assign]
+        self.assertCountEqual(events, [('a@example.edu', 'assign'), ('a@example.edu', 'release'),
+                                       ('b@example.edu', 'assign'), ('b@example.edu', 'release')])
+
+
+if __name__ == "__main__":
+    unittest.main()
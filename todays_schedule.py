@@ -1,12 +1,22 @@
-from getschedule import get_email_schedule
+import argparse
+from schedule_cache import load_schedule_cached
 from day_utils import get_day_info, get_day_schedule
+from config import Config, DB_SETTINGS
 
-def main():
+def main(offline=False):
     # Get today's and yesterday's information
     day_info = get_day_info()
     
-    # Get the full schedule
-    schedule = get_email_schedule()
+    # Get only today's and yesterday's schedule (from the snapshot when possible)
+    errors = (RuntimeError,)
+    if not offline:
+        from mysql.connector import Error
+        errors = (Error, RuntimeError)
+    try:
+        schedule, _ = load_schedule_cached(offline=offline)
+    except errors as e:
+        print(f"❌ {e}")
+        schedule = None
     
     if not schedule:
         print("❌ Failed to fetch schedule.")
@@ -42,4 +52,10 @@ def main():
     print("\n" + "=" * 30)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Show today's and yesterday's license schedule.")
+    parser.add_argument('--offline', action='store_true',
+                        help="Answer from the local schedule snapshot without touching the database")
+    args = parser.parse_args()
+    if not args.offline:
+        Config.require(DB_SETTINGS)
+    main(offline=args.offline)
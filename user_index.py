@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import threading
+import time
+from config import Config
+from identity import normalize_email
+
+LICENSED = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    user_id TEXT,
+    type INTEGER,
+    status TEXT NOT NULL DEFAULT 'active',
+    event_ts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_users_user_id ON users (user_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class UserIndex:
+    """
+    Local SQLite index of Zoom users: email -> user id, license type, status.
+
+    Kept current by webhook events (webhook.py) and by our own successful
+    PATCHes, and rebuilt from a full /users listing every
+    USER_INDEX_RESYNC_HOURS. Lookups are local and take microseconds.
+
+    Events carry Zoom's event_ts (milliseconds); an event older than what is
+    already stored for a user is ignored, so out-of-order delivery is safe.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.USER_INDEX_FILE or os.path.join(Config.CACHE_DIR, 'user_index.sqlite')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # WAL lets the webhook receiver write while a run reads
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- writes ----------------------------------------------------------
+
+    def upsert(self, email=None, user_id=None, user_type=None, status=None, event_ts=None):
+        """
+        Create or update one user. Fields left as None keep their stored value.
+
+        Zoom's user.updated events only carry the changed fields plus the user
+        id, so a user can be matched by either email or id.
+
+        Returns:
+            bool: False if the update was ignored (stale event or unknown user).
+        """
+        event_ts = int(event_ts if event_ts is not None else time.time() * 1000)
+        email = normalize_email(email)
+        with self._lock:
+            row = None
+            if email:
+                row = self._conn.execute("SELECT email, event_ts FROM users WHERE email = ?", (email,)).fetchone()
+            if row is None and user_id:
+                row = self._conn.execute("SELECT email, event_ts FROM users WHERE user_id = ?", (user_id,)).fetchone()
+
+            if row is None:
+                if not email:
+                    return False
+                self._conn.execute(
+                    "INSERT INTO users (email, user_id, type, status, event_ts) VALUES (?, ?, ?, ?, ?)",
+                    (email, user_id, user_type, status or 'active', event_ts))
+                return True
+
+            stored_email, stored_ts = row
+            if event_ts < stored_ts:
+                return False
+            self._conn.execute(
+                "UPDATE users SET email = ?, user_id = COALESCE(?, user_id), type = COALESCE(?, type), "
+                "status = COALESCE(?, status), event_ts = ? WHERE email = ?",
+                (email or stored_email, user_id, user_type, status, event_ts, stored_email))
+            return True
+
+    def delete(self, email=None, user_id=None):
+        with self._lock:
+            if email:
+                self._conn.execute("DELETE FROM users WHERE email = ?", (normalize_email(email),))
+            elif user_id:
+                self._conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+
+    def replace_all(self, users):
+        """
+        Rebuild the index from a full user listing.
+
+        Args:
+            users (iterable): Zoom user objects (email, id, type, status).
+
+        Returns:
+            int: Number of users stored.
+        """
+        now_ms = int(time.time() * 1000)
+        rows = [(normalize_email(user['email']), user.get('id'), user.get('type'), user.get('status', 'active'), now_ms)
+                for user in users if normalize_email(user.get('email'))]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM users")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO users (email, user_id, type, status, event_ts) VALUES (?, ?, ?, ?, ?)", rows)
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_full_sync', ?)",
+                                   (str(time.time()),))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    # --- reads -----------------------------------------------------------
+
+    def last_full_sync(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'last_full_sync'").fetchone()
+        return float(row[0]) if row else None
+
+    def is_fresh(self, max_age_hours=None):
+        """True if a full resync happened within USER_INDEX_RESYNC_HOURS."""
+        max_age_hours = Config.USER_INDEX_RESYNC_HOURS if max_age_hours is None else max_age_hours
+        last_sync = self.last_full_sync()
+        return last_sync is not None and time.time() - last_sync < max_age_hours * 3600
+
+    def get(self, email):
+        """Return {'email', 'id', 'type', 'status'} for one user, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT email, user_id, type, status FROM users WHERE email = ?",
+                                     (normalize_email(email),)).fetchone()
+        if row is None:
+            return None
+        return {'email': row[0], 'id': row[1], 'type': row[2], 'status': row[3]}
+
+    def snapshot(self, status='active'):
+        """
+        Returns:
+            dict: Canonical email -> user type, like reconcile.fetch_user_snapshot().
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT email, type FROM users WHERE status = ?", (status,)))
+
+    def count_licensed(self, status='active'):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users WHERE status = ? AND type = ?",
+                                      (status, LICENSED)).fetchone()[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_user_index():
+    """Return the process-wide UserIndex, opening it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = UserIndex()
+        return _index
+
+
+def index_enabled():
+    """The index is only trusted when webhooks keep it current."""
+    return bool(Config.ZOOM_WEBHOOK_SECRET_TOKEN)
+
+
+def record_license_change(email, user_type):
+    """Reflect one of our own successful PATCHes in the index."""
+    if not index_enabled():
+        return
+    try:
+        get_user_index().upsert(email=email, user_type=user_type)
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not update user index for {email}: {e}")
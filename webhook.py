@@ -0,0 +1,198 @@
+"""
+Zoom webhook receiver that keeps the local user index current.
+
+Subscribe the Zoom app to user.created, user.updated, user.deleted,
+user.activated and user.deactivated, and point the event notification
+endpoint at WEBHOOK_HOST:WEBHOOK_PORT/WEBHOOK_PATH (behind your TLS proxy).
+
+    python webhook.py                          # run the receiver
+    python webhook.py --replay events.jsonl    # sign and POST recorded events to it
+
+Every request must carry a valid x-zm-signature (HMAC-SHA256 of
+"v0:{timestamp}:{body}" with ZOOM_WEBHOOK_SECRET_TOKEN) and a recent
+x-zm-request-timestamp.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import sqlite3
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from config import Config
+from user_index import get_user_index
+from negative_cache import get_negative_cache
+
+# Reject requests whose timestamp is further than this from our clock
+MAX_CLOCK_SKEW = 300
+
+
+def sign(body, timestamp, secret=None):
+    """Return the x-zm-signature value for a request body."""
+    secret = secret or Config.ZOOM_WEBHOOK_SECRET_TOKEN
+    message = f"v0:{timestamp}:{body.decode('utf-8') if isinstance(body, bytes) else body}"
+    return "v0=" + hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, timestamp, signature, secret=None, now=None):
+    """
+    Check a webhook request's signature and timestamp.
+
+    Returns:
+        bool: True if the request came from Zoom and is not a replay.
+    """
+    secret = secret or Config.ZOOM_WEBHOOK_SECRET_TOKEN
+    if not secret or not timestamp or not signature:
+        return False
+    try:
+        if abs((now or time.time()) - int(timestamp)) > MAX_CLOCK_SKEW:
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(sign(body, timestamp, secret), signature)
+
+
+def url_validation_response(plain_token, secret=None):
+    """Answer Zoom's endpoint.url_validation challenge."""
+    secret = secret or Config.ZOOM_WEBHOOK_SECRET_TOKEN
+    encrypted = hmac.new(secret.encode(), plain_token.encode(), hashlib.sha256).hexdigest()
+    return {'plainToken': plain_token, 'encryptedToken': encrypted}
+
+
+def apply_event(event, index=None):
+    """
+    Apply one user event to the index.
+
+    Returns:
+        bool: True if the event was applied, False if it was ignored.
+    """
+    index = index or get_user_index()
+    name = event.get('event')
+    obj = event.get('payload', {}).get('object', {})
+    event_ts = event.get('event_ts')
+    email, user_id = obj.get('email'), obj.get('id')
+
+    if name == 'user.deleted':
+        index.delete(email=email, user_id=user_id)
+        return True
+    if email and name in ('user.created', 'user.updated', 'user.activated'):
+        # The user exists now, so stop skipping them
+        get_negative_cache().discard([email])
+    if name in ('user.created', 'user.updated'):
+        return index.upsert(email=email, user_id=user_id, user_type=obj.get('type'),
+                            status=obj.get('status'), event_ts=event_ts)
+    if name == 'user.activated':
+        return index.upsert(email=email, user_id=user_id, status='active', event_ts=event_ts)
+    if name == 'user.deactivated':
+        return index.upsert(email=email, user_id=user_id, status='inactive', event_ts=event_ts)
+    return False
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    server_version = "ZoomLicenseWebhook/1.0"
+
+    def log_message(self, format, *args):
+        # Events are logged below; skip the per-request access log
+        pass
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload or {}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.split('?', 1)[0] != Config.WEBHOOK_PATH:
+            self._reply(404)
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not verify_signature(body, self.headers.get('x-zm-request-timestamp'),
+                                self.headers.get('x-zm-signature')):
+            print("⚠️  Rejected webhook with an invalid signature")
+            self._reply(401)
+            return
+        try:
+            event = json.loads(body)
+        except ValueError:
+            self._reply(400)
+            return
+
+        if event.get('event') == 'endpoint.url_validation':
+            self._reply(200, url_validation_response(event['payload']['plainToken']))
+            return
+
+        try:
+            applied = apply_event(event)
+        except sqlite3.Error as e:
+            print(f"❌ Could not apply {event.get('event')}: {e}")
+            # A non-2xx makes Zoom retry the delivery
+            self._reply(500)
+            return
+        obj = event.get('payload', {}).get('object', {})
+        marker = "✅" if applied else "ℹ️ "
+        print(f"{marker} {event.get('event')} {obj.get('email') or obj.get('id')}")
+        self._reply(200)
+
+
+def make_server(host=None, port=None):
+    return ThreadingHTTPServer((host or Config.WEBHOOK_HOST, port or Config.WEBHOOK_PORT), WebhookHandler)
+
+
+def replay(path, url=None, secret=None):
+    """
+    POST recorded events (one JSON object per line) to a receiver, signed
+    with the configured secret, for local testing.
+
+    Returns:
+        tuple: (accepted, rejected) counts.
+    """
+    url = url or f"http://{Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}{Config.WEBHOOK_PATH}"
+    accepted = rejected = 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            body = line.strip().encode()
+            timestamp = str(int(time.time()))
+            response = requests.post(url, data=body, timeout=10, headers={
+                'Content-Type': 'application/json',
+                'x-zm-request-timestamp': timestamp,
+                'x-zm-signature': sign(body, timestamp, secret)
+            })
+            if response.ok:
+                accepted += 1
+            else:
+                rejected += 1
+                print(f"❌ {response.status_code} for {line.strip()[:80]}")
+    return accepted, rejected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Receive Zoom user webhooks into the local user index.")
+    parser.add_argument('--replay', metavar='FILE', help="Sign and POST events from a JSONL file, then exit")
+    parser.add_argument('--url', help="Receiver URL for --replay (default: the configured endpoint)")
+    args = parser.parse_args()
+
+    if not Config.ZOOM_WEBHOOK_SECRET_TOKEN:
+        print("❌ ZOOM_WEBHOOK_SECRET_TOKEN is not set")
+        sys.exit(1)
+
+    if args.replay:
+        accepted, rejected = replay(args.replay, args.url)
+        print(f"📨 Replayed {accepted + rejected} events: {accepted} accepted, {rejected} rejected")
+        sys.exit(1 if rejected else 0)
+
+    server = make_server()
+    print(f"🚀 Listening for Zoom webhooks on {Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}{Config.WEBHOOK_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("👋 Webhook receiver stopped.")
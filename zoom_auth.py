@@ -0,0 +1,149 @@
+import base64
+import json
+import os
+import threading
+import time
+
+import requests
+from config import Config
+from metrics import metrics
+
+
+class TokenProvider:
+    """
+    Caches the Zoom Server-to-Server OAuth token for its whole lifetime.
+
+    The token is kept in memory and, when ZOOM_TOKEN_CACHE_FILE is set, in a
+    small JSON file so back-to-back cron invocations can reuse it. It is
+    refreshed REFRESH_MARGIN seconds before it expires, and concurrent callers
+    share a lock so only one of them hits the OAuth endpoint.
+    """
+
+    def __init__(self, cache_file=None, refresh_margin=None):
+        self.cache_file = cache_file if cache_file is not None else Config.ZOOM_TOKEN_CACHE_FILE
+        self.refresh_margin = refresh_margin if refresh_margin is not None else Config.ZOOM_TOKEN_REFRESH_MARGIN
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, expires_at):
+        return expires_at - self.refresh_margin > time.time()
+
+    def _load_file_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        # Never reuse a token issued for different credentials
+        if cached.get('account_id') != Config.ZOOM_ACCOUNT_ID or cached.get('client_id') != Config.ZOOM_CLIENT_ID:
+            return False
+        if not self._is_fresh(cached.get('expires_at', 0)):
+            return False
+
+        self._token = cached['access_token']
+        self._expires_at = cached['expires_at']
+        return True
+
+    def _save_file_cache(self):
+        if not self.cache_file:
+            return
+        cached = {
+            'access_token': self._token,
+            'expires_at': self._expires_at,
+            'account_id': Config.ZOOM_ACCOUNT_ID,
+            'client_id': Config.ZOOM_CLIENT_ID
+        }
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Write with owner-only permissions and swap atomically
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cached, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"⚠️  Could not write token cache: {e}")
+
+    def _fetch_token(self):
+        url = Config.ZOOM_AUTH_URL
+        auth_string = f"{Config.ZOOM_CLIENT_ID}:{Config.ZOOM_CLIENT_SECRET}"
+        auth_encoded = base64.b64encode(auth_string.encode()).decode()
+
+        headers = {
+            "Authorization": f"Basic {auth_encoded}",
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+
+        # URL-encoded form data
+        data = f"grant_type=account_credentials&account_id={Config.ZOOM_ACCOUNT_ID}"
+
+        try:
+            requested_at = time.time()
+            started = time.perf_counter()
+            response = requests.post(url, headers=headers, data=data,
+                                     timeout=(Config.ZOOM_CONNECT_TIMEOUT, Config.ZOOM_READ_TIMEOUT))
+            metrics.observe('zoom_token_fetch_duration_seconds', time.perf_counter() - started)
+            metrics.inc('zoom_token_fetches_total', status=str(response.status_code))
+            response.raise_for_status()
+            token_data = response.json()
+        except requests.exceptions.RequestException as e:
+            print("❌ Failed to fetch token:")
+            print(f"Error: {str(e)}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Status: {e.response.status_code}")
+                print(f"Response: {e.response.text}")
+            raise
+
+        self._token = token_data["access_token"]
+        # Zoom tokens live for an hour; measure from when we asked for it
+        self._expires_at = requested_at + int(token_data.get("expires_in", 3600))
+        self._save_file_cache()
+
+    def get_token(self, force_refresh=False):
+        """
+        Return a valid access token, fetching a new one only when needed.
+
+        Args:
+            force_refresh (bool): Ignore any cached token (e.g. after a 401).
+
+        Returns:
+            str: Bearer token for the Zoom API.
+        """
+        if not force_refresh and self._token and self._is_fresh(self._expires_at):
+            return self._token
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not force_refresh:
+                if self._token and self._is_fresh(self._expires_at):
+                    return self._token
+                if self._load_file_cache():
+                    return self._token
+            self._fetch_token()
+            return self._token
+
+    def invalidate(self):
+        """Drop the cached token so the next call fetches a new one."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+            if self.cache_file and os.path.exists(self.cache_file):
+                try:
+                    os.remove(self.cache_file)
+                except OSError:
+                    pass
+
+
+# Shared provider used by every module that talks to Zoom
+token_provider = TokenProvider()
+
+
+def get_access_token(force_refresh=False):
+    """Return the shared, cached Zoom access token."""
+    return token_provider.get_token(force_refresh=force_refresh)
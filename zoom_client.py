@@ -0,0 +1,305 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+from metrics import metrics
+from zoom_auth import token_provider
+from circuit import zoom_breaker
+
+# Status codes worth retrying with backoff
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """Raised when the daily Zoom quota for a category is used up."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Allows `rate` requests per second on average with bursts of up to
+    `capacity` (a tenth of a second's worth by default, so a burst plus the
+    steady refill never exceeds the per-second quota). acquire() blocks until
+    a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, rate / 10))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self, seconds):
+        """Stop handing out tokens for `seconds` (used after a 429)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            # Concurrent 429s overlap rather than stacking their waits
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class DailyQuota:
+    """Counts requests per UTC day and refuses them once `limit` is reached."""
+
+    def __init__(self, limit):
+        self.limit = int(limit)
+        self._day = None
+        self._count = 0
+        self._blocked_until = None
+        self._lock = threading.Lock()
+
+    def consume(self, category):
+        with self._lock:
+            now = datetime.now(timezone.utc)
+            if self._day != now.date():
+                self._day = now.date()
+                self._count = 0
+            if self._blocked_until and now < self._blocked_until:
+                raise RateLimitExceeded(
+                    f"Zoom daily limit reached for '{category}' APIs until {self._blocked_until.isoformat()}"
+                )
+            if self.limit > 0 and self._count >= self.limit:
+                raise RateLimitExceeded(f"Zoom daily limit of {self.limit} '{category}' requests reached")
+            self._count += 1
+
+    def block_until(self, until):
+        with self._lock:
+            self._blocked_until = until
+
+
+def _endpoint_label(path):
+    """Collapse per-user paths so metrics have a bounded number of series."""
+    path = '/' + path.split('?', 1)[0].lstrip('/')
+    if path.startswith('/users/'):
+        return '/users/{userId}'
+    return path
+
+
+def _parse_retry_after(value):
+    """
+    Convert a Retry-After header into seconds to wait.
+
+    Zoom sends either a number of seconds or, for daily limits, a timestamp.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class ZoomClient:
+    """
+    Zoom API client shared by every module in a run.
+
+    - One pooled requests.Session with keep-alive connections
+    - Token-bucket limiter per Zoom rate-limit category ("light", "medium", "heavy")
+    - Honours Retry-After and X-RateLimit-* headers
+    - Jittered exponential backoff on 429 and 5xx responses
+    - Refreshes the OAuth token once on a 401
+    - Explicit connect/read timeouts and a circuit breaker, so an outage
+      fails fast instead of hanging the run
+    """
+
+    def __init__(self, base_url=None, pool_size=None, max_retries=None):
+        self.base_url = (base_url or Config.ZOOM_API_BASE_URL).rstrip('/')
+        self.max_retries = max_retries if max_retries is not None else Config.ZOOM_MAX_RETRIES
+        pool_size = pool_size or max(10, Config.LICENSE_MAX_WORKERS)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.limiters = {
+            'light': TokenBucket(Config.ZOOM_RATE_LIMIT_LIGHT),
+            'medium': TokenBucket(Config.ZOOM_RATE_LIMIT_MEDIUM),
+            'heavy': TokenBucket(Config.ZOOM_RATE_LIMIT_HEAVY),
+        }
+        self.daily_quotas = {
+            'light': DailyQuota(Config.ZOOM_DAILY_LIMIT_LIGHT),
+            'medium': DailyQuota(Config.ZOOM_DAILY_LIMIT_MEDIUM),
+            'heavy': DailyQuota(Config.ZOOM_DAILY_LIMIT_HEAVY),
+        }
+
+    def _url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _backoff(self, attempt):
+        # Full jitter: anywhere between 0 and base * 2^attempt, capped
+        ceiling = min(Config.ZOOM_MAX_RETRY_WAIT, Config.ZOOM_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _observe_rate_headers(self, response, category):
+        """Respect the rate-limit state Zoom reports back to us."""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        limit_type = (response.headers.get('X-RateLimit-Type') or '').lower()
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            return
+        if remaining > 0:
+            return
+
+        wait = _parse_retry_after(response.headers.get('Retry-After'))
+        if 'daily' in limit_type:
+            if wait is None:
+                # Daily limits reset at 00:00 UTC
+                now = datetime.now(timezone.utc)
+                wait = 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+            self.daily_quotas[category].block_until(datetime.fromtimestamp(time.time() + wait, timezone.utc))
+        else:
+            self.limiters[category].drain(wait if wait is not None else 1.0)
+
+    def request(self, method, path, category='light', **kwargs):
+        """
+        Send a request to the Zoom API.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to ZOOM_API_BASE_URL (or an absolute URL).
+            category (str): Zoom rate-limit category of the endpoint.
+            **kwargs: Passed through to requests.Session.request.
+
+        Returns:
+            requests.Response: The final response after any retries.
+        """
+        try:
+            return self._request(method, path, category, **kwargs)
+        finally:
+            # A half-open trial that ended without an outcome (e.g. a spent
+            # daily quota) must not hold the circuit open for good
+            zoom_breaker.end_trial()
+
+    def _request(self, method, path, category, **kwargs):
+        url = self._url(path)
+        endpoint = _endpoint_label(path)
+        limiter = self.limiters[category]
+        quota = self.daily_quotas[category]
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.setdefault('Content-Type', 'application/json')
+        kwargs.setdefault('timeout', (Config.ZOOM_CONNECT_TIMEOUT, Config.ZOOM_READ_TIMEOUT))
+        refreshed_token = False
+        attempt = 0
+
+        while True:
+            # Re-checked before each retry so an outage stops the backoff loop too
+            zoom_breaker.before_call()
+            quota.consume(category)
+            limiter.acquire()
+            try:
+                headers['Authorization'] = f"Bearer {token_provider.get_token()}"
+            except requests.exceptions.RequestException:
+                zoom_breaker.record_failure()
+                raise
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.inc('zoom_requests_total', method=method, endpoint=endpoint, status=type(e).__name__)
+                if attempt >= self.max_retries:
+                    zoom_breaker.record_failure()
+                    raise
+                metrics.inc('zoom_retries_total', reason='connection')
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            metrics.observe('zoom_request_duration_seconds', time.perf_counter() - started,
+                            method=method, endpoint=endpoint)
+            metrics.inc('zoom_requests_total', method=method, endpoint=endpoint, status=str(response.status_code))
+            if response.status_code == 429:
+                metrics.inc('zoom_rate_limited_total', endpoint=endpoint)
+            self._observe_rate_headers(response, category)
+
+            if response.status_code == 401 and not refreshed_token:
+                # Token revoked or expired early - fetch a new one once
+                token_provider.invalidate()
+                refreshed_token = True
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                if response.status_code >= 500:
+                    zoom_breaker.record_failure()
+                else:
+                    zoom_breaker.record_success()
+                return response
+
+            wait = _parse_retry_after(response.headers.get('Retry-After'))
+            if wait is None:
+                wait = self._backoff(attempt)
+            elif wait > Config.ZOOM_MAX_RETRY_WAIT:
+                # Typically a daily limit - waiting it out would stall the run
+                zoom_breaker.record_failure()
+                return response
+            else:
+                wait += random.uniform(0, Config.ZOOM_BACKOFF_BASE)
+
+            if response.status_code == 429:
+                limiter.drain(wait)
+            metrics.inc('zoom_retries_total', reason=str(response.status_code))
+            time.sleep(wait)
+            attempt += 1
+
+    def get(self, path, category='light', **kwargs):
+        return self.request('GET', path, category=category, **kwargs)
+
+    def patch(self, path, category='light', **kwargs):
+        return self.request('PATCH', path, category=category, **kwargs)
+
+    def post(self, path, category='light', **kwargs):
+        return self.request('POST', path, category=category, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide ZoomClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ZoomClient()
+    return _client
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from zoom_client import get_client
+
+LICENSED = 2
+
+
+def _fetch_page(client, params):
+    response = client.get("/users", category='medium', params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_users(status='active', page_size=None, prefetch=True, client=None):
+    """
+    Stream every user on the account, one at a time.
+
+    Follows next_page_token until the listing is exhausted. With prefetch
+    enabled the next page is requested in the background while the caller
+    works through the current one, so only about two pages are ever held
+    in memory.
+
+    Args:
+        status (str): Zoom user status to list ('active', 'inactive', 'pending').
+        page_size (int, optional): Users per page. Defaults to Config.ZOOM_USERS_PAGE_SIZE.
+        prefetch (bool): Fetch the next page while the current one is consumed.
+        client (ZoomClient, optional): Defaults to the shared client.
+
+    Yields:
+        dict: Zoom user objects as returned by the API.
+    """
+    client = client or get_client()
+    base_params = {'status': status, 'page_size': page_size or Config.ZOOM_USERS_PAGE_SIZE}
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    try:
+        page = _fetch_page(client, base_params)
+        while page is not None:
+            next_token = page.get('next_page_token')
+            pending = None
+            if next_token:
+                next_params = dict(base_params, next_page_token=next_token)
+                if executor:
+                    pending = executor.submit(_fetch_page, client, next_params)
+
+            for user in page.get('users', []):
+                yield user
+
+            if not next_token:
+                page = None
+            elif pending is not None:
+                page = pending.result()
+            else:
+                page = _fetch_page(client, next_params)
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
+
+
+def count_licensed_users(status='active', client=None):
+    """
+    Count users with a paid license (type 2) without keeping the user list.
+
+    Returns:
+        int: Number of Licensed users.
+    """
+    return sum(1 for user in iter_users(status=status, client=client) if user.get('type') == LICENSED)